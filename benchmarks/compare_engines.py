@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Time the compare engines. We compare libstdc++ with libc with both
+engines (they must give the same answers), and two builds of a synthetic
+library (by default 200k symbols, with a few changed) with the native
+engine. Run from the root of the repository:
+
+    python benchmarks/compare_engines.py
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+from symbolator.asp import ABICompareSolverSetup, PyclingoDriver  # noqa
+from symbolator.corpus.loader import load_corpora  # noqa
+from symbolator.corpus.resolver import read_ld_so_cache  # noqa
+from symbolator.corpus.symbols import SymbolTable  # noqa
+from symbolator.engines import CompareEngine  # noqa
+from symbolator.facts import get_facts  # noqa
+
+
+class Build:
+    """
+    A synthetic library, with the header of a real one.
+    """
+
+    def __init__(self, path, symbols, elfheader):
+        self.path = path
+        self.symbols = symbols
+        self.elfheader = elfheader
+
+
+def synthetic_builds(count, changed, elfheader, seed=42):
+    """
+    Two builds of a library with mangled-looking names. A fraction (changed)
+    of the symbols of the second build are removed, added or different.
+    """
+    rng = random.Random(seed)
+    builds = [SymbolTable(), SymbolTable()]
+    for i in range(count):
+        name = "_ZN9Namespace%dClass%d6methodEv" % (i % 97, i)
+        meta = ["", "FUNC", "GLOBAL", "DEFAULT", str(rng.randint(10, 30))]
+        builds[0].add(name, *meta)
+        if rng.random() < changed:
+            change = rng.choice(["removed", "added", "type", "defined"])
+            if change == "removed":
+                continue
+            elif change == "added":
+                builds[1].add(name + "_new", *meta)
+            elif change == "type":
+                meta[1] = "OBJECT"
+            else:
+                meta[4] = "UND"
+        builds[1].add(name, *meta)
+    return [Build("lib%s.so" % i, x, elfheader) for i, x in enumerate(builds)]
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        result = func()
+        seconds = time.time() - start
+        best = seconds if best is None else min(best, seconds)
+    answers = dict((k, sorted(v)) for k, v in result.answers.items())
+    return answers, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3, help="runs for each engine")
+    parser.add_argument("--symbols", type=int, default=200000, help="synthetic size")
+    parser.add_argument("--changed", type=float, default=0.01, help="changed share")
+    args = parser.parse_args()
+
+    cache = read_ld_so_cache()
+    libs = [cache.get(x, [None])[0] for x in ["libstdc++.so.6", "libc.so.6"]]
+    if None in libs:
+        sys.exit("Cannot find libstdc++.so.6 and libc.so.6")
+    corpora, errors = load_corpora(libs)
+    if errors:
+        sys.exit("\n".join(str(error) for error in errors))
+
+    def asp():
+        return PyclingoDriver().solve(
+            ABICompareSolverSetup(),
+            corpora,
+            logic_programs=get_facts("compare_libs.lp"),
+        )
+
+    expected, seconds = timed(asp, args.repeat)
+    count = sum(len(x) for x in expected.values())
+    print("%-10s %-7s %8.3fs (%s answers)" % ("libstdc++", "asp", seconds, count))
+    answers, seconds = timed(lambda: CompareEngine().solve(corpora), args.repeat)
+    assert answers == expected, "the native engine gives different answers"
+    print("%-10s %-7s %8.3fs (%s answers)" % ("libstdc++", "native", seconds, count))
+
+    builds = synthetic_builds(args.symbols, args.changed, corpora[0].elfheader)
+    answers, seconds = timed(lambda: CompareEngine().solve(builds), args.repeat)
+    count = sum(len(x) for x in answers.values())
+    name = "%sk" % (args.symbols // 1000)
+    print("%-10s %-7s %8.3fs (%s answers)" % (name, "native", seconds, count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Time grounding compare_libs.lp and compare_libs_legacy.lp (with the same
+facts), for libstdc++ with libc (few shared symbols) and libstdc++ with a
+copy of itself (all symbols shared). Run from the root of the repository:
+
+    python benchmarks/compare_programs.py
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+from symbolator.asp import ABICompareSolverSetup, PyclingoDriver, Timer  # noqa
+from symbolator.corpus.loader import load_corpora  # noqa
+from symbolator.corpus.resolver import read_ld_so_cache  # noqa
+from symbolator.facts import get_facts  # noqa
+
+PROGRAMS = ["compare_libs_legacy.lp", "compare_libs.lp"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="runs for each program")
+    args = parser.parse_args()
+
+    cache = read_ld_so_cache()
+    libs = [cache.get(x, [None])[0] for x in ["libstdc++.so.6", "libc.so.6"]]
+    if None in libs:
+        sys.exit("Cannot find libstdc++.so.6 and libc.so.6")
+
+    tmpdir = tempfile.mkdtemp()
+    copy = os.path.join(tmpdir, "libstdc++-copy.so")
+    shutil.copyfile(libs[0], copy)
+
+    for name, paths in [("libc", libs), ("copy", [libs[0], copy])]:
+        corpora, errors = load_corpora(paths)
+        if errors:
+            sys.exit("\n".join(str(error) for error in errors))
+
+        driver = PyclingoDriver(ground_only=False)
+        driver.solve(ABICompareSolverSetup(), corpora, facts_only=True)
+        expected = None
+        for logic_program in PROGRAMS:
+            best = None
+            for _ in range(args.repeat):
+                timer = Timer()
+                result = driver.ground_and_solve(
+                    [get_facts(logic_program)], timer=timer
+                )
+                seconds = timer.phases["ground"]
+                best = seconds if best is None else min(best, seconds)
+            answers = dict((k, sorted(v)) for k, v in result.answers.items())
+            if expected is None:
+                expected = answers
+            assert answers == expected, "%s gives different answers" % logic_program
+            atoms = int(driver.control.statistics["problem"]["lp"]["atoms"])
+            print("%-5s %-23s %8.3fs (%s atoms)" % (name, logic_program, best, atoms))
+    shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
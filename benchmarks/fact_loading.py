@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Compare the ways the driver can give facts to clingo (the backend, ASP
+text or aspif) for a compat check of the examples with system libraries.
+Run from the root of the repository after building examples/cpp:
+
+    LD_LIBRARY_PATH=examples/cpp python benchmarks/fact_loading.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+from symbolator.asp import (  # noqa
+    FACT_LOADERS,
+    ABICompatSolverSetup,
+    PyclingoDriver,
+    Timer,
+)
+from symbolator.corpus.loader import load_corpora  # noqa
+from symbolator.facts import get_facts  # noqa
+
+examples = os.path.join(os.path.dirname(here), "examples", "cpp")
+
+
+class CompatSetup(ABICompatSolverSetup):
+    """
+    Only find and parse system corpora once, so we time the solve.
+    """
+
+    system_corpora = None
+
+    def get_system_corpora(self, corpora):
+        if CompatSetup.system_corpora is None:
+            CompatSetup.system_corpora = super().get_system_corpora(corpora)
+        return CompatSetup.system_corpora
+
+
+def run(corpora, loader, out=None):
+    """
+    Run a compat solve, and return the answers and the time for each phase.
+    """
+    driver = PyclingoDriver(out=out, loader=loader)
+    timer = Timer()
+    result = driver.solve(
+        CompatSetup(),
+        corpora,
+        logic_programs=get_facts("is_compatible.lp"),
+        system_libs=True,
+    )
+    timer.phase("total")
+    return result.answers, timer.phases["total"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3, help="runs for each loader")
+    args = parser.parse_args()
+
+    names = ["math-client", "libmath-v1.so", "libmath-v2.so"]
+    corpora, errors = load_corpora([os.path.join(examples, x) for x in names])
+    if errors:
+        sys.exit("\n".join(str(error) for error in errors))
+
+    # Load system corpora before we time anything
+    run(corpora, "backend")
+
+    expected = None
+    times = {}
+    variants = [(loader, None) for loader in FACT_LOADERS]
+    variants.append(("backend", open(os.devnull, "w")))
+    for loader, out in variants:
+        label = loader if not out else "%s (rendered to devnull)" % loader
+        best = None
+        for _ in range(args.repeat):
+            answers, seconds = run(corpora, loader, out)
+            best = seconds if best is None else min(best, seconds)
+        if expected is None:
+            expected = answers
+        assert answers == expected, "%s gives different answers" % label
+        times[label] = best
+        print("%-32s %8.3fs" % (label, best))
+    print("fastest loader: %s" % min(FACT_LOADERS, key=times.get))
+
+
+if __name__ == "__main__":
+    main()
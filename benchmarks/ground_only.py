@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Compare reading answers after grounding with a solve. We time a compat
+check of the examples with (all symbols of) system libraries, a large
+program with few answers, and a compare of libstdc++ with libc, with many
+answers. Run from the root of the repository after building examples/cpp:
+
+    LD_LIBRARY_PATH=examples/cpp python benchmarks/ground_only.py
+"""
+
+import argparse
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+from symbolator.asp import (  # noqa
+    ABICompareSolverSetup,
+    ABICompatSolverSetup,
+    PyclingoDriver,
+    Timer,
+)
+from symbolator.corpus.loader import load_corpora  # noqa
+from symbolator.corpus.resolver import read_ld_so_cache  # noqa
+from symbolator.facts import get_facts  # noqa
+
+examples = os.path.join(os.path.dirname(here), "examples", "cpp")
+
+
+def run(setup, corpora, logic_program, ground_only):
+    """
+    Run a solve, and return the answers and the time after setup.
+    """
+    driver = PyclingoDriver(ground_only=ground_only)
+    driver.solve(setup, corpora, facts_only=True, system_libs=True)
+    timer = Timer()
+    result = driver.solve_facts([get_facts(logic_program)])
+    timer.phase("total")
+    return result.answers, timer.phases["total"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="runs for each mode")
+    args = parser.parse_args()
+
+    names = ["math-client", "libmath-v1.so", "libmath-v2.so"]
+    cache = read_ld_so_cache()
+    libs = [cache.get(x, [None])[0] for x in ["libstdc++.so.6", "libc.so.6"]]
+    if None in libs:
+        sys.exit("Cannot find libstdc++.so.6 and libc.so.6")
+
+    benchmarks = [
+        (
+            "compat",
+            ABICompatSolverSetup(slice=False),
+            [os.path.join(examples, x) for x in names],
+            "is_compatible.lp",
+        ),
+        ("compare", ABICompareSolverSetup(), libs, "compare_libs.lp"),
+    ]
+    for name, setup, paths, logic_program in benchmarks:
+        corpora, errors = load_corpora(paths)
+        if errors:
+            sys.exit("\n".join(str(error) for error in errors))
+
+        expected = None
+        for label, ground_only in [("solve", False), ("ground only", "auto")]:
+            best = None
+            for _ in range(args.repeat):
+                answers, seconds = run(setup, corpora, logic_program, ground_only)
+                best = seconds if best is None else min(best, seconds)
+            if expected is None:
+                expected = answers
+            assert answers == expected, "%s gives different answers" % label
+            count = sum(len(x) for x in answers.values())
+            print("%-8s %-12s %8.3fs (%s answers)" % (name, label, best, count))
+
+
+if __name__ == "__main__":
+    main()
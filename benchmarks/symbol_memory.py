@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Compare memory used to hold symbols as a dict of dicts and a SymbolTable,
+for the example libraries (and their system libraries), and for a synthetic
+table. Run from the root of the repository after building examples/cpp:
+
+    LD_LIBRARY_PATH=examples/cpp python benchmarks/symbol_memory.py
+"""
+
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+from symbolator.asp import ABISolverBase  # noqa
+from symbolator.corpus import Corpus  # noqa
+from symbolator.corpus.symbols import SymbolTable  # noqa
+
+examples = os.path.join(os.path.dirname(here), "examples", "cpp")
+
+
+def measure(func):
+    """
+    Return the result of a function and the memory it still holds.
+    """
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def example_symbols():
+    """
+    Symbols (as dicts) for the example binary and its system libraries.
+    """
+    solver = ABISolverBase()
+    solver.splices = {}
+    client = Corpus(os.path.join(examples, "math-client"), cache=False)
+    corpora = [client] + (solver.get_system_corpora([client]) or [])
+    return dict((corpus.path, corpus.symbols.to_dict()) for corpus in corpora)
+
+
+def synthetic_symbols(count, seed=42):
+    """
+    Symbols with mangled-looking names and a realistic mix of attributes.
+    """
+    rng = random.Random(seed)
+    versions = ["", "@@LIB_1.0", "@LIB_0.9", "@GLIBC_2.2.5 (2)"]
+    symbols = {}
+    for i in range(count):
+        name = "_ZN%dnamespace%d%dClass%dmethod%dEv" % (
+            9,
+            rng.randint(0, 999),
+            5,
+            i,
+            rng.randint(0, 9),
+        )
+        symbols[name] = {
+            "version_info": rng.choice(versions),
+            "type": rng.choice(["FUNC", "OBJECT", "NOTYPE"]),
+            "binding": rng.choice(["GLOBAL", "WEAK", "LOCAL"]),
+            "visibility": rng.choice(["DEFAULT", "HIDDEN"]),
+            "defined": rng.choice(["UND", "ABS"] + [str(x) for x in range(30)]),
+        }
+    return symbols
+
+
+def copy_dicts(symbols):
+    """
+    A dict of dicts like the decoders used to create: a new name and dict
+    for every symbol (attribute values are shared strings).
+    """
+    return dict(
+        (name.encode("utf-8").decode("utf-8"), dict(meta))
+        for name, meta in symbols.items()
+    )
+
+
+def report(label, symbols):
+    as_dicts, dict_size = measure(lambda: copy_dicts(symbols))
+    as_table, table_size = measure(lambda: SymbolTable(symbols).compact())
+    assert list(as_table.items()) == list(as_dicts.items())
+    print(
+        "%-40s %9d symbols %12.1f KiB (dict) %12.1f KiB (SymbolTable) %6.1fx"
+        % (
+            label,
+            len(symbols),
+            dict_size / 1024,
+            table_size / 1024,
+            dict_size / max(table_size, 1),
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--count", type=int, default=500000, help="symbols in the synthetic table"
+    )
+    args = parser.parse_args()
+
+    total = {}
+    for path, symbols in example_symbols().items():
+        report(os.path.basename(path), symbols)
+        total.update(("%s:%s" % (path, k), v) for k, v in symbols.items())
+    report("examples (all)", total)
+    report("synthetic", synthetic_symbols(args.count))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,15 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import functools
+import itertools
 import os
 import sys
-import time
 import types
 
-import symbolator.utils as utils
-from .corpus import Corpus
+from .corpus.loader import get_system_corpora
+from .facts import get_facts
+from .timer import Timer, measure, record, record_statistics
 
 # Since we parse the die's directly, we use these pyelftools supporting functions.
 from elftools.common.py3compat import bytes2str
@@ -30,6 +32,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
     import clingo
+    import clingo.ast
 
     # There may be a better way to detect this
     clingo_cffi = hasattr(clingo.Symbol, "_rep")
@@ -43,28 +46,6 @@ else:
     from collections import Sequence
 
 
-class Timer(object):
-    """Simple timer for timing phases of a solve"""
-
-    def __init__(self):
-        self.start = time.time()
-        self.last = self.start
-        self.phases = {}
-
-    def phase(self, name):
-        last = self.last
-        now = time.time()
-        self.phases[name] = now - last
-        self.last = now
-
-    def write(self, out=sys.stdout):
-        now = time.time()
-        out.write("Time:\n")
-        for phase, t in self.phases.items():
-            out.write("    %-15s%.4f\n" % (phase + ":", t))
-        out.write("Total: %.4f\n" % (now - self.start))
-
-
 def issequence(obj):
     if isinstance(obj, string_types):
         return False
@@ -80,6 +61,13 @@ def listify(args):
 class AspObject:
     """Object representing a piece of ASP code."""
 
+    # Subclasses declare their own slots (there are many AspFunctions)
+    __slots__ = ()
+
+
+# Most arguments we have seen converted to clingo symbols (see argify)
+SYMBOL_CACHE_SIZE = 2**20
+
 
 def _id(thing):
     """Quote string if needed for it to be a valid identifier."""
@@ -93,30 +81,63 @@ def _id(thing):
         return '"%s"' % str(thing)
 
 
+@functools.lru_cache(maxsize=SYMBOL_CACHE_SIZE, typed=True)
+def argify(arg):
+    """
+    Convert an argument of a fact to a clingo symbol. The same values (corpus
+    paths, symbol names and attributes) are arguments to many facts, so we
+    only create a symbol for each once. Clingo symbols are global, so they
+    can be shared between control objects.
+    """
+    if isinstance(arg, bool):
+        return clingo.String(str(arg))
+    elif isinstance(arg, int):
+        return clingo.Number(arg)
+    else:
+        return clingo.String(str(arg))
+
+
 class AspFunction(AspObject):
+    """
+    An ASP function (e.g., a fact). Functions are immutable and hashable (by
+    name and arguments), so we can find duplicates, and we only convert one
+    to a clingo symbol once.
+    """
+
+    __slots__ = ("name", "args", "_symbol")
+
     def __init__(self, name, args=None):
-        self.name = name
-        self.args = [] if args is None else args
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "args", () if args is None else tuple(args))
+        object.__setattr__(self, "_symbol", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("AspFunction is immutable")
+
+    def __reduce__(self):
+        # The clingo symbol is not pickled (it is made again when needed)
+        return AspFunction, (self.name, self.args)
 
     def __call__(self, *args):
         return AspFunction(self.name, args)
 
     def symbol(self, positive=True):
-        def argify(arg):
-            if isinstance(arg, bool):
-                return clingo.String(str(arg))
-            elif isinstance(arg, int):
-                return clingo.Number(arg)
-            else:
-                return clingo.String(str(arg))
+        if not positive:
+            return clingo.Function(
+                self.name, [argify(arg) for arg in self.args], positive=False
+            )
+        if self._symbol is None:
+            symbol = clingo.Function(self.name, [argify(arg) for arg in self.args])
+            object.__setattr__(self, "_symbol", symbol)
+        return self._symbol
 
-        return clingo.Function(
-            self.name, [argify(arg) for arg in self.args], positive=positive
-        )
+    def __eq__(self, other):
+        if not isinstance(other, AspFunction):
+            return NotImplemented
+        return self.name == other.name and self.args == other.args
 
-    def __getitem___(self, *args):
-        self.args[:] = args
-        return self
+    def __hash__(self):
+        return hash((self.name, self.args))
 
     def __str__(self):
         return "%s(%s)" % (self.name, ", ".join(str(_id(arg)) for arg in self.args))
@@ -132,6 +153,10 @@ class AspFunctionBuilder(object):
 
 fn = AspFunctionBuilder()
 
+# Ways the driver can give facts to clingo: with the backend (default) or as
+# program text in ASP or aspif (see benchmarks/fact_loading.py)
+FACT_LOADERS = ("backend", "text", "aspif")
+
 
 class Result(object):
     """
@@ -157,32 +182,224 @@ class Result(object):
             )
 
 
+def stringify(x):
+    if clingo_cffi:
+        # Clingo w/ CFFI will throw an exception on failure
+        try:
+            return x.string
+        except RuntimeError:
+            return str(x)
+    else:
+        return x.string or str(x)
+
+
+class ProgramInfo:
+    """
+    What we know about some logic programs from parsing them. A program is
+    stratified if it has only normal rules and constraints (no choices,
+    optimization or show terms), and no predicate depends on itself through
+    negation or an aggregate. Grounding alone then gives its only model.
+    """
+
+    # Statements that don't change if a program is stratified
+    statements = ("Rule", "ShowSignature", "Program", "Definition", "Comment")
+
+    def __init__(self):
+        self.signatures = set()
+        self.shown = None
+        self.stratified = True
+        self.depends = {}
+
+    def collect(self, node):
+        """
+        Get the signature of every atom under a node of the AST.
+        """
+        atoms = []
+        info = self
+
+        class AtomVisitor(clingo.ast.Transformer):
+            def visit_SymbolicAtom(self, atom):
+                term = atom.symbol
+                if term.ast_type == clingo.ast.ASTType.Function:
+                    atoms.append((term.name, len(term.arguments)))
+                else:
+                    info.stratified = False
+                return atom
+
+        AtomVisitor()(node)
+        self.signatures.update(atoms)
+        return atoms
+
+    def add(self, statement):
+        """
+        Add a statement (the callback for parsing).
+        """
+        self.collect(statement)
+        kind = statement.ast_type.name
+        if kind not in self.statements:
+            self.stratified = False
+        elif kind == "ShowSignature":
+            self.shown = self.shown or set()
+            if statement.name:
+                self.shown.add(
+                    (statement.name, statement.arity, bool(statement.positive))
+                )
+        elif kind == "Rule":
+            self.add_rule(statement)
+
+    def add_rule(self, rule):
+        ASTType = clingo.ast.ASTType
+        NoSign = clingo.ast.Sign.NoSign
+
+        # The head is one atom, or false (for a constraint)
+        head = rule.head
+        if head.ast_type != ASTType.Literal or head.sign != NoSign:
+            self.stratified = False
+            return
+        if head.atom.ast_type == ASTType.BooleanConstant:
+            head = None
+        elif head.atom.ast_type == ASTType.SymbolicAtom:
+            head = (self.collect(head) or [None])[0]
+        else:
+            self.stratified = False
+            return
+
+        # An atom under negation or an aggregate must be in a lower stratum
+        depends = self.depends.setdefault(head, set())
+        for literal in rule.body:
+            if literal.ast_type == ASTType.Literal:
+                kind = literal.atom.ast_type
+                if kind in (ASTType.Comparison, ASTType.BooleanConstant):
+                    continue
+                if kind == ASTType.SymbolicAtom:
+                    strict = literal.sign != NoSign
+                elif kind in (ASTType.BodyAggregate, ASTType.Aggregate):
+                    strict = True
+                else:
+                    self.stratified = False
+                    continue
+            elif literal.ast_type == ASTType.ConditionalLiteral:
+                strict = True
+            else:
+                self.stratified = False
+                continue
+            depends.update((atom, strict) for atom in self.collect(literal))
+
+    def reaches(self, start, end):
+        """
+        Determine if a predicate depends on another (through any rules)
+        """
+        seen = set()
+        stack = [start]
+        while stack:
+            current = stack.pop()
+            if current == end:
+                return True
+            if current in seen:
+                continue
+            seen.add(current)
+            stack += [atom for atom, _ in self.depends.get(current, [])]
+        return False
+
+    def check_strata(self):
+        for head, depends in self.depends.items():
+            if head is None:
+                continue
+            for atom, strict in depends:
+                if strict and self.reaches(atom, head):
+                    self.stratified = False
+                    return
+
+
+@functools.lru_cache(maxsize=32)
+def parse_programs(programs):
+    """
+    Parse logic programs, given as (path, modification time), once.
+    """
+    info = ProgramInfo()
+    try:
+        clingo.ast.parse_files([path for path, _ in programs], info.add)
+    except RuntimeError:
+        return None
+    info.check_strata()
+    return info
+
+
+def get_program_info(logic_programs):
+    """
+    Get a ProgramInfo for some logic programs, or None if one can't be parsed.
+    """
+    programs = []
+    for path in logic_programs:
+        try:
+            programs.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            return None
+    return parse_programs(tuple(programs))
+
+
+def get_signatures(logic_programs):
+    """
+    Get the (name, arity) of every atom in some logic programs. A fact with
+    any other signature cannot be part of an unsatisfiable core. We return
+    None if a program cannot be parsed (so all facts are relevant).
+    """
+    info = get_program_info(logic_programs)
+    return info.signatures if info else None
+
+
 class PyclingoDriver:
-    def __init__(self, cores=True, out=None):
+    def __init__(
+        self,
+        cores=True,
+        out=None,
+        loader="backend",
+        lazy_cores=True,
+        ground_only="auto",
+    ):
         """Driver for the Python clingo interface.
 
         Arguments:PyclingoDriver
             cores (bool): whether to generate unsatisfiable cores for better
                 error reporting.
             out (file-like): optional stream to write a text-based ASP program
-                for debugging or verification.
+                for debugging or verification. Without it, we never render
+                facts as text (unless the loader needs it).
+            loader (str): how to give facts to clingo (one of FACT_LOADERS)
+            lazy_cores (bool): give facts to clingo as plain facts, and only
+                if the result is unsatisfiable, solve again with the facts
+                the logic programs use as assumptions (to get cores). If
+                False, every fact is an assumption in the first solve.
+            ground_only (bool or str): read the answers after grounding
+                (without a solve) if the logic programs are stratified. With
+                "auto" we check this by parsing the programs, and with True
+                we assume it.
         """
         global clingo
-        if out:
-            self.out = out
-        else:
-            self.devnull()
+        if loader not in FACT_LOADERS:
+            raise ValueError(
+                "%s is not a known loader (%s)" % (loader, ", ".join(FACT_LOADERS))
+            )
+        self.out = out
         self.cores = cores
+        self.lazy_cores = lazy_cores
+        self.ground_only = ground_only
+        self.loader = loader
         self.assumptions = []
+        self.reset_facts()
 
-    def devnull(self):
-        self.f = open(os.devnull, "w")
-        self.out = self.f
-
-    def __exit__(self):
-        self.f.close()
+    def reset_facts(self):
+        """
+        Start a new set of facts (for load_facts). We only keep the first of
+        any duplicate facts, and count the rest (duplicates).
+        """
+        self.facts = []
+        self.known_facts = set()
+        self.duplicates = 0
 
     def title(self, name, char):
+        if not self.out:
+            return
         self.out.write("\n")
         self.out.write("%" + (char * 76))
         self.out.write("\n")
@@ -197,18 +414,230 @@ class PyclingoDriver:
         self.title(name, "-")
 
     def newline(self):
-        self.out.write("\n")
+        if self.out:
+            self.out.write("\n")
 
     def fact(self, head):
         """ASP fact (a rule without a body)."""
         symbol = head.symbol() if hasattr(head, "symbol") else head
+        if symbol in self.known_facts:
+            self.duplicates += 1
+            return
+        self.known_facts.add(symbol)
+
+        if self.out:
+            self.out.write("%s.\n" % str(symbol))
+
+        # Facts are added to the solver all at once (see load_facts)
+        self.facts.append(symbol)
+
+    def load_facts(self, assume=None):
+        """
+        Add the facts from setup to the control object. A fact we assume is
+        a choice that we assume is true (so we can explain a failure).
+        assume is True (all facts), None (no facts) or a set of signatures.
+        """
+        if assume is None:
+            assumed = [False] * len(self.facts)
+        elif assume is True:
+            assumed = [True] * len(self.facts)
+        else:
+            assumed = [
+                (symbol.name, len(symbol.arguments)) in assume for symbol in self.facts
+            ]
+
+        if self.loader == "backend":
+            with self.control.backend() as backend:
+                atoms = [backend.add_atom(symbol) for symbol in self.facts]
+
+                # One choice rule (with all assumed facts in the head) is the
+                # same as one choice rule for each
+                choices = [atom for atom, x in zip(atoms, assumed) if x]
+                if choices:
+                    backend.add_rule(choices, [], choice=True)
+                    self.assumptions += choices
+                for atom, x in zip(atoms, assumed):
+                    if not x:
+                        backend.add_rule([atom], [])
+
+        elif self.loader == "text":
+            self.control.add(
+                "base",
+                [],
+                "".join(
+                    ("{%s}.\n" if x else "%s.\n") % symbol
+                    for symbol, x in zip(self.facts, assumed)
+                ),
+            )
+
+        elif self.loader == "aspif":
+            rules = []
+            outputs = []
+            for atom, (symbol, x) in enumerate(zip(self.facts, assumed), 1):
+                text = str(symbol)
+                rules.append("1 %s 1 %s 0 0\n" % (1 if x else 0, atom))
+                outputs.append("4 %s %s 1 %s\n" % (len(text.encode()), text, atom))
+            self.control.add(
+                "base", [], "asp 1 0 0\n%s%s0\n" % ("".join(rules), "".join(outputs))
+            )
+
+        if self.loader != "backend":
+            self.assumptions += [
+                (symbol, True) for symbol, x in zip(self.facts, assumed) if x
+            ]
+
+    def configure(self):
+        """
+        Configure a new control object (before facts are added)
+        """
+        pass
+
+    def get_core_symbol(self, symbol):
+        """
+        Get what we show for a symbol in an unsatisfiable core
+        """
+        if symbol.name == "missing_symbol":
+            return symbol.arguments[0].string
+        return symbol
+
+    def ground_and_solve(self, logic_programs, assume=None, timer=None):
+        """
+        Load facts (assuming some, see load_facts) and logic programs into a
+        new control object, then ground, solve and return the Result.
+        """
+        timer = timer or Timer()
+        with measure("load", facts=len(self.facts)):
+            self.control = clingo.Control()
+            self.configure()
+            self.assumptions = []
+            self.load_facts(assume)
+            timer.phase("facts")
+
+            for logic_program in logic_programs:
+                self.control.load(logic_program)
+            timer.phase("load")
+
+        # Grounding is the first step in the solve -- it turns our facts
+        # and first-order logic rules into propositional logic.
+        with measure("ground"):
+            self.control.ground([("base", [])])
+            timer.phase("ground")
+        record("ground", atoms=len(self.control.symbolic_atoms))
+
+        with measure("solve"):
+            # A stratified program (without assumptions) is solved by grounding
+            result = self.get_grounded_result(logic_programs)
+
+            # Otherwise, with a grounded program, we can run the solve.
+            if not result:
+                result = self.run_solve()
+            timer.phase("solve")
+        record_statistics(self.control)
+        return result
+
+    def run_solve(self):
+        """
+        Solve the grounded program (with assumptions) and return the Result.
+        """
+        result = Result()
+        models = []  # stable models if things go well
+        cores = []  # unsatisfiable cores if they do not
+
+        def on_model(model):
+            models.append((model.cost, model.symbols(shown=True, terms=True)))
 
-        self.out.write("%s.\n" % str(symbol))
+        solve_kwargs = {
+            "assumptions": self.assumptions,
+            "on_model": on_model,
+            "on_core": cores.append,
+        }
 
-        atom = self.backend.add_atom(symbol)
-        self.backend.add_rule([atom], [], choice=self.cores)
-        if self.cores:
-            self.assumptions.append(atom)
+        if clingo_cffi:
+            solve_kwargs["on_unsat"] = cores.append
+
+        # Get the result object
+        solve_result = self.control.solve(**solve_kwargs)
+
+        # once done, construct the solve result
+        result.satisfiable = solve_result.satisfiable
+
+        if result.satisfiable:
+            min_cost, best_model = min(models)
+            result.answers = {}
+            for sym in best_model:
+                if sym.name in result.answers:
+                    result.answers[sym.name].append(
+                        [stringify(a) for a in sym.arguments]
+                    )
+                else:
+                    result.answers[sym.name] = [[stringify(a) for a in sym.arguments]]
+
+        elif cores:
+            symbols = dict((a.literal, a.symbol) for a in self.control.symbolic_atoms)
+            for core in cores:
+                core_symbols = []
+                for atom in core:
+                    core_symbols.append(self.get_core_symbol(symbols[atom]))
+                result.cores.append(core_symbols)
+        return result
+
+    def get_grounded_result(self, logic_programs):
+        """
+        Get the Result from the atoms after grounding, or None if we need a
+        solve (e.g., the program isn't stratified or is unsatisfiable).
+        """
+        if not self.ground_only or self.assumptions or self.control.is_conflicting:
+            return
+        info = get_program_info(logic_programs)
+        if not info or (self.ground_only == "auto" and not info.stratified):
+            return
+
+        # Shown atoms, in the same order as a model
+        atoms = self.control.symbolic_atoms
+        shown = []
+        for name, arity, positive in atoms.signatures:
+            if info.shown is None or (name, arity, positive) in info.shown:
+                shown.append(atoms.by_signature(name, arity, positive))
+
+        # If we assume the program is stratified, make sure (every atom of a
+        # stratified program is a fact after grounding)
+        check = not info.stratified
+        result = Result()
+        result.satisfiable = True
+        result.answers = {}
+        for atom in itertools.chain.from_iterable(shown):
+            if check and not atom.is_fact:
+                return
+            symbol = atom.symbol
+            result.answers.setdefault(symbol.name, []).append(
+                [stringify(a) for a in symbol.arguments]
+            )
+        return result
+
+    def solve_facts(self, logic_programs, timer=None):
+        """
+        Solve with the facts from setup. Facts are only assumptions (which
+        costs time and memory for every fact) when we need cores.
+        """
+        logic_programs = logic_programs or []
+        if not isinstance(logic_programs, list):
+            logic_programs = [logic_programs]
+
+        timer = timer or Timer()
+        if self.cores and not self.lazy_cores:
+            return self.ground_and_solve(logic_programs, True, timer)
+
+        result = self.ground_and_solve(logic_programs, timer=timer)
+        if result.satisfiable or not self.cores:
+            return result
+
+        # Solve again, assuming only facts that the logic programs use
+        assume = get_signatures(logic_programs)
+        result = self.ground_and_solve(
+            logic_programs, True if assume is None else assume
+        )
+        timer.phase("cores")
+        return result
 
     def solve(
         self,
@@ -240,22 +669,17 @@ class PyclingoDriver:
         that are needed. We could possibly remove it if we can load all symbols
         provided by other needed files, and then eliminate them from the set.
         """
-        # logic programs to give to the solver
-        logic_programs = logic_programs or []
-        if not isinstance(logic_programs, list):
-            logic_programs = [logic_programs]
-
         timer = Timer()
-        self.control = clingo.Control()
 
         # Splices get handed to the solver setup
         splices = splices or {}
 
         # set up the problem -- this generates facts and rules
-        with self.control.backend() as backend:
-            self.backend = backend
+        self.assumptions = []
+        self.reset_facts()
 
-            # one corpus we can only generate facts
+        # one corpus we can only generate facts
+        with measure("facts"):
             if len(corpora) == 1 and is_single:
                 solver_setup.single_setup(
                     self, corpora[0], system_libs=system_libs, splices=splices
@@ -264,81 +688,154 @@ class PyclingoDriver:
                 solver_setup.compat_setup(
                     self, corpora, splices=splices, system_libs=system_libs
                 )
-        timer.phase("setup")
+            timer.phase("setup")
+        record("facts", facts=len(self.facts), duplicates=self.duplicates)
 
         # If we only want to generate facts, cut out early
         if facts_only:
             return
 
-        for logic_program in logic_programs:
-            self.control.load(logic_program)
-        timer.phase("load")
-        self.control.ground([("base", [])])
+        result = self.solve_facts(logic_programs, timer)
 
-        # With a grounded program, we can run the solve.
-        result = Result()
-        models = []  # stable models if things go well
-        cores = []  # unsatisfiable cores if they do not
-
-        def on_model(model):
-            models.append((model.cost, model.symbols(shown=True, terms=True)))
+        if timers:
+            timer.write()
+            print()
 
-        solve_kwargs = {
-            "assumptions": self.assumptions,
-            "on_model": on_model,
-            "on_core": cores.append,
-        }
+        # statistics
+        # pprint.pprint(self.control.statistics)
 
-        if clingo_cffi:
-            solve_kwargs["on_unsat"] = cores.append
+        return result
 
-        # Get the result object
-        solve_result = self.control.solve(**solve_kwargs)
-        timer.phase("solve")
 
-        # once done, construct the solve result
-        result.satisfiable = solve_result.satisfiable
+class CompatSession(PyclingoDriver):
+    """
+    Check one binary (and a library known to work with it) against many
+    contender libraries with one control object. The binary, working library
+    and system libraries are added and grounded once, and each contender is
+    added and grounded (once) as a program part that we turn on with an
+    external atom when we check it. See is_compatible_session.lp.
+    """
 
-        def stringify(x):
-            if clingo_cffi:
-                # Clingo w/ CFFI will throw an exception on failure
-                try:
-                    return x.string
-                except RuntimeError:
-                    return str(x)
-            else:
-                return x.string or str(x)
+    # Answers with the contender as the first argument
+    contender_answers = [
+        "get_architecture",
+        "architecture_count",
+        "count_missing_symbols",
+    ]
 
-        if result.satisfiable:
-            min_cost, best_model = min(models)
-            result.answers = {}
-            for sym in best_model:
-                if sym.name in result.answers:
-                    result.answers[sym.name].append(
-                        [stringify(a) for a in sym.arguments]
-                    )
-                else:
-                    result.answers[sym.name] = [[stringify(a) for a in sym.arguments]]
+    def __init__(
+        self,
+        binary,
+        working,
+        setup=None,
+        system_libs=True,
+        splices=None,
+        system_corpora=None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.binary = binary
+        self.working = working
+        self.setup = setup or ABICompatSolverSetup()
+        self.system_libs = system_libs
+        self.system_corpora = system_corpora
+        self.splices = splices or {}
+        self.logic_program = get_facts("is_compatible_session.lp")
+        self.contenders = {}
+        self.active = None
+        self.control = None
+
+    def start(self):
+        """
+        Add facts for the binary and working library, and ground the base.
+        """
+        self.control = clingo.Control(logger=self.log)
+        self.configure()
+        self.reset_facts()
+        with measure("facts"):
+            self.setup.session_setup(
+                self,
+                self.binary,
+                self.working,
+                system_libs=self.system_libs,
+                system_corpora=self.system_corpora,
+                splices=self.splices,
+            )
+        record("facts", facts=len(self.facts), duplicates=self.duplicates)
+        with measure("load", facts=len(self.facts)):
+            self.load_facts()
+            self.control.load(self.logic_program)
+        with measure("ground"):
+            self.control.ground([("base", [])])
+
+    def log(self, code, message):
+        """
+        Contender predicates are shown before we add any contender, so we
+        don't say they are undefined.
+        """
+        if code != clingo.MessageCode.AtomUndefined:
+            sys.stderr.write(message + "\n")
 
-        elif cores:
-            symbols = dict((a.literal, a.symbol) for a in self.control.symbolic_atoms)
-            for core in cores:
-                core_symbols = []
-                for atom in core:
-                    sym = symbols[atom]
-                    if sym.name == "missing_symbol":
-                        sym = sym.arguments[0].string
-                    core_symbols.append(sym)
-                result.cores.append(core_symbols)
+    def add_contender(self, contender):
+        """
+        Add facts for a contender library, and ground its part.
+        """
+        if self.control is None:
+            self.start()
+        self.reset_facts()
+        with measure("facts"):
+            self.setup.contender_setup(self, contender)
+        record("facts", facts=len(self.facts), duplicates=self.duplicates)
+        with measure("load", facts=len(self.facts)):
+            self.load_facts()
+        path = clingo.String(contender.path)
+        with measure("ground"):
+            self.control.ground([("contender", [path])])
+        self.contenders[contender.path] = clingo.Function("active", [path])
+
+    def check(self, contender):
+        """
+        Check a contender library, returning the same answers as a solve
+        of is_compatible.lp for the binary, working library and contender.
+        """
+        if contender.path not in self.contenders:
+            self.add_contender(contender)
+        if self.active:
+            self.control.assign_external(self.active, False)
+        self.active = self.contenders[contender.path]
+        self.control.assign_external(self.active, True)
 
-        if timers:
-            timer.write()
-            print()
+        self.assumptions = []
+        with measure("solve"):
+            result = self.run_solve()
+        record_statistics(self.control)
+        if not result.satisfiable:
+            return result
+
+        # Only keep answers for this contender (without the contender)
+        answers = {}
+        for name, rows in result.answers.items():
+            for row in rows:
+                if name == "is_library" and row[0] != contender.path:
+                    continue
+                if name == "missing_symbols" and row[1] != contender.path:
+                    continue
+                if name in self.contender_answers:
+                    if row[0] != contender.path:
+                        continue
+                    row = row[1:]
+                answers.setdefault(name, []).append(row)
+        result.answers = answers
+        return result
 
-        # statistics
-        # pprint.pprint(self.control.statistics)
 
-        return result
+def get_symbol_name(symbol):
+    """
+    If we have @@ in the symbol, it's usually the compiler (remove)
+    """
+    if "@@" in symbol:
+        symbol = symbol.split("@@")[0]
+    return symbol
 
 
 class ABISolverBase:
@@ -346,7 +843,32 @@ class ABISolverBase:
     Base class with shared functions
     """
 
-    def generate_elf_symbols(self, corpora, prefix=""):
+    def __init__(self, jobs=1, slice=True):
+        """
+        Arguments:
+            jobs (int): processes to load system corpora with (0 is all cores)
+            slice (bool): only generate facts for symbols that can change the
+                answers of the logic program for this setup. Disable this to
+                dump facts for a different logic program.
+        """
+        self.jobs = jobs
+        self.slice = slice
+
+    def get_undefined_symbols(self, corpora):
+        """
+        Get the names of symbols that are undefined (UND) in any corpus.
+        """
+        names = set()
+        for corpus in corpora:
+            symbols = corpus.symbols
+            if hasattr(symbols, "select"):
+                undefined = symbols.select("defined", "UND")
+            else:
+                undefined = [k for k, v in symbols.items() if v["defined"] == "UND"]
+            names.update(get_symbol_name(name) for name in undefined)
+        return names
+
+    def generate_elf_symbols(self, corpora, prefix="", only=None):
         """For each corpus, write out elf symbols as facts. Note that we are
         trying a more detailed approach with facts/atoms being named (e.g.,
         symbol_type instead of symbol_attr). We could also try a simpler
@@ -355,6 +877,8 @@ class ABISolverBase:
         symbol_type("_ZN11MathLibrary10Arithmetic8MultiplyEdd", "STT_FUNC").
         symbol_binding("_ZN11MathLibrary10Arithmetic8MultiplyEdd", "STB_FUNC").
         symbol_attr("_ZN11MathLibrary10Arithmetic8MultiplyEdd", "STV_default").
+
+        If only is a set of names, we skip facts for any other symbol.
         """
         # If we have a prefix, add a spacer
         prefix = "%s_" % prefix if prefix else ""
@@ -369,8 +893,9 @@ class ABISolverBase:
                     continue
 
                 # If we have @@ in the symbol, it's usually the compiler (remove)
-                if "@@" in symbol:
-                    symbol = symbol.split("@@")[0]
+                symbol = get_symbol_name(symbol)
+                if only is not None and symbol not in only:
+                    continue
 
                 self.gen.fact(AspFunction(prefix + "symbol", args=[symbol]))
                 self.gen.fact(
@@ -403,10 +928,12 @@ class ABISolverBase:
                     )
                 )
 
-                # Might be redundant
-                has = "has_%s" % prefix if prefix else "has_"
-                self.gen.fact(AspFunction(has + "symbol", args=[corpus.path, symbol]))
+                # Every corpus has has_symbol (and has_<prefix>_symbol)
                 self.gen.fact(fn.has_symbol(corpus.path, symbol))
+                if prefix:
+                    self.gen.fact(
+                        AspFunction("has_%ssymbol" % prefix, args=[corpus.path, symbol])
+                    )
 
     def generate_needed(self, corpora):
         """
@@ -514,78 +1041,10 @@ class ABISolverBase:
 
     def get_system_corpora(self, corpora):
         """
-        Get a list of corpora for system corpora. If we are doing splicing,
-        honor the splice instead.
+        Get a list of corpora for system corpora (everything the corpora
+        need, recursively). If we are doing splicing, honor the splice instead.
         """
-        ldd = utils.which("ldd").get("message")
-        if not ldd:
-            print("Cannot find ldd to detect system libraries, skipping.")
-            return
-
-        # Add the pwd and LD_LIBRARY_PATH to path
-        ld_libs = os.environ.get("LD_LIBRARY_PATH")
-        here = os.getcwd()
-        path = os.environ.get("PATH") + ":%s" % here
-        if ld_libs:
-            path = "%s:%s" % (path, ld_libs)
-            ld_libs = "%s:%s" % (ld_libs, here)
-        else:
-            ld_libs = here
-
-        os.environ["PATH"] = path
-        os.putenv("PATH", path)
-        os.putenv("LD_LIBRARY_PATH", ld_libs)
-
-        # Ensure we don't add a library twice
-        seen = set([x.path for x in corpora])
-        syscorpora = []
-
-        for corpus in corpora:
-
-            # Try adding rpaths
-            rpaths = corpus.dynamic_tags.get("rpaths")
-            if rpaths:
-                os.putenv("LD_LIBRARY_PATH", "%s:%s" % (ld_libs, ":".join(rpaths)))
-
-            output = utils.run_command([ldd, corpus.path]).get("message", "")
-
-            for line in output.split("\n"):
-
-                # If we cannot find a lib, still might be able to splice
-                path = None
-                lib = None
-                if "not found" in line:
-                    lib = line.split("=>")[0].strip()
-                    if lib in corpus.needed:
-                        path = lib
-
-                # Case 2: a library was found
-                elif "=>" in line:
-                    lib, path = line.split("=>")
-                    lib = lib.strip()
-                    path = path.strip().split(" ")[0]
-
-                if path:
-                    # Don't add redundant entries
-                    if path in seen or os.path.basename(path) in seen:
-                        continue
-
-                    # If it's a splice entry, make sure we've added corpus
-                    if path in self.splices:
-                        path = self.splices[path]
-                    elif os.path.basename(path) in self.splices:
-                        path = self.splices[os.path.basename(path)]
-
-                    if os.path.exists(path):
-                        syscorpora.append(Corpus(path, name=lib))
-                    elif not os.path.exists(path) and lib in corpus.needed:
-                        print(
-                            "Warning: %s is needed, but not found on system path."
-                            % path
-                        )
-                    seen.add(path)
-
-        return syscorpora
+        return get_system_corpora(corpora, splices=self.splices, jobs=self.jobs)
 
     def single_setup(self, driver, corpus, system_libs=False, **kwargs):
         """
@@ -656,17 +1115,16 @@ class ABISolverBase:
         data["corpus"]["dynamic_tags"] = corpus.dynamic_tags
         data["corpus"]["header"] = hdr
 
-        # Elf symbols
+        # Elf symbols (a SymbolTable gives read-only rows, so we ask for dicts)
         symbols = corpus.symbols
+        if hasattr(symbols, "iter_dicts"):
+            rows = symbols.iter_dicts()
+        else:
+            rows = symbols.items()
         if globals_only:
-            updated = {}
-            for name, symbol in symbols.items():
-                if symbol["binding"] != "GLOBAL":
-                    continue
-                updated[name] = symbol
-            symbols = updated
+            rows = ((name, meta) for name, meta in rows if meta["binding"] == "GLOBAL")
 
-        data["corpus"]["symbols"] = symbols
+        data["corpus"]["symbols"] = dict(rows)
         corpora.append(data)
 
         # Add system corpora to elf symbols
@@ -737,15 +1195,60 @@ class ABICompatSolverSetup(ABISolverBase):
         # Dynamic libraries that are needed
         self.generate_needed(corpora)
 
+        # is_compatible.lp only finds missing symbols that are undefined in
+        # the binary, so we don't need facts for any other symbol
+        only = self.get_undefined_symbols([binary]) if self.slice else None
+
         # generate all elf symbols (might be able to make this smaller set)
-        self.generate_elf_symbols(corpora)
+        self.generate_elf_symbols(corpora, only=only)
 
         # Generate the same for the known working library, but with a prefix
-        self.generate_elf_symbols([working], prefix="needed")
+        self.generate_elf_symbols([working], prefix="needed", only=only)
 
         # Add system corpora to elf symbols
         if system_libs:
-            self.generate_elf_symbols(self.get_system_corpora(corpora))
+            self.generate_elf_symbols(self.get_system_corpora(corpora), only=only)
+
+    def session_setup(self, driver, binary, working, system_libs=True, **kwargs):
+        """
+        Generate facts for the base of a CompatSession: the binary and the
+        library known to work with it (and system libraries they need, which
+        can be given as system_corpora if they are already loaded).
+        """
+        self.splices = kwargs.get("splices", {})
+        self.gen = driver
+
+        self.gen.h1("Corpus Facts")
+        self.gen.fact(fn.is_main(binary.path))
+        self.gen.fact(fn.is_needed(working.path))
+
+        self.generate_corpus_metadata([binary])
+        self.generate_corpus_metadata([working], prefix="needed")
+        self.generate_needed([binary])
+
+        # Contenders share the symbols that are undefined in the binary
+        self.only = self.get_undefined_symbols([binary]) if self.slice else None
+        self.generate_elf_symbols([binary], only=self.only)
+        self.generate_elf_symbols([working], prefix="needed", only=self.only)
+        if system_libs:
+            syscorpora = kwargs.get("system_corpora")
+            if syscorpora is None:
+                syscorpora = self.get_system_corpora([binary])
+            self.generate_elf_symbols(syscorpora, only=self.only)
+
+    def contender_setup(self, driver, contender):
+        """
+        Generate facts for a contender library in a CompatSession. Facts for
+        system libraries that only the contender needs can't change the
+        answers, so we don't add them.
+        """
+        self.gen = driver
+
+        self.gen.h1("Contender Facts: %s" % contender.path)
+        self.gen.fact(fn.is_library(contender.path))
+        self.generate_corpus_metadata([contender])
+        self.generate_needed([contender])
+        self.generate_elf_symbols([contender], only=self.only)
 
 
 class ABIGlobalSolverSetup(ABISolverBase):
@@ -769,12 +1272,19 @@ class ABIGlobalSolverSetup(ABISolverBase):
         # Dynamic libraries that are needed
         self.generate_needed(corpora)
 
+        syscorpora = self.get_system_corpora(corpora) if system_libs else []
+
+        # missing_symbols.lp only looks at symbols undefined in some corpus
+        only = None
+        if self.slice:
+            only = self.get_undefined_symbols(corpora + syscorpora)
+
         # generate all elf symbols (might be able to make this smaller set)
-        self.generate_elf_symbols(corpora)
+        self.generate_elf_symbols(corpora, only=only)
 
         # Add system corpora to elf symbols
         if system_libs:
-            self.generate_elf_symbols(self.get_system_corpora(corpora))
+            self.generate_elf_symbols(syscorpora, only=only)
 
 
 class ABICompareSolverSetup(ABISolverBase):
@@ -6,7 +6,9 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 import symbolator
+from symbolator.engines import ENGINES
 import argparse
+import json
 import sys
 
 
@@ -62,6 +64,13 @@ def get_parser():
             default=False,
             action="store_true",
         )
+        command.add_argument(
+            "--engine",
+            dest="engine",
+            help="Find missing symbols natively or with clingo (asp, the reference). --dump always uses asp.",
+            choices=ENGINES,
+            default="native",
+        )
 
     # Stability test using smeagle output
     stability = subparsers.add_parser(
@@ -75,6 +84,71 @@ def get_parser():
         "--detail", default=False, action="store_true", help="Show detailed results."
     )
 
+    # Stability test for pairs of many versions of a library
+    stability_matrix = subparsers.add_parser(
+        "stability-matrix",
+        help="Run stability tests for pairs of many versions of a library, using Smeagle facts.",
+    )
+    stability_matrix.add_argument(
+        "libs", help="Versions of a library (Smeagle json), oldest first", nargs="+"
+    )
+    stability_matrix.add_argument(
+        "--pairs",
+        dest="pairs",
+        help="Test all ordered pairs, or each version with the next (default all).",
+        choices=["all", "consecutive"],
+        default="all",
+    )
+    stability_matrix.add_argument(
+        "--detail",
+        default=False,
+        action="store_true",
+        help="Include missing exports and imports for each pair.",
+    )
+    stability_matrix.add_argument(
+        "--format",
+        dest="format",
+        help="Format for the results (default json).",
+        choices=["json", "csv"],
+        default="json",
+    )
+    stability_matrix.add_argument(
+        "--output",
+        "-o",
+        dest="output",
+        help="Write results to this file.",
+        default=None,
+    )
+    stability_matrix.add_argument(
+        "--jobs",
+        "-j",
+        dest="jobs",
+        help="Processes to test pairs with (0 uses all cores, default 1).",
+        default=1,
+        type=int,
+    )
+
+    for command in [stability, stability_matrix]:
+        command.add_argument(
+            "--engine",
+            dest="engine",
+            help="Test stability natively or with clingo (asp, the reference).",
+            choices=ENGINES,
+            default="native",
+        )
+        command.add_argument(
+            "--trusted",
+            dest="trusted",
+            help="Skip validating Smeagle json that passed before (by a hash of its content), remembering hashes in this directory.",
+        )
+        command.add_argument(
+            "--stream",
+            dest="stream",
+            help="Read Smeagle json a function at a time (for very large models), instead of keeping it in memory.",
+            default=False,
+            action="store_true",
+        )
+
     # Compare two library elf symbols
     compare = subparsers.add_parser(
         "compare", help="Compare symbols between two libraries."
@@ -82,6 +156,13 @@ def get_parser():
     compare.add_argument(
         "libs", help="Two libraries (same but different versions) to compare", nargs=2
     )
+    compare.add_argument(
+        "--engine",
+        dest="engine",
+        help="Compare natively (needs NumPy) or with clingo (asp, the reference). Without --json, asp also prints the facts.",
+        choices=ENGINES,
+        default="native",
+    )
 
     # Assess compatibility
     compat = subparsers.add_parser(
@@ -100,6 +181,33 @@ def get_parser():
         action="store_true",
     )
 
+    # Assess compatibility of many binaries and contender libraries
+    matrix = subparsers.add_parser(
+        "compat-matrix",
+        help="Assess compatibility of many binaries (that work with one library) to many contender libraries",
+    )
+    matrix.add_argument("working", help="Library the binaries are known to work with")
+    matrix.add_argument(
+        "--binaries", help="Binaries of interest", nargs="+", required=True
+    )
+    matrix.add_argument(
+        "--contenders", help="Contender libraries", nargs="+", required=True
+    )
+    matrix.add_argument(
+        "--format",
+        dest="format",
+        help="Format for the table of results (default json).",
+        choices=["json", "csv"],
+        default="json",
+    )
+    matrix.add_argument(
+        "--output",
+        "-o",
+        dest="output",
+        help="Write results to this file.",
+        default=None,
+    )
+
     # Just generate facts to the screen
     generate = subparsers.add_parser(
         "generate", help="Dump symbols as facts to the terminal."
@@ -129,9 +237,74 @@ def get_parser():
             default=False,
             action="store_true",
         )
+
+    # Commands that parse ELF files can use a corpus cache
+    for command in [generate, compat, matrix, compare, splice]:
+        command.add_argument(
+            "--cache-dir",
+            dest="cache_dir",
+            help="Cache parsed corpora in this directory (defaults to SYMBOLATOR_CACHE_DIR).",
+            default=None,
+        )
+        command.add_argument(
+            "--jobs",
+            "-j",
+            dest="jobs",
+            help="Processes to parse corpora with (0 uses all cores, default 1).",
+            default=1,
+            type=int,
+        )
+
+    # Every command can report (or profile) the time and memory of its phases
+    for command in [
+        generate,
+        compat,
+        matrix,
+        compare,
+        splice,
+        jsonsplice,
+        stability,
+        stability_matrix,
+    ]:
+        command.add_argument(
+            "--timings",
+            dest="timings",
+            help="Write time, memory and counts for each phase as json to this file (- for stderr).",
+            default=None,
+        )
+        command.add_argument(
+            "--profile",
+            dest="profile",
+            help="Profile each phase, and write stats (.pstats) and collapsed stacks (.folded) to this directory.",
+            default=None,
+        )
     return parser
 
 
+def write_timings(args):
+    """
+    Write the phases of a command (the configured timer) as json, and the
+    profiles of the phases, if requested.
+    """
+    from symbolator import timer
+
+    timings = timer.get_timer()
+    timings.phase("output")
+    if args.profile:
+        timings.write_profiles(args.profile)
+    if not args.timings:
+        return
+
+    report = timings.to_dict()
+    report["command"] = args.command
+    content = json.dumps(report, indent=4) + "\n"
+    if args.timings == "-":
+        sys.stderr.write(content)
+    else:
+        with open(args.timings, "w") as fd:
+            fd.write(content)
+
+
 def run():
     parser = get_parser()
 
@@ -170,8 +343,23 @@ def run():
                 helper = subparser
                 break
 
+    # Use a corpus cache, if requested
+    if getattr(args, "cache_dir", None):
+        from symbolator.corpus import cache
+
+        cache.configure(args.cache_dir)
+
+    # Time (or profile) the phases of the command, if requested
+    timed = getattr(args, "timings", None) or getattr(args, "profile", None)
+    if timed:
+        from symbolator import timer
+
+        timer.configure(name="command", profile=bool(args.profile))
+
     if args.command == "compat":
         from .compat import is_compatible as main
+    elif args.command == "compat-matrix":
+        from .matrix import compat_matrix as main
     elif args.command == "compare":
         from .compare import compare_libs as main
     elif args.command == "generate":
@@ -182,6 +370,8 @@ def run():
         from .splice import splice as main
     elif args.command == "stability-test":
         from .smeagle import stability_test as main
+    elif args.command == "stability-matrix":
+        from .smeagle import stability_matrix as main
 
     # Pass on to the correct parser
     return_code = 0
@@ -190,6 +380,9 @@ def run():
         sys.exit(return_code)
     except UnboundLocalError:
         return_code = 1
+    finally:
+        if timed:
+            write_timings(args)
 
     help(return_code)
 
@@ -3,8 +3,9 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
-from symbolator.corpus import Corpus
+from symbolator.corpus.loader import load_corpora
 from symbolator.asp import PyclingoDriver, ABICompareSolverSetup
+from symbolator.engines import CompareEngine
 from symbolator.facts import get_facts
 import json
 import os
@@ -37,18 +38,23 @@ def compare_libs(args, parser, extra, subparser):
         print("% " + "first library : %s" % args.libs[0])
         print("% " + "second library: %s" % args.libs[1])
 
-    corpora = []
-    for path in args.libs:
-        corpora.append(Corpus(path))
-    setup = ABICompareSolverSetup()
-
-    # The order should be binary | working library | contender library
-    result = driver.solve(
-        setup,
-        corpora,
-        dump=not args.json,
-        logic_programs=get_facts("compare_libs.lp"),
-        facts_only=False,
-    )
+    corpora, errors = load_corpora(args.libs, jobs=args.jobs)
+    if errors:
+        sys.exit("\n".join(str(error) for error in errors))
+
+    # Printing facts (without --json) needs the asp engine
+    if args.engine == "native" and args.json and CompareEngine.available:
+        result = CompareEngine().solve(corpora)
+    else:
+        setup = ABICompareSolverSetup(jobs=args.jobs)
+
+        # The order should be binary | working library | contender library
+        result = driver.solve(
+            setup,
+            corpora,
+            dump=not args.json,
+            logic_programs=get_facts("compare_libs.lp"),
+            facts_only=False,
+        )
 
     print(json.dumps(result.answers, indent=4))
@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 from symbolator.corpus import Corpus
+from symbolator.corpus.loader import load_corpora
 from symbolator.asp import PyclingoDriver, ABICompatSolverSetup
 from symbolator.facts import get_facts
 import json
@@ -50,7 +51,30 @@ def is_compatible(args, parser, extra, subparser):
     corpora = []
     for path in paths:
         corpora.append(Corpus(path))
-    setup = ABICompatSolverSetup()
+
+    # A contender with a different architecture or class cannot be compatible
+    mismatches = corpora[0].header_mismatches(corpora[2])
+    if mismatches and not args.dump:
+        if args.json:
+            data = {
+                "binary": corpora[0].path,
+                "library_working": corpora[1].path,
+                "library_contender": corpora[2].path,
+                "header_mismatches": mismatches,
+            }
+            print(json.dumps(data, indent=4))
+        else:
+            for field, (binary, contender) in mismatches.items():
+                print(
+                    "Mismatched %s: %s (binary) %s (contender)"
+                    % (field, binary, contender)
+                )
+        return
+
+    corpora, errors = load_corpora(corpora, jobs=args.jobs)
+    if errors:
+        sys.exit("\n".join(str(error) for error in errors))
+    setup = ABICompatSolverSetup(jobs=args.jobs, slice=not args.dump)
 
     # The order should be binary | working library | contender library
     result = driver.solve(
@@ -3,10 +3,11 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
-from symbolator.corpus import Corpus
+from symbolator.corpus.loader import load_corpora
 from symbolator.asp import PyclingoDriver, ABICompatSolverSetup
 import json
 import io
+import sys
 
 # Functions intended to be called by external clients
 
@@ -15,8 +16,11 @@ def generate(args, parser, extra, subparser):
     """
     A single function to print facts for one or more corpora.
     """
-    setup = ABICompatSolverSetup()
-    corpus = Corpus(args.binary)
+    setup = ABICompatSolverSetup(jobs=args.jobs)
+    corpora, errors = load_corpora([args.binary], jobs=args.jobs)
+    if errors:
+        sys.exit("\n".join(str(error) for error in errors))
+    corpus = corpora[0]
 
     # Json output
     if args.json:
@@ -0,0 +1,57 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+from symbolator.matrix import compat_matrix as get_matrix, write_csv
+import json
+import os
+import sys
+import time
+
+
+def compat_matrix(args, parser, extra, subparser):
+    """
+    Check each binary (known to work with the working library) against each
+    contender library, and print a table of results (json or csv) with the
+    number of missing symbols for each pair.
+
+    Arguments:
+        working (str): path to the library the binaries are known to work with
+        binaries (list): paths to binaries to assess for compatibility
+        contenders (list): paths to libraries to assess for compatibility
+        format (str): json or csv
+    """
+    paths = [args.working] + args.binaries + args.contenders
+    for path in paths:
+        if not os.path.exists(path):
+            sys.exit("%s does not exist." % path)
+
+    start = time.time()
+    pairs, errors = get_matrix(
+        args.binaries, args.working, args.contenders, jobs=args.jobs
+    )
+    if errors:
+        sys.exit("\n".join(str(error) for error in errors))
+    seconds = time.time() - start
+    throughput = len(pairs) / seconds if seconds else 0
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    if args.format == "csv":
+        write_csv(pairs, out)
+    else:
+        data = {
+            "library_working": args.working,
+            "pairs": pairs,
+            "count_pairs": len(pairs),
+            "seconds": round(seconds, 3),
+            "pairs_per_second": round(throughput, 2),
+        }
+        out.write(json.dumps(data, indent=4) + "\n")
+    if args.output:
+        out.close()
+
+    sys.stderr.write(
+        "Checked %s pairs in %.2fs (%.2f pairs/second)\n"
+        % (len(pairs), seconds, throughput)
+    )
@@ -7,18 +7,76 @@
 # from symbolator.asp import PyclingoDriver, ABICompatSolverSetup
 # from symbolator.facts import get_facts
 
-from symbolator.smeagle import SmeagleRunner
+from symbolator.smeagle import ModelValidationError, SmeagleRunner, TrustedModels
+from symbolator.smeagle.matrix import (
+    get_matrix,
+    stability_matrix as get_rows,
+    write_csv,
+)
+import json
+import os
+import sys
+import time
 
 
 def stability_test(args, parser, extra, subparser):
     """
     Run a stability test with Smeagle.
     """
-    smeagle = SmeagleRunner()
+    smeagle = SmeagleRunner(trusted=TrustedModels(args.trusted), stream=args.stream)
 
     # Load the libraries
-    for lib in args.libs:
-        smeagle.load(lib)
+    try:
+        for lib in args.libs:
+            smeagle.load(lib)
+    except ModelValidationError as e:
+        sys.exit(str(e))
 
     # Stability test between two libraries
-    smeagle.stability_test(detail=args.detail)
+    smeagle.stability_test(detail=args.detail, engine=args.engine)
+
+
+def stability_matrix(args, parser, extra, subparser):
+    """
+    Run a stability test with Smeagle for pairs of many versions of a
+    library, and print a matrix (json) or table (csv) of the number of
+    missing exports and imports for each pair.
+    """
+    for path in args.libs:
+        if not os.path.exists(path):
+            sys.exit("%s does not exist." % path)
+
+    start = time.time()
+    rows, errors = get_rows(
+        args.libs,
+        pairs=args.pairs,
+        engine=args.engine,
+        jobs=args.jobs,
+        detail=args.detail,
+        trusted=TrustedModels(args.trusted),
+        stream=args.stream,
+    )
+    if errors:
+        sys.exit("\n".join(str(error) for error in errors))
+    seconds = time.time() - start
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    if args.format == "csv":
+        write_csv(rows, out)
+    else:
+        names = list(dict.fromkeys(args.libs))
+        data = {
+            "libraries": names,
+            "missing_exports": get_matrix(rows, names, "count_missing_exports"),
+            "missing_imports": get_matrix(rows, names, "count_missing_imports"),
+            "count_pairs": len(rows),
+            "count_stable": sum(1 for row in rows if row["stable"]),
+            "seconds": round(seconds, 3),
+        }
+        if args.detail:
+            data["pairs"] = rows
+        out.write(json.dumps(data, indent=4) + "\n")
+    if args.output:
+        out.close()
+
+    sys.stderr.write("Checked %s pairs in %.2fs\n" % (len(rows), seconds))
@@ -3,8 +3,10 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
-from symbolator.corpus import Corpus, JsonCorpusLoader
+from symbolator.corpus import JsonCorpusLoader
+from symbolator.corpus.loader import load_corpora
 from symbolator.asp import PyclingoDriver, ABIGlobalSolverSetup
+from symbolator.engines import SpliceEngine
 from symbolator.facts import get_facts
 import json
 import os
@@ -57,21 +59,24 @@ def splice(args, parser, extra, subparser):
             print("% " + "splice : %s->%s" % (src, dest))
 
     # Spliced libraries will be added as corpora here
-    corpora = []
-    for path in paths:
-        corpora.append(Corpus(path))
-
-    setup = ABIGlobalSolverSetup()
+    corpora, errors = load_corpora(paths, jobs=args.jobs)
+    if errors:
+        sys.exit("\n".join(str(error) for error in errors))
 
-    # The order should be binary | working library | contender library
-    result = driver.solve(
-        setup,
-        corpora,
-        dump=args.dump,
-        logic_programs=get_facts(logic_program),
-        facts_only=False,
-        splices=lookup,
-    )
+    if args.engine == "native" and not args.dump:
+        result = SpliceEngine(jobs=args.jobs).solve(corpora, splices=lookup)
+    else:
+        setup = ABIGlobalSolverSetup(jobs=args.jobs, slice=not args.dump)
+
+        # The order should be binary | working library | contender library
+        result = driver.solve(
+            setup,
+            corpora,
+            dump=args.dump,
+            logic_programs=get_facts(logic_program),
+            facts_only=False,
+            splices=lookup,
+        )
 
     missing_symbols = result.answers.get("missing_symbols")
 
@@ -160,18 +165,21 @@ def jsonsplice(args, parser, extra, subparser):
             for newlib, newcorp in splices.items():
                 corpora[newlib] = newcorp
 
-    setup = ABIGlobalSolverSetup()
-
-    # The order should be binary | working library | contender library
-    result = driver.solve(
-        setup,
-        list(corpora.values()),
-        dump=args.dump,
-        logic_programs=get_facts(logic_program),
-        facts_only=False,
-        # Loading from json already includes system libs
-        system_libs=False,
-    )
+    # Loading from json already includes system libs
+    if args.engine == "native" and not args.dump:
+        result = SpliceEngine().solve(corpora.values())
+    else:
+        setup = ABIGlobalSolverSetup(slice=not args.dump)
+
+        # The order should be binary | working library | contender library
+        result = driver.solve(
+            setup,
+            list(corpora.values()),
+            dump=args.dump,
+            logic_programs=get_facts(logic_program),
+            facts_only=False,
+            system_libs=False,
+        )
 
     missing_symbols = result.answers.get("missing_symbols")
 
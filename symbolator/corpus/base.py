@@ -9,9 +9,13 @@ Entries can be added as they are needed.
 """
 
 from symbolator.utils import read_json
+from .symbols import SymbolTable
 import sys
 import os
 
+# Parts of a corpus that can be loaded on demand, cheapest first
+TIERS = ("header", "dynamic", "dynsym", "symtab")
+
 
 class CorpusBase:
     def __init__(self, filename, name=None, uid=None, **kwargs):
@@ -20,20 +24,92 @@ class CorpusBase:
         if not os.path.exists(filename) and must_exist:
             sys.exit("%s does not exist." % filename)
 
-        self.elfheader = {}
         self.basename = os.path.basename(filename)
 
         self.name = name
         self.uid = uid
-        self.symbols = {}
         self.path = filename
         self.basename = None
-        self.dynamic_tags = {}
-        self.architecture = None
+        self._elfheader = {}
+        self._architecture = None
+        self._elfclass = None
+        self._dynamic_tags = {}
+        self._symbols = {}
+        self._dynamic_symbols = {}
+        self._loaded = set()
         self._soname = None
         self.kwargs = kwargs
         self.read_corpus()
 
+    def load(self, *tiers):
+        """
+        Load tiers of the corpus (see TIERS) that are not loaded yet. By
+        default, read_corpus loads everything up front.
+        """
+        pass
+
+    @property
+    def elfheader(self):
+        self.load("header")
+        return self._elfheader
+
+    @elfheader.setter
+    def elfheader(self, elfheader):
+        self._elfheader = elfheader
+        self._loaded.add("header")
+
+    @property
+    def architecture(self):
+        self.load("header")
+        return self._architecture
+
+    @architecture.setter
+    def architecture(self, architecture):
+        self._architecture = architecture
+
+    @property
+    def elfclass(self):
+        self.load("header")
+        return self._elfclass
+
+    @elfclass.setter
+    def elfclass(self, elfclass):
+        self._elfclass = elfclass
+
+    @property
+    def dynamic_tags(self):
+        self.load("dynamic")
+        return self._dynamic_tags
+
+    @dynamic_tags.setter
+    def dynamic_tags(self, dynamic_tags):
+        self._dynamic_tags = dynamic_tags
+        self._loaded.add("dynamic")
+
+    @property
+    def symbols(self):
+        """
+        All symbols, from the dynamic (.dynsym) and full (.symtab) tables.
+        """
+        self.load("dynsym", "symtab")
+        return self._symbols
+
+    @symbols.setter
+    def symbols(self, symbols):
+        self._symbols = symbols
+        self._dynamic_symbols = symbols
+        self._loaded.update(["dynsym", "symtab"])
+
+    @property
+    def dynamic_symbols(self):
+        """
+        Symbols from the dynamic symbol table (.dynsym) only, which has all
+        the symbols needed for dynamic linking. If we don't know the table a
+        symbol came from (e.g., from json) these are all symbols.
+        """
+        self.load("dynsym")
+        return self._dynamic_symbols
+
     def read_corpus(self):
         raise NotImplementedError
 
@@ -43,6 +119,18 @@ class CorpusBase:
     def __repr__(self):
         return str(self)
 
+    def header_mismatches(self, other):
+        """
+        Return header fields (architecture and ELF class) that differ from
+        another corpus. This only needs the ELF headers, so we can reject
+        an incompatible library without reading symbols.
+        """
+        mismatches = {}
+        for field in ["architecture", "elfclass"]:
+            if getattr(self, field) != getattr(other, field):
+                mismatches[field] = [getattr(self, field), getattr(other, field)]
+        return mismatches
+
     def exists(self):
         return self.path is not None and os.path.exists(self.path)
 
@@ -128,7 +216,8 @@ class JsonCorpus(CorpusBase):
 
         # Ensure we remove @s from symbols - we don't care about compiler version
         symbols = loaded.get("symbols", {})
-        self.symbols = {}
+        self.symbols = SymbolTable()
         for name, meta in symbols.items():
             name = name.split("@")[0]
             self.symbols[name] = meta
+        self.symbols.compact()
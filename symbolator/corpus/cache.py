@@ -0,0 +1,354 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""A CorpusCache stores parsed ELF corpora (header, dynamic tags and symbols)
+on disk so that the same library is only parsed once. Entries are keyed by
+a cheap file identity:
+
+ - the GNU build-id note (combined with the file size and the dynamic tags,
+   since tools like patchelf rewrite rpaths without changing the build-id)
+ - otherwise the device, inode, size and modification time of the file, with
+   a fallback to a hash of the content (e.g., a copied or re-installed file).
+
+The cache is safe to share between processes: entries are written to a
+temporary file and atomically renamed into place, and eviction (least
+recently used first, once the cache grows past its size cap) is serialized
+with a lock file. Each cache scans its directory once, and then counts what
+it writes, so we only scan again (to evict) when we may be past the cap.
+"""
+
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+# Bump this if the format of a cache entry changes
+CACHE_VERSION = "v2"
+
+# Default size cap for the cache (in bytes)
+DEFAULT_MAX_SIZE = 1024**3
+
+# When we evict, go a bit below the cap so we don't evict on every write
+EVICT_RATIO = 0.9
+
+# Dynamic tags that can change without changing the build-id
+RELOCATABLE_TAGS = ("DT_NEEDED", "DT_RPATH", "DT_RUNPATH", "DT_SONAME")
+
+# Global cache, set by configure (or from the environment)
+_cache = None
+
+
+def parse_size(size):
+    """
+    Parse a size (e.g., 512M, 2G or a number of bytes) into bytes.
+    """
+    if isinstance(size, int):
+        return size
+    size = str(size).strip().upper().rstrip("B")
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+def configure(root=None, max_size=None):
+    """
+    Set (or unset, if root is None) the corpus cache used by default.
+    """
+    global _cache
+    _cache = CorpusCache(root, max_size=max_size) if root else None
+    return _cache
+
+
+def get_cache():
+    """
+    Get the configured corpus cache. If no cache has been configured, we
+    honor SYMBOLATOR_CACHE_DIR (and SYMBOLATOR_CACHE_SIZE) from the environment.
+    """
+    global _cache
+    if _cache is None and os.environ.get("SYMBOLATOR_CACHE_DIR"):
+        _cache = CorpusCache(
+            os.environ["SYMBOLATOR_CACHE_DIR"],
+            max_size=os.environ.get("SYMBOLATOR_CACHE_SIZE"),
+        )
+    return _cache
+
+
+def read_build_id(fd):
+    """
+    Given an open ELF file, return the GNU build-id (hex) and a digest of the
+    dynamic tags that can be rewritten after linking. We only read program
+    headers (notes and the dynamic segment) so this is much cheaper than a
+    full parse.
+    """
+    from elftools.elf.elffile import ELFFile
+
+    build_id = None
+    tags = []
+    elffile = ELFFile(fd)
+    for segment in elffile.iter_segments():
+        if segment["p_type"] == "PT_NOTE":
+            for note in segment.iter_notes():
+                if note["n_type"] == "NT_GNU_BUILD_ID":
+                    build_id = note["n_desc"]
+        elif segment["p_type"] == "PT_DYNAMIC":
+            for tag in segment.iter_tags():
+                if tag.entry.d_tag in RELOCATABLE_TAGS:
+                    tags.append(
+                        "%s=%s"
+                        % (tag.entry.d_tag, getattr(tag, tag.entry.d_tag[3:].lower()))
+                    )
+    if not build_id:
+        return None, None
+    return build_id, hashlib.sha1("\n".join(tags).encode("utf-8")).hexdigest()[:16]
+
+
+def hash_file(path, blocksize=1024 * 1024):
+    """
+    Hash the content of a file (sha256)
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for block in iter(lambda: fd.read(blocksize), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class CorpusIdentity:
+    """
+    The identity of a file in the cache. The key is the name of the entry,
+    and an alias (if defined) is a cheap stat-based name that points to it.
+    """
+
+    def __init__(self, path, key=None, alias=None):
+        self.path = path
+        self.key = key
+        self.alias = alias
+
+    def __str__(self):
+        return "[CorpusIdentity:%s]" % (self.key or self.alias)
+
+    def __repr__(self):
+        return str(self)
+
+
+class CorpusCache:
+    """
+    A size-capped, least recently used on-disk cache of parsed corpora.
+    """
+
+    def __init__(self, root, max_size=None):
+        self.root = os.path.join(os.path.abspath(root), CACHE_VERSION)
+        self.max_size = parse_size(max_size or DEFAULT_MAX_SIZE)
+        self.entries = os.path.join(self.root, "entries")
+        self.aliases = os.path.join(self.root, "aliases")
+        for dirname in [self.entries, self.aliases]:
+            os.makedirs(dirname, exist_ok=True)
+        self.lockfile = os.path.join(self.root, ".lock")
+        self.hits = 0
+        self.misses = 0
+
+        # Size of the entries (None until we scan), and whether we warned
+        # that we cannot write entries
+        self.total = None
+        self.warned = False
+
+    def __str__(self):
+        return "[CorpusCache:%s]" % self.root
+
+    def __repr__(self):
+        return str(self)
+
+    def entry_path(self, key):
+        return os.path.join(self.entries, key + ".json")
+
+    def alias_path(self, alias):
+        return os.path.join(self.aliases, alias)
+
+    def identify(self, path):
+        """
+        Derive the identity of a file, preferring the GNU build-id.
+        """
+        st = os.stat(path)
+        with open(path, "rb") as fd:
+            try:
+                build_id, tags = read_build_id(fd)
+            except Exception:
+                build_id = None
+        if build_id:
+            return CorpusIdentity(
+                path, key="buildid-%s-%x-%s" % (build_id, st.st_size, tags)
+            )
+        alias = "stat-%x-%x-%x-%x" % (
+            st.st_dev,
+            st.st_ino,
+            st.st_size,
+            st.st_mtime_ns,
+        )
+        return CorpusIdentity(path, alias=alias)
+
+    def get(self, path):
+        """
+        Look up a file in the cache. We return the identity (to store the
+        entry if it is missing) and the entry, or None on a cache miss.
+        """
+        identity = self.identify(path)
+
+        # A stat alias is only a pointer to an entry keyed by content
+        if not identity.key:
+            identity.key = self._read_alias(identity.alias)
+            entry = self._read(identity.key) if identity.key else None
+            if entry is None:
+                identity.key = "sha256-%s" % hash_file(path)
+                entry = self._read(identity.key)
+                if entry is not None:
+                    self._write_alias(identity)
+        else:
+            entry = self._read(identity.key)
+
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return identity, entry
+
+    def set(self, identity, entry):
+        """
+        Store an entry for an identity, and evict old entries if needed.
+        """
+        if not identity.key:
+            identity.key = "sha256-%s" % hash_file(identity.path)
+        if self.total is None:
+            self.total = self.size()
+        content = json.dumps(entry)
+        if self._atomic_write(self.entry_path(identity.key), content):
+            self.total += len(content)
+        if identity.alias:
+            self._write_alias(identity)
+        if self.total > self.max_size:
+            self.evict()
+
+    def _read(self, key):
+        """
+        Read an entry, updating its access time for the LRU policy. Entries
+        can disappear (evicted by another process) or be unreadable, and
+        both are treated as a miss.
+        """
+        path = self.entry_path(key)
+        try:
+            with open(path, "r") as fd:
+                entry = json.load(fd)
+        except (IOError, OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("version") != CACHE_VERSION:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _read_alias(self, alias):
+        try:
+            with open(self.alias_path(alias), "r") as fd:
+                return fd.read().strip() or None
+        except (IOError, OSError):
+            return None
+
+    def _write_alias(self, identity):
+        self._atomic_write(self.alias_path(identity.alias), identity.key)
+
+    def _atomic_write(self, path, content):
+        """
+        Write content to a temporary file and rename it into place, so
+        readers never see a partial entry. We return False (and warn once)
+        if we cannot write it.
+        """
+        tmpfile = None
+        try:
+            fd, tmpfile = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, "w") as out:
+                out.write(content)
+            os.replace(tmpfile, path)
+        except (IOError, OSError) as e:
+            if tmpfile:
+                self._remove(tmpfile)
+            if not self.warned:
+                self.warned = True
+                sys.stderr.write("Warning: cannot write to corpus cache %s\n" % e)
+            return False
+        return True
+
+    def _remove(self, path):
+        try:
+            os.unlink(path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def size(self):
+        """
+        Total size (in bytes) of the cache entries.
+        """
+        return sum(st.st_size for _, st in self._list_entries())
+
+    def _list_entries(self):
+        entries = []
+        for entry in os.scandir(self.entries):
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                entries.append((entry.path, entry.stat()))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self):
+        """
+        Remove least recently used entries until we are under the size cap.
+        Only one process evicts at once - if another holds the lock we skip.
+        """
+        with open(self.lockfile, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except (IOError, OSError):
+                return
+            try:
+                entries = self._list_entries()
+                self.total = sum(st.st_size for _, st in entries)
+                if self.total <= self.max_size:
+                    return
+                target = self.max_size * EVICT_RATIO
+                for path, st in sorted(entries, key=lambda x: x[1].st_mtime):
+                    if self.total <= target:
+                        break
+                    self._remove(path)
+                    self.total -= st.st_size
+                self._prune_aliases()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _prune_aliases(self):
+        """
+        Remove aliases that point to evicted entries.
+        """
+        for alias in os.scandir(self.aliases):
+            if alias.name.startswith(".tmp-"):
+                continue
+            key = self._read_alias(alias.name)
+            if not key or not os.path.exists(self.entry_path(key)):
+                self._remove(alias.path)
+
+    def clear(self):
+        """
+        Remove all entries and aliases.
+        """
+        for dirname in [self.entries, self.aliases]:
+            for entry in os.scandir(dirname):
+                self._remove(entry.path)
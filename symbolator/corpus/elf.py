@@ -8,8 +8,12 @@ We exclude most of the Dwarf Information Entries to expose a reduced set.
 Entries can be added as they are needed.
 """
 
+import array
+import os
 import sys
-from .base import CorpusBase
+from .base import CorpusBase, TIERS
+from .cache import CACHE_VERSION, get_cache
+from .symbols import SymbolTable
 
 
 class ElftoolsWrapper(object):
@@ -24,6 +28,7 @@ class ElftoolsWrapper(object):
             gnuversions,
             elffile,
             constants,
+            enums,
         )
         from elftools.dwarf import descriptions as dwarf
         from elftools.dwarf import locationlists as locationlists
@@ -36,6 +41,7 @@ class ElftoolsWrapper(object):
         self.gnuversions = gnuversions
         self.elffile = elffile
         self.constants = constants
+        self.enums = enums
         self.dwarf = dwarf
         self.locationlists = locationlists
         self.py3compat = py3compat
@@ -44,6 +50,22 @@ class ElftoolsWrapper(object):
 
 et = ElftoolsWrapper()
 
+# Symbol table decoders (auto uses numpy if it is installed)
+DECODERS = ("auto", "numpy", "elftools")
+
+# Corpus tiers for symbol tables, and the section type for each
+SYMBOL_TABLES = {"dynsym": "SHT_DYNSYM", "symtab": "SHT_SYMTAB"}
+
+# Reserved version indices have names (the rest are parsed as integers)
+VERSYM_NAMES = dict((v, k) for k, v in et.enums.ENUM_VERSYM.items() if k != "_default_")
+
+
+def describe_versym(index):
+    """
+    Convert a raw versym index into the value pyelftools would parse.
+    """
+    return VERSYM_NAMES.get(index, index)
+
 
 class CorpusReader(et.elffile.ELFFile):  # noqa
     """
@@ -53,18 +75,35 @@ class CorpusReader(et.elffile.ELFFile):  # noqa
     interacting with content. We close the file handle on any exit.
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, decoder=None, read_sections=True):
         self.fd = open(filename, "rb")
         self.filename = filename
+        decoder = decoder or os.environ.get("SYMBOLATOR_DECODER", "auto")
+        if decoder not in DECODERS:
+            sys.exit(
+                "%s is not a known symbol decoder (%s)" % (decoder, ", ".join(DECODERS))
+            )
+        self.decoder = decoder
         try:
             self.elffile = et.elffile.ELFFile(self.fd)
         except Exception:
             sys.exit("%s is not an ELF file." % filename)
 
+        # Read section headers once, shared by everything below. Without
+        # them we can still read the header and dynamic tags (from PT_DYNAMIC)
+        self.index_sections(read_sections)
+        self._dynamic_tags = None
+        if not read_sections:
+            self._versions = {}
+            self._shndx_sections = {}
+            self.get_version_table()
+            return
+
         # Cannot continue without dwarf info
-        if not self.elffile.has_dwarf_info():
+        if not self.has_dwarf_info():
             sys.exit("%s is missing DWARF info." % self.filename)
         self.get_version_lookup()
+        self.get_version_table()
         self.get_shndx_sections()
 
     def __str__(self):
@@ -75,11 +114,98 @@ class CorpusReader(et.elffile.ELFFile):  # noqa
 
     @property
     def header(self):
-        return dict(self.elffile.header)
+        header = dict(self.elffile.header)
+        header["e_ident"] = dict(header.get("e_ident", {}))
+        return header
 
     def __exit__(self):
         self.fd.close()
 
+    def close(self):
+        self.fd.close()
+
+    def index_sections(self, read_sections=True):
+        """
+        Read all section headers in one pass, and index them by position,
+        name and type. pyelftools creates a new section object (and re-reads
+        the header) every time we iterate, so we only want to do this once.
+        """
+        self.sections = []
+        if read_sections:
+            self.sections = list(self.elffile.iter_sections())
+        self.sections_by_name = {}
+        self.sections_by_type = {}
+        for idx, section in enumerate(self.sections):
+            self.sections_by_name[section.name] = section
+            self.sections_by_type.setdefault(section["sh_type"], []).append(
+                (idx, section)
+            )
+
+    def iter_indexed_sections(self, *types):
+        """
+        Yield (index, section) for sections that are instances of some types.
+        """
+        for idx, section in enumerate(self.sections):
+            if isinstance(section, types):
+                yield idx, section
+
+    def iter_symbol_tables(self, tables=None):
+        """
+        Yield (index, section) for symbol tables, optionally limited to some
+        section types (e.g., SHT_DYNSYM)
+        """
+        for idx, section in self.iter_indexed_sections(et.sections.SymbolTableSection):
+            if tables is None or section["sh_type"] in tables:
+                yield idx, section
+
+    def get_indexed_section(self, name):
+        """
+        Get a section by name from the index (or None).
+        """
+        return self.sections_by_name.get(name)
+
+    def has_dwarf_info(self):
+        """
+        Determine if we have debug information (the same check as pyelftools)
+        """
+        return any(
+            self.get_indexed_section(name)
+            for name in [".debug_info", ".zdebug_info", ".eh_frame"]
+        )
+
+    def iter_dynamic_tags(self):
+        """
+        Yield dynamic tags, from the dynamic section or (if there are no
+        section headers) directly from the PT_DYNAMIC program header. We
+        only parse the tags once.
+        """
+        if self._dynamic_tags is None:
+            self._dynamic_tags = []
+            dynamic = self.get_dynamic()
+            if dynamic is not None:
+                self._dynamic_tags = list(dynamic.iter_tags())
+        return iter(self._dynamic_tags)
+
+    def get_dynamic(self):
+        """
+        Get the dynamic section, or fall back to the PT_DYNAMIC segment.
+        """
+        for _, section in self.iter_indexed_sections(et.dynamic.DynamicSection):
+            return section
+
+        # We only read the program headers (pyelftools segments would scan
+        # the section headers again to find the string table)
+        for idx in range(self.elffile.num_segments()):
+            segment = self.elffile._get_segment_header(idx)
+            if segment["p_type"] == "PT_DYNAMIC":
+                return et.dynamic.Dynamic(
+                    self.fd,
+                    self.elffile,
+                    stringtable=None,
+                    position=segment["p_offset"],
+                    empty=segment["p_filesz"] == 0,
+                )
+
     def get_architecture(self):
         return self.elffile.header.get("e_machine")
 
@@ -96,24 +222,61 @@ class CorpusReader(et.elffile.ELFFile):  # noqa
             et.gnuversions.GNUVerSymSection: "versym",
             et.gnuversions.GNUVerDefSection: "verdef",
             et.gnuversions.GNUVerNeedSection: "verneed",
-            et.dynamic.DynamicSection: "type",
         }
 
-        for section in self.elffile.iter_sections():
-            if type(section) in types:
-                identifier = types[type(section)]
-                if identifier == "type":
-                    for tag in section.iter_tags():
-                        if tag["d_tag"] == "DT_VERSYM":
-                            lookup["type"] = "GNU"
-                else:
-                    lookup[identifier] = section
+        for _, section in self.iter_indexed_sections(*types):
+            lookup[types[type(section)]] = section
+
+        for tag in self.iter_dynamic_tags():
+            if tag["d_tag"] == "DT_VERSYM":
+                lookup["type"] = "GNU"
 
         # If we don't have a type but we have verneed or verdef, it's solaris
         if not lookup.get("type") and (lookup.get("verneed") or lookup.get("verdef")):
             lookup["type"] = "Solaris"
         self._versions = lookup
 
+    def get_version_table(self):
+        """
+        Decode version definitions (.gnu.version_d) and requirements
+        (.gnu.version_r) once into lookups by version index, instead of
+        walking the version chains for every symbol. Names are interned,
+        since the same few versions are shared by thousands of symbols.
+        """
+        self._version_definitions = {}
+        self._version_requirements = {}
+        self._resolved_versions = {}
+        self._versym = None
+
+        if self._versions.get("verdef"):
+            for verdef, verdaux_iter in self._versions["verdef"].iter_versions():
+                self._version_definitions.setdefault(
+                    verdef["vd_ndx"], sys.intern(next(verdaux_iter).name)
+                )
+
+        if self._versions.get("verneed"):
+            for verneed, vernaux_iter in self._versions["verneed"].iter_versions():
+                filename = sys.intern(verneed.name)
+                for vernaux in vernaux_iter:
+                    self._version_requirements.setdefault(
+                        vernaux["vna_other"], (sys.intern(vernaux.name), filename)
+                    )
+
+    def get_versym(self):
+        """
+        Get the raw version index for each dynamic symbol (.gnu.version) as
+        an array of unsigned shorts.
+        """
+        if self._versym is None:
+            self._versym = array.array("H")
+            versym = self._versions.get("versym")
+            if versym:
+                count = versym.num_symbols()
+                self._versym.frombytes(versym.data()[: count * 2])
+                if self.elffile.little_endian != (sys.byteorder == "little"):
+                    self._versym.byteswap()
+        return self._versym
+
     def get_shndx_sections(self):
         """
         Get section lookup.
@@ -123,24 +286,35 @@ class CorpusReader(et.elffile.ELFFile):  # noqa
         SymbolTableIndexSection was added in pyelftools 0.27.
         """
         self._shndx_sections = {}
-        for x in self.elffile.iter_sections():
-            if isinstance(x, et.sections.SymbolTableIndexSection):
-                self._shndx_sections[x.symboltable] = x
+        for _, x in self.iter_indexed_sections(et.sections.SymbolTableIndexSection):
+            self._shndx_sections[x.symboltable] = x
 
-    def get_symbols(self):
+    def get_symbols(self, tables=None):
         """
-        Return a set of symbols from symbol tables
+        Return a set of symbols from symbol tables (all of them, or only
+        those with a section type in tables).
+
+        By default we decode the tables as arrays (with NumPy, if installed)
+        and fall back to decoding symbol by symbol with pyelftools.
         """
-        symbols = {}
+        if self.decoder in ("auto", "numpy"):
+            from . import vectorized
 
-        # We want .symtab and .dynsym
-        tables = [
-            (idx, s)
-            for idx, s in enumerate(self.elffile.iter_sections())
-            if isinstance(s, et.sections.SymbolTableSection)
-        ]
+            try:
+                return vectorized.get_symbols(self, tables)
+            except vectorized.UnsupportedSymbolTable:
+                if self.decoder == "numpy" and not vectorized.numpy:
+                    sys.exit("NumPy is required for the numpy symbol decoder.")
+        return self.get_elftools_symbols(tables)
 
-        for idx, section in tables:
+    def get_elftools_symbols(self, tables=None):
+        """
+        Return a set of symbols from symbol tables, parsed with pyelftools.
+        """
+        symbols = SymbolTable()
+
+        # We want .symtab and .dynsym
+        for idx, section in self.iter_symbol_tables(tables):
             # Symbol table has no entries if this is zero
             # section.num_symbols() shows count, section.name is name
             if section["sh_entsize"] == 0:
@@ -169,17 +343,29 @@ class CorpusReader(et.elffile.ELFFile):  # noqa
 
                 # We aren't considering st_value, which could be many things
                 # https://docs.oracle.com/cd/E19683-01/816-1386/6m7qcoblj/index.html#chapter6-35166
-                symbols[symbol.name] = {
-                    "version_info": version_info,
-                    "type": symbol_type,
-                    "binding": binding,
-                    "visibility": visibility,
-                    "defined": et.descriptions.describe_symbol_shndx(
+                symbols.add(
+                    symbol.name,
+                    version_info,
+                    symbol_type,
+                    binding,
+                    visibility,
+                    et.descriptions.describe_symbol_shndx(
                         self._get_symbol_shndx(symbol, sym_idx, idx)
                     ).strip(),
-                }
+                )
 
-        return symbols
+        return symbols.compact()
+
+    def has_symbol_versions(self, section):
+        """
+        Determine if we should look up versions for symbols in a section.
+        readelf doesn't display version info for Solaris versioning.
+        """
+        return (
+            bool(self._versions)
+            and section["sh_type"] == "SHT_DYNSYM"
+            and self._versions["type"] == "GNU"
+        )
 
     def _get_symbol_version(self, section, sym_idx, symbol):
         """
@@ -187,29 +373,32 @@ class CorpusReader(et.elffile.ELFFile):  # noqa
 
         https://github.com/eliben/pyelftools/blob/master/scripts/readelf.py#L400
         """
-        version_info = ""
+        if not self.has_symbol_versions(section):
+            return ""
+        version_info, version_name = self._symbol_version(sym_idx)
+        return "" if version_name == symbol.name else version_info
 
-        # I'm not sure why this would be empty
-        if not self._versions:
+    def _format_symbol_version(self, version, name):
+        """
+        Format version information for a symbol (e.g., @@GLIBC_2.2.5)
+        """
+        version_info = ""
+        if version["name"] is None:
             return version_info
+        if version["name"] != name and version["index"] not in (
+            "VER_NDX_LOCAL",
+            "VER_NDX_GLOBAL",
+        ):
 
-        # readelf doesn't display version info for Solaris versioning
-        if section["sh_type"] == "SHT_DYNSYM" and self._versions["type"] == "GNU":
-            version = self._symbol_version(sym_idx)
-            if version["name"] != symbol.name and version["index"] not in (
-                "VER_NDX_LOCAL",
-                "VER_NDX_GLOBAL",
-            ):
-
-                # This is an external symbol
-                if version["filename"]:
-                    version_info = "@%(name)s (%(index)i)" % version
+            # This is an external symbol
+            if version["filename"]:
+                version_info = "@%(name)s (%(index)i)" % version
 
-                # This is an internal symbol
-                elif version["hidden"]:
-                    version_info = "@%(name)s" % version
-                else:
-                    version_info = "@@%(name)s" % version
+            # This is an internal symbol
+            elif version["hidden"]:
+                version_info = "@%(name)s" % version
+            else:
+                version_info = "@@%(name)s" % version
         return version_info
 
     def _symbol_version(self, idx):
@@ -218,18 +407,33 @@ class CorpusReader(et.elffile.ELFFile):  # noqa
 
         We can get version information for a symbol based on it's index
         https://github.com/eliben/pyelftools/blob/master/scripts/readelf.py#L942
+        This returns the version info (assuming the version name is not the
+        same as the symbol name) and the version name. A symbol without a
+        version index has no version.
         """
-        symbol_version = dict.fromkeys(("index", "name", "filename", "hidden"))
+        versym = self.get_versym()
+        if idx >= len(versym):
+            return "", None
+        return self.lookup_version(versym[idx])
 
-        # No version information available
-        if (
-            not self._versions.get("versym")
-            or idx >= self._versions.get("versym").num_symbols()
-        ):
-            return None
-
-        symbol = self._versions["versym"].get_symbol(idx)
-        index = symbol.entry["ndx"]
+    def lookup_version(self, index):
+        """
+        Given a raw versym index, return the formatted version info and the
+        version name. Each index is only resolved once.
+        """
+        if index not in self._resolved_versions:
+            version = self._resolve_version(describe_versym(index))
+            self._resolved_versions[index] = (
+                sys.intern(self._format_symbol_version(version, None)),
+                version["name"],
+            )
+        return self._resolved_versions[index]
+
+    def _resolve_version(self, index):
+        """
+        Given a version index (from the versym section) return version info.
+        """
+        symbol_version = dict.fromkeys(("index", "name", "filename", "hidden"))
         if index not in ("VER_NDX_LOCAL", "VER_NDX_GLOBAL"):
             index = int(index)
 
@@ -239,16 +443,17 @@ class CorpusReader(et.elffile.ELFFile):  # noqa
                     index &= ~0x8000
                     symbol_version["hidden"] = True
 
+            # An index without a definition or requirement (e.g., stripped
+            # or malformed sections) has an unknown version (no name)
             if (
                 self._versions.get("verdef")
                 and index <= self._versions["verdef"].num_versions()
             ):
-                _, verdaux_iter = self._versions["verdef"].get_version(index)
-                symbol_version["name"] = next(verdaux_iter).name
+                symbol_version["name"] = self._version_definitions.get(index)
             else:
-                verneed, vernaux = self._versions["verneed"].get_version(index)
-                symbol_version["name"] = vernaux.name
-                symbol_version["filename"] = verneed.name
+                name, filename = self._version_requirements.get(index, (None, None))
+                symbol_version["name"] = name
+                symbol_version["filename"] = filename
 
         symbol_version["index"] = index
         return symbol_version
@@ -264,36 +469,29 @@ class CorpusReader(et.elffile.ELFFile):  # noqa
         # Check for or lazily construct index section mapping (symbol table
         # index -> corresponding symbol table index section object)
         if self._shndx_sections is None:
-            self._shndx_sections = {}
-            for sec in self.elffile.iter_sections():
-                if isinstance(sec, et.sections.SymbolTableIndexSection):
-                    self._shndx_sections[sec.symboltable] = sec
+            self.get_shndx_sections()
         return self._shndx_sections[symtab_index].get_section_index(symbol_index)
 
     def get_dynamic_tags(self):
         """Get the dyamic tags in the ELF file."""
         tags = {}
-        for section in self.elffile.iter_sections():
-            if not isinstance(section, et.dynamic.DynamicSection):
-                continue
 
-            # We are interested in architecture, soname, and needed
-            def add_tag(section, tag):
-                if section not in tags:
-                    tags[section] = []
-                tags[section].append(tag)
+        # We are interested in architecture, soname, and needed
+        def add_tag(section, tag):
+            if section not in tags:
+                tags[section] = []
+            tags[section].append(tag)
 
-            for tag in section.iter_tags():
-                if tag.entry.d_tag == "DT_NEEDED":
-                    add_tag("needed", tag.needed)
-                elif tag.entry.d_tag == "DT_RPATH":
-                    add_tag("rpath", tag.rpath)
-                elif tag.entry.d_tag == "DT_RUNPATH":
-                    add_tag("runpath", tag.runpath)
-                elif tag.entry.d_tag == "DT_SONAME":
-                    tags["soname"] = tag.soname
-
-            return tags
+        for tag in self.iter_dynamic_tags():
+            if tag.entry.d_tag == "DT_NEEDED":
+                add_tag("needed", tag.needed)
+            elif tag.entry.d_tag == "DT_RPATH":
+                add_tag("rpath", tag.rpath)
+            elif tag.entry.d_tag == "DT_RUNPATH":
+                add_tag("runpath", tag.runpath)
+            elif tag.entry.d_tag == "DT_SONAME":
+                tags["soname"] = tag.soname
+        return tags
 
 
 class Corpus(CorpusBase):
@@ -306,15 +504,121 @@ class Corpus(CorpusBase):
 
     def read_corpus(self):
         """
-        Read the entire elf corpus, including dynamic and other sections.
+        Prepare to read the elf corpus. We read it in tiers when they are
+        first needed (the ELF header, dynamic tags, then the .dynsym and
+        .symtab symbol tables), so a caller that only needs the architecture
+        or needed libraries never decodes symbols.
         """
-        reader = CorpusReader(self.path)
+        self._symbol_tables = {}
+        self._cache_checked = False
+
+    def get_cache(self):
+        cache = self.kwargs.get("cache")
+        if cache is None:
+            cache = get_cache()
+        return cache
 
-        # Read in the header section as part of the corpus
-        self.elfheader = reader.header
+    def load(self, *tiers):
+        """
+        Load tiers of the corpus that are not loaded yet.
 
-        # Read in dynamic tags, and symbols
-        self.dynamic_tags = reader.get_dynamic_tags()
-        self.architecture = reader.get_architecture()
-        self.elfclass = reader.get_elf_class()
-        self.symbols = reader.get_symbols()
+        If a corpus cache is configured (or provided with cache=) and we have
+        already parsed this file, symbols (and everything else) are loaded
+        from the cache instead. We don't consult the cache for the header and
+        dynamic tags, since identifying the file can cost more than that.
+        """
+        tiers = [tier for tier in tiers if tier not in self._loaded]
+        if not tiers:
+            return
+
+        cache = None
+        if not self._cache_checked and any(t in SYMBOL_TABLES for t in tiers):
+            self._cache_checked = True
+            cache = self.get_cache()
+            if cache:
+                identity, entry = cache.get(self.path)
+                if entry:
+                    return self.load_cache_entry(entry)
+
+                # The cache entry needs the entire corpus
+                tiers = [tier for tier in TIERS if tier not in self._loaded]
+
+        # We only need section headers for symbol tables
+        reader = CorpusReader(
+            self.path,
+            decoder=self.kwargs.get("decoder"),
+            read_sections=any(tier in SYMBOL_TABLES for tier in tiers),
+        )
+        try:
+            if "header" in tiers:
+                self._elfheader = reader.header
+                self._architecture = reader.get_architecture()
+                self._elfclass = reader.get_elf_class()
+
+            if "dynamic" in tiers:
+                self._dynamic_tags = reader.get_dynamic_tags()
+
+            for tier in tiers:
+                if tier not in SYMBOL_TABLES:
+                    continue
+                sections = reader.sections_by_type.get(SYMBOL_TABLES[tier])
+                if sections:
+                    self._symbol_tables[tier] = (
+                        sections[0][0],
+                        reader.get_symbols([SYMBOL_TABLES[tier]]),
+                    )
+        finally:
+            reader.close()
+
+        self._loaded.update(tiers)
+        self.merge_symbols()
+
+        if cache:
+            cache.set(identity, self.get_cache_entry())
+
+    def merge_symbols(self):
+        """
+        Combine symbol tables in the order they are in the file (a symbol in
+        both takes its values from the later table)
+        """
+        tables = sorted(self._symbol_tables.values(), key=lambda x: x[0])
+        if len(tables) == 1:
+            self._symbols = tables[0][1]
+        else:
+            self._symbols = SymbolTable()
+            for _, symbols in tables:
+                self._symbols.update(symbols)
+            self._symbols.compact()
+        self._dynamic_symbols = self._symbol_tables.get("dynsym", (None, {}))[1]
+
+    def get_cache_entry(self):
+        """
+        Export the parsed corpus for the corpus cache.
+        """
+        return {
+            "version": CACHE_VERSION,
+            "path": self.path,
+            "header": self.elfheader,
+            "dynamic_tags": self.dynamic_tags,
+            "architecture": self.architecture,
+            "elfclass": self.elfclass,
+            "symbol_tables": [
+                [tier, idx, symbols.to_dict()]
+                for tier, (idx, symbols) in self._symbol_tables.items()
+            ],
+        }
+
+    def load_cache_entry(self, entry):
+        """
+        Load a parsed corpus from a corpus cache entry.
+        """
+        self._elfheader = entry["header"]
+        self._dynamic_tags = entry["dynamic_tags"]
+        self._architecture = entry["architecture"]
+        self._elfclass = entry["elfclass"]
+        self._symbol_tables = dict(
+            (tier, (idx, SymbolTable(symbols).compact()))
+            for tier, idx, symbols in entry["symbol_tables"]
+        )
+        self._loaded.update(TIERS)
+        self.merge_symbols()
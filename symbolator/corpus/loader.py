@@ -0,0 +1,158 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Parse many corpora at once. Parsing is CPU bound (and mostly Python), so
+we parse in a pool of processes, and the parsed corpora (symbol tables are
+compact to send back) are returned in the order they were given. A file that
+cannot be parsed gives a CorpusError instead of exiting.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from ..timer import measure, record
+from .base import TIERS
+from .cache import get_cache
+from .elf import Corpus
+from .resolver import LibraryResolver
+
+
+class CorpusError(Exception):
+    """
+    A corpus could not be loaded.
+    """
+
+    def __init__(self, path, message):
+        self.path = path
+        self.message = message
+        super().__init__(path, message)
+
+    def __str__(self):
+        return "%s: %s" % (self.path, self.message)
+
+
+def get_error(path, error):
+    """
+    Get a CorpusError for an exception (or exit) with a corpus.
+    """
+    if isinstance(error, SystemExit):
+        return CorpusError(path, str(error.code))
+    return CorpusError(path, str(error) or error.__class__.__name__)
+
+
+def get_corpus(path, **kwargs):
+    """
+    Create a Corpus for a path, returning the corpus or a CorpusError (e.g.,
+    if the path doesn't exist).
+    """
+    try:
+        return Corpus(path, **kwargs)
+    except (SystemExit, Exception) as e:
+        return get_error(path, e)
+
+
+def load_corpus(corpus):
+    """
+    Load all tiers of a corpus, returning the corpus or a CorpusError.
+    """
+    try:
+        corpus.load(*TIERS)
+    except (SystemExit, Exception) as e:
+        return get_error(corpus.path, e)
+    return corpus
+
+
+def load_path(path, name, kwargs):
+    corpus = get_corpus(path, name=name, **kwargs)
+    if isinstance(corpus, CorpusError):
+        return corpus
+    return load_corpus(corpus)
+
+
+def get_jobs(jobs):
+    """
+    Get the number of processes to use (0 or None is all cores)
+    """
+    if jobs:
+        return jobs
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def load_corpora(corpora, jobs=1, **kwargs):
+    """
+    Load corpora (paths or Corpus objects) with some number of processes.
+    We return loaded corpora (in the same order) and a list of errors.
+    """
+    with measure("parse"):
+        results = [
+            corpus if isinstance(corpus, Corpus) else get_corpus(corpus, **kwargs)
+            for corpus in corpora
+        ]
+        loaded = [x for x in results if not isinstance(x, CorpusError)]
+        jobs = min(get_jobs(jobs), len(loaded))
+
+        if jobs > 1:
+
+            # Workers need the cache configured in this process
+            tasks = []
+            for corpus in loaded:
+                options = dict(corpus.kwargs)
+                if options.get("cache") is None:
+                    options["cache"] = get_cache()
+                tasks.append((corpus.path, corpus.name, options))
+
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                parsed = iter(pool.map(load_path, *zip(*tasks)))
+        else:
+            parsed = (load_corpus(corpus) for corpus in loaded)
+
+        # Corpora we could create are in order between those we couldn't
+        results = [x if isinstance(x, CorpusError) else next(parsed) for x in results]
+
+    errors = [x for x in results if isinstance(x, CorpusError)]
+    results = [x for x in results if not isinstance(x, CorpusError)]
+    record(
+        "parse",
+        files=len(results),
+        symbols=sum(len(corpus.symbols) for corpus in results),
+        errors=len(errors),
+    )
+    return results, errors
+
+
+def get_system_corpora(corpora, splices=None, jobs=1, separate=False, **kwargs):
+    """
+    Get loaded corpora for system libraries (everything the corpora need,
+    recursively). A splice (library name or path to a path) is used instead
+    of the library it replaces. If separate, we return the system libraries
+    of each corpus (a list for each), and libraries they share are found
+    and parsed once. Other keyword arguments (e.g., cache or decoder) are
+    for the Corpus of each library.
+    """
+    # The present working directory is searched after LD_LIBRARY_PATH
+    groups = [[corpus] for corpus in corpora] if separate else [corpora]
+    closures = []
+    missing = {}
+    with measure("resolve"):
+        resolver = LibraryResolver(splices=splices, extra_paths=[os.getcwd()], **kwargs)
+        for group in groups:
+            closure, group_missing = resolver.get_closure(group)
+            closures.append(closure)
+            missing.update(dict.fromkeys(group_missing))
+
+    syscorpora = list(dict((x.path, x) for y in closures for x in y).values())
+    record("resolve", files=len(syscorpora), missing=len(missing))
+    for lib in missing:
+        print("Warning: %s is needed, but not found on system path." % lib)
+
+    # Parse the libraries we found (in parallel, if we have jobs)
+    loaded, errors = load_corpora(syscorpora, jobs=jobs)
+    for error in errors:
+        print("Warning: cannot load %s" % error)
+    loaded = dict((corpus.path, corpus) for corpus in loaded)
+    closures = [[loaded[x.path] for x in y if x.path in loaded] for y in closures]
+    return closures if separate else closures[0]
@@ -0,0 +1,250 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Resolve the libraries a corpus needs (and what they need, recursively) the
+way the dynamic loader would, without running ldd or the loader itself. For
+each DT_NEEDED entry we search, in order:
+
+ - DT_RPATH of the library and the libraries that loaded it (if no DT_RUNPATH)
+ - LD_LIBRARY_PATH (and any extra paths given to the resolver)
+ - DT_RUNPATH of the library
+ - /etc/ld.so.cache
+ - default library directories
+
+$ORIGIN in an rpath or runpath is the directory of the library. A library is
+only accepted if it has the same ELF class, data encoding and machine as the
+library that needs it, like the loader.
+"""
+
+import os
+import struct
+
+from .elf import Corpus
+
+# ld.so.cache formats (the old format can be followed by the new one)
+CACHE_MAGIC_OLD = b"ld.so-1.7.0"
+CACHE_MAGIC_NEW = b"glibc-ld.so.cache1.1"
+
+# Directories the loader always searches last
+DEFAULT_PATHS = ["/lib64", "/usr/lib64", "/lib", "/usr/lib"]
+
+# Cache of parsed ld.so.cache files, by path and modification time
+_ld_so_caches = {}
+
+
+def read_ld_so_cache(filename="/etc/ld.so.cache"):
+    """
+    Parse an ld.so.cache into a lookup of library names to paths (in the
+    order they are in the cache). We only parse a file once.
+    """
+    try:
+        mtime = os.stat(filename).st_mtime_ns
+    except OSError:
+        return {}
+    key = (filename, mtime)
+    if key not in _ld_so_caches:
+        with open(filename, "rb") as fd:
+            _ld_so_caches[key] = parse_ld_so_cache(fd.read())
+    return _ld_so_caches[key]
+
+
+def parse_ld_so_cache(data):
+    """
+    Parse the content of an ld.so.cache. We return an empty lookup for a
+    format we don't know, so resolution falls back to default paths.
+    """
+    start = 0
+
+    # Skip over entries in the old format: magic, count, then (flags, key, value)
+    if data.startswith(CACHE_MAGIC_OLD):
+        (nlibs,) = struct.unpack_from("=I", data, 12)
+        start = 16 + nlibs * 12
+        start += -start % 8
+
+    if data[start : start + len(CACHE_MAGIC_NEW)] != CACHE_MAGIC_NEW:
+        return {}
+
+    # The rest of the header (the byte order is the one of this machine)
+    (nlibs,) = struct.unpack_from("=I", data, start + 20)
+    entry = struct.Struct("=iIIIQ")
+
+    def get_string(offset):
+        offset += start
+        return data[offset : data.index(b"\0", offset)].decode("utf-8", "replace")
+
+    lookup = {}
+    offset = start + 48
+    for _ in range(nlibs):
+        flags, key, value, _, _ = entry.unpack_from(data, offset)
+        offset += entry.size
+        lookup.setdefault(get_string(key), []).append(get_string(value))
+    return lookup
+
+
+def read_elf_arch(path):
+    """
+    Read the ELF class, data encoding and machine from the ELF header (or
+    None if the file isn't ELF).
+    """
+    try:
+        with open(path, "rb") as fd:
+            ident = fd.read(20)
+    except (IOError, OSError):
+        return None
+    if len(ident) < 20 or ident[:4] != b"\x7fELF":
+        return None
+    order = "<" if ident[5] == 1 else ">"
+    return ident[4], ident[5], struct.unpack(order + "H", ident[18:20])[0]
+
+
+class LibraryResolver:
+    """
+    Find the transitive closure of libraries needed by corpora.
+
+    splices is a lookup of library names or paths to a path to use instead.
+    Corpora for libraries we find are created once (with any other keyword
+    arguments, e.g., cache or decoder), and can be shared between calls.
+    """
+
+    def __init__(
+        self,
+        splices=None,
+        ld_library_path=None,
+        extra_paths=None,
+        ld_so_cache="/etc/ld.so.cache",
+        default_paths=None,
+        **kwargs
+    ):
+        self.splices = splices or {}
+        self.kwargs = kwargs
+        if ld_library_path is None:
+            ld_library_path = os.environ.get("LD_LIBRARY_PATH", "")
+        self.ld_library_path = [x for x in ld_library_path.split(":") if x]
+        self.ld_library_path += extra_paths or []
+        self.ld_so_cache = read_ld_so_cache(ld_so_cache) if ld_so_cache else {}
+        self.default_paths = default_paths or DEFAULT_PATHS
+        self.corpora = {}
+        self._arches = {}
+
+    def __str__(self):
+        return "[LibraryResolver]"
+
+    def __repr__(self):
+        return str(self)
+
+    def get_arch(self, path):
+        if path not in self._arches:
+            self._arches[path] = read_elf_arch(path)
+        return self._arches[path]
+
+    def get_corpus(self, path, name=None):
+        """
+        Get (or create) the corpus for a path.
+        """
+        if path not in self.corpora:
+            self.corpora[path] = Corpus(path, name=name, **self.kwargs)
+        return self.corpora[path]
+
+    def expand(self, paths, origin):
+        """
+        Split an rpath or runpath, and substitute $ORIGIN.
+        """
+        expanded = []
+        for entry in paths or []:
+            for path in entry.split(":"):
+                if not path:
+                    continue
+                path = path.replace("${ORIGIN}", origin).replace("$ORIGIN", origin)
+                expanded.append(path)
+        return expanded
+
+    def search(self, name, arch, rpath, runpath):
+        """
+        Search directories (in the order of the loader) for a library.
+        """
+        candidates = []
+        for directory in rpath + self.ld_library_path + runpath:
+            candidates.append(os.path.join(directory, name))
+        candidates += self.ld_so_cache.get(name, [])
+        candidates += [os.path.join(x, name) for x in self.default_paths]
+
+        for path in candidates:
+            if os.path.isfile(path) and self.get_arch(path) == arch:
+                return path
+
+    def resolve(self, name, corpus, rpath=None):
+        """
+        Resolve one needed library for a corpus. rpath is the inherited
+        DT_RPATH of the libraries that loaded it.
+        """
+        if "/" in name:
+            return name if os.path.isfile(name) else None
+
+        # DT_RPATH is ignored if the library has DT_RUNPATH
+        origin = os.path.dirname(os.path.abspath(corpus.path))
+        runpath = self.expand(corpus.runpath, origin)
+        if runpath:
+            rpath = []
+        else:
+            rpath = self.expand(corpus.rpath, origin) + (rpath or [])
+        return self.search(name, self.get_arch(corpus.path), rpath, runpath)
+
+    def get_splice(self, *names):
+        for name in names:
+            if name and name in self.splices:
+                return self.splices[name]
+            if name and os.path.basename(name) in self.splices:
+                return self.splices[os.path.basename(name)]
+
+    def get_closure(self, corpora):
+        """
+        Return corpora for libraries needed by corpora (and what they need)
+        in breadth first order, and the names of libraries we cannot find.
+        Libraries are the same if they are the same file (e.g., a symlink)
+        and we don't return any of the corpora we started with.
+        """
+        seen = set()
+        for corpus in corpora:
+            seen.add(self.get_identity(corpus.path))
+
+        closure = []
+        missing = []
+        queue = [(corpus, []) for corpus in corpora]
+        while queue:
+            corpus, inherited = queue.pop(0)
+            origin = os.path.dirname(os.path.abspath(corpus.path))
+            rpath = [] if corpus.runpath else self.expand(corpus.rpath, origin)
+
+            for name in corpus.needed:
+                path = self.resolve(name, corpus, inherited)
+
+                # A splice replaces a library (found or not)
+                splice = self.get_splice(path, name)
+                if splice:
+                    path = splice
+                if not path or not os.path.exists(path):
+                    if name not in missing:
+                        missing.append(name)
+                    continue
+
+                identity = self.get_identity(path)
+                if identity in seen:
+                    continue
+                seen.add(identity)
+
+                lib = self.get_corpus(path, name=name)
+                closure.append(lib)
+                queue.append((lib, rpath + inherited))
+        return closure, missing
+
+    def get_identity(self, path):
+        """
+        Libraries are the same file if they have the same device and inode.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return os.path.realpath(path)
+        return (st.st_dev, st.st_ino)
@@ -0,0 +1,225 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""A SymbolTable stores the symbols of a corpus in columns instead of a dict
+(with five strings) for every symbol. Names are stored in one blob of utf-8
+bytes, and the attributes of a symbol are small integer codes into a table
+of unique (interned) values. It reads like the dict of dicts it replaces:
+
+    symbols["_ZN11MathLibrary10Arithmetic3AddEdd"]["binding"]
+    for name, meta in symbols.items(): ...
+
+The attributes of a symbol are built for each lookup, so they are read-only
+(a change would be lost). Set the symbol again (symbols[name] = meta) instead.
+"""
+
+from array import array
+from collections.abc import ItemsView, Mapping, ValuesView
+import sys
+from types import MappingProxyType
+
+# Attributes of a symbol, and the array typecode for each column of codes
+FIELDS = ("version_info", "type", "binding", "visibility", "defined")
+TYPECODES = {
+    "version_info": "I",
+    "type": "H",
+    "binding": "H",
+    "visibility": "H",
+    "defined": "I",
+}
+
+
+class SymbolItemsView(ItemsView):
+    def __iter__(self):
+        return self._mapping.iter_rows()
+
+
+class SymbolValuesView(ValuesView):
+    def __iter__(self):
+        for _, meta in self._mapping.iter_rows():
+            yield meta
+
+
+class SymbolTable(Mapping):
+    """
+    A compact, ordered lookup of symbol names to attributes.
+
+    Looking up a symbol by name needs an index of names, which is built on
+    demand (and can be dropped with compact). Iterating over the table
+    (e.g., items) does not.
+    """
+
+    def __init__(self, symbols=None):
+        self._names = bytearray()
+        self._offsets = array("Q", [0])
+        self._codes = dict((field, array(TYPECODES[field])) for field in FIELDS)
+        self._values = dict((field, []) for field in FIELDS)
+        self._lookup = dict((field, {}) for field in FIELDS)
+        self._index = None
+        if symbols:
+            self.update(symbols)
+
+    def __str__(self):
+        return "[SymbolTable:%s]" % len(self)
+
+    def __repr__(self):
+        return str(self)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.get_name(row)
+
+    def __getitem__(self, name):
+        return self.get_row(self.get_index()[name])
+
+    def __setitem__(self, name, meta):
+        self.add(name, *[meta.get(field) for field in FIELDS])
+
+    def items(self):
+        return SymbolItemsView(self)
+
+    def values(self):
+        return SymbolValuesView(self)
+
+    def get_index(self):
+        """
+        Get the lookup of names to rows, building it if needed.
+        """
+        if self._index is None:
+            self._index = dict((name, row) for row, name in enumerate(self))
+        return self._index
+
+    def compact(self):
+        """
+        Drop the index of names (it is rebuilt on the next lookup by name)
+        """
+        self._index = None
+        return self
+
+    def get_name(self, row):
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return self._names[start:end].decode("utf-8")
+
+    def get_names(self):
+        """
+        Get a list of all names. If the names are ascii (byte offsets are
+        character offsets), we decode them all at once.
+        """
+        names = self._names.decode("utf-8")
+        if len(names) != len(self._names):
+            return list(self)
+        starts, ends = self._offsets[:-1], self._offsets[1:]
+        return list(map(names.__getitem__, map(slice, starts, ends)))
+
+    def get_row(self, row):
+        """
+        Get the attributes of the symbol at a row (read-only)
+        """
+        return MappingProxyType(
+            dict(
+                (field, self._values[field][self._codes[field][row]])
+                for field in FIELDS
+            )
+        )
+
+    def iter_rows(self):
+        """
+        Yield (name, attributes) for each symbol, in order (read-only).
+        """
+        for name, meta in self.iter_dicts():
+            yield name, MappingProxyType(meta)
+
+    def iter_dicts(self):
+        """
+        Yield (name, attributes) for each symbol, in order, as new dicts.
+        """
+        columns = [(field, self._values[field], self._codes[field]) for field in FIELDS]
+        for row, name in enumerate(self):
+            yield name, dict(
+                (field, values[codes[row]]) for field, values, codes in columns
+            )
+
+    def encode(self, field, value):
+        """
+        Get the code for the value of a field, adding it if it's new.
+        """
+        lookup = self._lookup[field]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self._values[field])
+            if isinstance(value, str):
+                value = sys.intern(value)
+            self._values[field].append(value)
+        return code
+
+    def add(self, name, version_info, type, binding, visibility, defined):
+        """
+        Add a symbol. Like a dict, a name that is already in the table keeps
+        its position and takes the new attributes.
+        """
+        index = self.get_index()
+        values = (version_info, type, binding, visibility, defined)
+        row = index.get(name)
+        if row is None:
+            row = index[name] = len(self)
+            self._names += name.encode("utf-8")
+            self._offsets.append(len(self._names))
+            for field, value in zip(FIELDS, values):
+                self._codes[field].append(self.encode(field, value))
+        else:
+            for field, value in zip(FIELDS, values):
+                self._codes[field][row] = self.encode(field, value)
+
+    def update(self, symbols):
+        """
+        Add symbols from another table (or a dict of dicts)
+        """
+        for name, meta in symbols.items():
+            self[name] = meta
+
+    def iter_column(self, field):
+        """
+        Yield (name, value) of one field for each symbol, in order.
+        """
+        values, codes = self._values[field], self._codes[field]
+        for row, name in enumerate(self):
+            yield name, values[codes[row]]
+
+    def get_column(self, field):
+        """
+        Get (unique values, code of each symbol) for one field. The code of
+        a symbol is the index of its value.
+        """
+        return self._values[field], self._codes[field]
+
+    def select(self, field, value):
+        """
+        Get names of symbols with some value for a field (e.g., defined UND)
+        """
+        code = self._lookup[field].get(value)
+        if code is None:
+            return []
+        codes = self._codes[field]
+        return [self.get_name(row) for row in range(len(self)) if codes[row] == code]
+
+    def to_dict(self):
+        """
+        Export to a dict of dicts (e.g., for json)
+        """
+        return dict(self.iter_dicts())
+
+    def nbytes(self):
+        """
+        Approximate memory used by the columns (not counting the index or
+        the unique values, which are shared).
+        """
+        return (
+            sys.getsizeof(self._names)
+            + sys.getsizeof(self._offsets)
+            + sum(sys.getsizeof(codes) for codes in self._codes.values())
+        )
@@ -0,0 +1,178 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Decode ELF symbol tables (.dynsym and .symtab) and the .gnu.version
+section as whole arrays with NumPy, instead of creating a pyelftools object
+for every symbol. The result is the same symbols lookup that the
+CorpusReader creates with pyelftools. Anything we don't handle here
+(e.g., extended section indices) raises UnsupportedSymbolTable, and the
+reader falls back to pyelftools.
+"""
+
+from elftools.elf import enums
+from .elf import et
+from .symbols import SymbolTable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class UnsupportedSymbolTable(Exception):
+    """
+    The symbol table needs to be decoded with pyelftools.
+    """
+
+
+def describe_codes(enum, describe, size):
+    """
+    Create a lookup from a numeric code to the same description that
+    pyelftools would give (enum name first, then description).
+    """
+    names = dict((v, k) for k, v in enum.items() if k != "_default_")
+    return [describe(names.get(code, code)).strip() for code in range(size)]
+
+
+# st_info has type in the lower and binding in the upper four bits
+symbol_types = describe_codes(
+    enums.ENUM_ST_INFO_TYPE, et.descriptions.describe_symbol_type, 16
+)
+symbol_bindings = describe_codes(
+    enums.ENUM_ST_INFO_BIND, et.descriptions.describe_symbol_bind, 16
+)
+
+# visibility is the lower three bits of st_other
+symbol_visibilities = describe_codes(
+    enums.ENUM_ST_VISIBILITY, et.descriptions.describe_symbol_visibility, 8
+)
+
+
+def describe_shndx(index):
+    name = dict((v, k) for k, v in enums.ENUM_ST_SHNDX.items() if k != "_default_")
+    return et.descriptions.describe_symbol_shndx(name.get(index, index)).strip()
+
+
+def get_symbol_dtype(elfclass, little_endian):
+    """
+    Get a structured dtype for an ELF32 or ELF64 symbol (Elf_Sym)
+    """
+    order = "<" if little_endian else ">"
+    if elfclass == 32:
+        fields = [
+            ("st_name", "u4"),
+            ("st_value", "u4"),
+            ("st_size", "u4"),
+            ("st_info", "u1"),
+            ("st_other", "u1"),
+            ("st_shndx", "u2"),
+        ]
+    else:
+        fields = [
+            ("st_name", "u4"),
+            ("st_info", "u1"),
+            ("st_other", "u1"),
+            ("st_shndx", "u2"),
+            ("st_value", "u8"),
+            ("st_size", "u8"),
+        ]
+    return numpy.dtype([(name, order + kind) for name, kind in fields])
+
+
+def get_symbols(reader, tables=None):
+    """
+    Return the symbols lookup for a CorpusReader, decoding each symbol table
+    (or only those with a section type in tables) as an array.
+    """
+    if numpy is None:
+        raise UnsupportedSymbolTable("NumPy is not installed.")
+
+    elffile = reader.elffile
+    dtype = get_symbol_dtype(elffile.elfclass, elffile.little_endian)
+
+    symbols = SymbolTable()
+    for _, section in reader.iter_symbol_tables(tables):
+
+        # Symbol table has no entries if this is zero
+        if section["sh_entsize"] == 0:
+            continue
+        if section["sh_entsize"] != dtype.itemsize:
+            raise UnsupportedSymbolTable(
+                "%s has unexpected entry size %s"
+                % (section.name, section["sh_entsize"])
+            )
+        decode_symbol_table(reader, section, dtype, symbols)
+    return symbols.compact()
+
+
+def decode_names(strtab, offsets):
+    """
+    Look up names for an array of string table offsets. We find the end of
+    every string at once by searching the positions of null bytes.
+    """
+    nulls = numpy.flatnonzero(numpy.frombuffer(strtab, dtype=numpy.uint8) == 0)
+    if offsets.size and (not nulls.size or offsets.max() > nulls[-1]):
+        raise UnsupportedSymbolTable("Symbol name is outside of the string table.")
+    ends = nulls[numpy.searchsorted(nulls, offsets)]
+    return [
+        strtab[start:end].decode("utf-8", errors="replace")
+        for start, end in zip(offsets.tolist(), ends.tolist())
+    ]
+
+
+def decode_versions(reader, section, names):
+    """
+    Return version info for each symbol in a (dynamic) symbol table. Each
+    unique version index is only resolved once.
+    """
+    versym = reader.get_versym()
+    if len(versym) < len(names):
+        raise UnsupportedSymbolTable("%s is missing symbol versions." % section.name)
+
+    indices = numpy.frombuffer(versym, dtype=numpy.uint16)[: len(names)]
+    unique, inverse = numpy.unique(indices, return_inverse=True)
+    resolved = [reader.lookup_version(index) for index in unique.tolist()]
+
+    versions = []
+    for name, idx in zip(names, inverse.tolist()):
+        version_info, version_name = resolved[idx]
+        versions.append("" if version_name == name else version_info)
+    return versions
+
+
+def decode_symbol_table(reader, section, dtype, symbols):
+    """
+    Decode one symbol table, adding symbols to the lookup.
+    """
+    table = numpy.frombuffer(section.data(), dtype=dtype, count=section.num_symbols())
+
+    # Symbols with extended section indices need the SHT_SYMTAB_SHNDX section
+    shndx = table["st_shndx"]
+    if (shndx == et.constants.SHN_INDICES.SHN_XINDEX).any():
+        raise UnsupportedSymbolTable("%s uses extended section indices." % section.name)
+
+    names = decode_names(section.stringtable.data(), table["st_name"])
+    if reader.has_symbol_versions(section):
+        versions = decode_versions(reader, section, names)
+    else:
+        versions = [""] * len(names)
+
+    types = numpy.array(symbol_types, dtype=object)[table["st_info"] & 0xF]
+    bindings = numpy.array(symbol_bindings, dtype=object)[table["st_info"] >> 4]
+    visibilities = numpy.array(symbol_visibilities, dtype=object)[
+        table["st_other"] & 0x7
+    ]
+    unique, inverse = numpy.unique(shndx, return_inverse=True)
+    defined = numpy.array([describe_shndx(x) for x in unique.tolist()], dtype=object)
+
+    for name, version_info, symbol_type, binding, visibility, definition in zip(
+        names,
+        versions,
+        types.tolist(),
+        bindings.tolist(),
+        visibilities.tolist(),
+        defined[inverse].tolist(),
+    ):
+        symbols.add(name, version_info, symbol_type, binding, visibility, definition)
@@ -0,0 +1,15 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Native engines answer the same questions as some logic programs (with the
+same Result answers) without clingo, for questions that are set operations
+over symbols. The logic programs (the asp engine) are the reference.
+"""
+
+from .compare import CompareEngine
+from .splice import SpliceEngine
+from .stability import StabilityEngine
+
+ENGINES = ("asp", "native")
@@ -0,0 +1,176 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""The native engine for compare_libs.lp: symbols that only one library has,
+changed attributes of symbols that both have, and changed ELF headers. The
+attributes of each symbol are columns of codes (like a SymbolTable), in one
+code space for both libraries. We join the symbols of the two libraries by
+name (a merge join, with names as integer ids) and compare every column
+of every pair of rows in one vectorized comparison with NumPy.
+"""
+
+import itertools
+import operator
+import os
+
+from symbolator.asp import Result, get_symbol_name
+from symbolator.corpus.symbols import FIELDS, SymbolTable
+from symbolator.timer import measure
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Answers for a changed attribute of a symbol, for each field
+CHANGES = {
+    "version_info": "symbol_version_changed",
+    "visibility": "symbol_visibility_changed",
+    "binding": "symbol_binding_changed",
+    "defined": "symbol_definition_changed",
+    "type": "symbol_type_changed",
+}
+
+
+def get_metadata(corpus):
+    """
+    Get (answer, value) for each corpus fact that compare_libs.lp compares.
+    """
+    hdr = corpus.elfheader
+    return [
+        ("elf_class_changed", hdr["e_ident"]["EI_CLASS"]),
+        ("corpus_name_changed", os.path.basename(corpus.path)),
+        ("elf_data_encoding_changed", hdr["e_ident"]["EI_DATA"]),
+        ("corpus_file_version_changed", hdr["e_ident"]["EI_VERSION"]),
+        ("corpus_elf_osabi_changed", hdr["e_ident"]["EI_OSABI"]),
+        ("corpus_abiversion_changed", hdr["e_ident"]["EI_ABIVERSION"]),
+        ("corpus_elf_type_changed", hdr["e_type"]),
+        ("corpus_elf_machine_changed", hdr["e_machine"]),
+        ("corpus_elf_version_changed", hdr["e_version"]),
+    ]
+
+
+def join(ida, idb):
+    """
+    Get the rows (ra, rb) of every pair of symbols with the same name id.
+    We sort the ids of the second table once, and find the range of rows
+    for each id of the first with a binary search (a merge join).
+    """
+    order = numpy.argsort(idb, kind="stable")
+    lo = numpy.searchsorted(idb[order], ida, "left")
+    counts = numpy.searchsorted(idb[order], ida, "right") - lo
+    ra = numpy.repeat(numpy.arange(len(ida)), counts)
+
+    # Rows of a name in the second table are consecutive in sorted order
+    starts = numpy.repeat(lo - (numpy.cumsum(counts) - counts), counts)
+    rb = order[starts + numpy.arange(len(ra))]
+    return ra, rb
+
+
+class CompareEngine:
+    """
+    Compare the symbols and headers of two libraries. System libraries only
+    add symbols that neither library has, so (unlike the asp engine) we
+    don't load them. This needs NumPy (see available).
+    """
+
+    available = numpy is not None
+
+    def __init__(self):
+        # Values (of each field) to codes, for both libraries
+        self.codes = dict((field, {}) for field in FIELDS)
+
+    def get_columns(self, corpus):
+        """
+        Get the names of the symbols, and a column of codes for each field.
+        Like facts, we skip the empty (NULL) symbol and remove @@ versions.
+        """
+        symbols = corpus.symbols
+        if not isinstance(symbols, SymbolTable):
+            symbols = SymbolTable(symbols)
+
+        names = symbols.get_names()
+        lengths = numpy.fromiter(map(len, names), dtype=numpy.int64, count=len(names))
+        rows = numpy.flatnonzero(lengths)
+        names = list(filter(None, names))
+        if any(map(operator.contains, names, itertools.repeat("@@"))):
+            names = [get_symbol_name(name) for name in names]
+
+        columns = numpy.empty((len(rows), len(FIELDS)), dtype=numpy.int64)
+        for column, field in enumerate(FIELDS):
+            values, codes = symbols.get_column(field)
+            shared = self.codes[field]
+            lookup = [shared.setdefault(value, len(shared)) for value in values]
+            lookup = numpy.array(lookup, dtype=numpy.int64)
+            columns[:, column] = lookup[numpy.asarray(codes)[rows]]
+        return names, columns
+
+    def solve(self, corpora):
+        """
+        Return a Result with the same answers as compare_libs.lp for
+        [libA, libB], with the rows of each answer sorted.
+        """
+        with measure("solve"):
+            return self.compare(*corpora)
+
+    def compare(self, libA, libB):
+        """
+        Get the answers (a Result) for two libraries.
+        """
+        namesa, columnsa = self.get_columns(libA)
+        namesb, columnsb = self.get_columns(libB)
+
+        # An integer id for each name: the index of a row with that name in
+        # namesa, or (if only libB has it) of a row in namesb after namesa
+        ids = dict(zip(namesb, itertools.count(len(namesa))))
+        ids.update(zip(namesa, itertools.count()))
+        ida = numpy.fromiter(map(ids.__getitem__, namesa), numpy.int64, len(namesa))
+        idb = numpy.fromiter(map(ids.__getitem__, namesb), numpy.int64, len(namesb))
+        names = namesa + namesb
+
+        answers = {"is_libA": [[libA.path]], "is_libB": [[libB.path]]}
+
+        # A symbol is missing if only one library has the name
+        hasa = numpy.zeros(len(names), dtype=bool)
+        hasb = numpy.zeros(len(names), dtype=bool)
+        hasa[ida] = True
+        hasb[idb] = True
+        missing = numpy.flatnonzero(hasa != hasb)
+        if missing.size:
+            answers["symbol_is_missing"] = sorted(
+                [libA.path, libB.path, names[i]] for i in missing.tolist()
+            )
+
+        # Compare every field of every pair of symbols with the same name
+        ra, rb = join(ida, idb)
+        changed = columnsa[ra] != columnsb[rb]
+        for column, field in enumerate(FIELDS):
+            rows = numpy.flatnonzero(changed[:, column])
+            if not rows.size:
+                continue
+
+            # The same name can have more than one row (e.g., foo@@V1 and foo)
+            values = list(self.codes[field])
+            found = set(
+                zip(
+                    ida[ra[rows]].tolist(),
+                    columnsa[ra[rows], column].tolist(),
+                    columnsb[rb[rows], column].tolist(),
+                )
+            )
+            answers[CHANGES[field]] = sorted(
+                [libA.path, libB.path, names[i], str(values[a]), str(values[b])]
+                for i, a, b in found
+            )
+
+        # Headers (and the name of the file) that are different
+        for (name, a), (_, b) in zip(get_metadata(libA), get_metadata(libB)):
+            if a != b:
+                answers[name] = [[libA.path, libB.path, str(a), str(b)]]
+
+        result = Result()
+        result.satisfiable = True
+        result.answers = answers
+        return result
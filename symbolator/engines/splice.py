@@ -0,0 +1,83 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""The native engine for missing_symbols.lp: a symbol is missing for a corpus
+if it is undefined (UND) there and no corpus defines it. That is a set
+difference between the undefined names of each corpus and one set of every
+defined name.
+"""
+
+from symbolator.asp import Result, get_symbol_name
+from symbolator.corpus.loader import get_system_corpora
+from symbolator.timer import measure
+
+
+def iter_definitions(corpus):
+    """
+    Yield (name, defined) for the symbols of a corpus, with names as they
+    are in facts (no empty names, without a compiler @@ version).
+    """
+    symbols = corpus.symbols
+    if hasattr(symbols, "iter_column"):
+        rows = symbols.iter_column("defined")
+    else:
+        rows = ((name, meta["defined"]) for name, meta in symbols.items())
+    for name, defined in rows:
+        if name:
+            yield get_symbol_name(name), defined
+
+
+class SpliceEngine:
+    """
+    Find missing symbols for a binary and the libraries it needs (or a set
+    of corpora that are already a closure, like from json).
+    """
+
+    def __init__(self, jobs=1):
+        self.jobs = jobs
+
+    def solve(self, corpora, system_libs=False, splices=None):
+        """
+        Return a Result with missing_symbols (corpus path, symbol) answers.
+        Like PyclingoDriver.solve, we only add system libraries (with splices
+        instead of what they replace) if asked.
+        """
+        corpora = list(corpora)
+        if system_libs:
+            corpora += get_system_corpora(corpora, splices=splices, jobs=self.jobs)
+
+        with measure("solve"):
+            missing = self.get_missing(corpora)
+
+        result = Result()
+        result.satisfiable = True
+        result.answers = {"missing_symbols": missing} if missing else {}
+        return result
+
+    def get_missing(self, corpora):
+        """
+        Get [corpus path, symbol] for each symbol that is undefined in a
+        corpus, and not defined in any.
+        """
+        # One index of names that some corpus defines
+        defined = set()
+        undefined = []
+        for corpus in corpora:
+            names = []
+            for name, definition in iter_definitions(corpus):
+                if definition == "UND":
+                    names.append(name)
+                else:
+                    defined.add(name)
+            undefined.append((corpus.path, names))
+
+        missing = []
+        for path, names in undefined:
+            seen = set()
+            for name in names:
+                if name not in defined and name not in seen:
+                    seen.add(name)
+                    missing.append([path, name])
+        return missing
@@ -0,0 +1,113 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""The native engine for stability.lp: B can replace A if what A exports
+(and imports), as (function, type, location, indirections), B does too. We
+index the parameters of each Smeagle model by direction and function name
+(as is_a and is_b facts are generated), and take set differences.
+"""
+
+from symbolator.asp import Result
+from symbolator.timer import measure
+
+# Answers for the parameters of each direction that B is missing
+MISSING = {"export": "missing_exports", "import": "missing_imports"}
+
+
+def get_term(arg):
+    """
+    Get an argument as it is a term in facts (see argify): integers are
+    numbers, and anything else is a string. So 0 and "0" are different.
+    """
+    if isinstance(arg, int) and not isinstance(arg, bool):
+        return arg
+    return str(arg)
+
+
+def get_interface(locations):
+    """
+    Get {direction: {function: {(type, location, indirections): None}}} for
+    the parameters of the functions of a Smeagle model (its locations), with
+    the same defaults as GeneratorBase.generate_function. Locations are
+    ordered as in the model, and arguments are terms (see get_term).
+    """
+    interface = dict((direction, {}) for direction in MISSING)
+    for location in locations:
+        func = location.get("function")
+        if not func:
+            continue
+        for param in func.get("parameters", []):
+
+            # We skip parameters without a name (generate_function warns)
+            if not param.get("name"):
+                continue
+            locations = interface.get(param.get("direction", "unknown"))
+            if locations is None:
+                continue
+
+            param_type = param.get("class", "Unknown")
+            if "underlying_type" in param:
+                param_type = param["underlying_type"].get("class") or param_type
+            key = (
+                get_term(param_type),
+                get_term(param.get("location", "unknown")),
+                get_term(param.get("indirections", "0")),
+            )
+            locations.setdefault(get_term(func["name"]), {})[key] = None
+    return interface
+
+
+class StabilityEngine:
+    """
+    Find the exports and imports of a library (A) that another (B) is
+    missing. We index each library (a Model) once, so one engine can check
+    many pairs of libraries.
+    """
+
+    def __init__(self):
+        self.interfaces = {}
+
+    def get_interface(self, lib):
+        """
+        Get the (cached) interface of a library.
+        """
+        interface = self.interfaces.get(lib)
+        if interface is None:
+            interface = self.interfaces[lib] = get_interface(lib.iter_locations())
+        return interface
+
+    def solve(self, lib1, lib2):
+        """
+        Return a Result with missing_exports and missing_imports (function,
+        type, location, indirections) answers, for the parameters of lib1
+        that lib2 doesn't have.
+        """
+        with measure("solve"):
+            a = self.get_interface(lib1)
+            b = self.get_interface(lib2)
+            answers = {}
+            for direction, name in MISSING.items():
+                missing = self.get_missing(a[direction], b[direction])
+                if missing:
+                    answers[name] = missing
+
+        result = Result()
+        result.satisfiable = True
+        result.answers = answers
+        return result
+
+    def get_missing(self, locations, others):
+        """
+        Get [function, type, location, indirections] for each location of a
+        function that the function (in others) doesn't have, as strings (like
+        answers).
+        """
+        missing = []
+        for func, keys in locations.items():
+            other = others.get(func, {})
+            for key in keys:
+                if key not in other:
+                    missing.append([str(func)] + [str(x) for x in key])
+        return missing
@@ -0,0 +1,146 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Check many binaries against many contender libraries (a compat matrix).
+Every file (and every system library the binaries need) is parsed once.
+Each binary gets a CompatSession (is_compatible.lp with the binary grounded
+once) and the contenders are checked in it. Binaries (or groups of
+contenders) are checked in a pool of processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import csv
+
+from .asp import CompatSession
+from .corpus import Corpus
+from .corpus.loader import get_jobs, get_system_corpora, load_corpora
+
+# Columns for a table of results (e.g., csv)
+COLUMNS = [
+    "binary",
+    "library_working",
+    "library_contender",
+    "count_missing_symbols",
+    "architecture_count",
+    "compatible",
+]
+
+
+def get_path(corpus):
+    return corpus.path if isinstance(corpus, Corpus) else corpus
+
+
+def get_count(answers, name):
+    """
+    Get a count (e.g., count_missing_symbols) from answers, or 0
+    """
+    rows = answers.get(name) or [["0"]]
+    return int(rows[0][0])
+
+
+def get_pair(binary, working, contender, result=None, mismatches=None):
+    """
+    Get the result of one binary and contender (a row of the matrix)
+    """
+    answers = result.answers if result else {}
+    pair = {
+        "binary": binary.path,
+        "library_working": working.path,
+        "library_contender": contender.path,
+        "missing_symbols": [row[-1] for row in answers.get("missing_symbols", [])],
+        "count_missing_symbols": get_count(answers, "count_missing_symbols"),
+        "architecture_count": get_count(answers, "architecture_count"),
+    }
+    if mismatches:
+        pair["header_mismatches"] = mismatches
+    pair["compatible"] = bool(
+        result
+        and result.satisfiable
+        and pair["count_missing_symbols"] == 0
+        and pair["architecture_count"] == 1
+    )
+    return pair
+
+
+def check_binary(binary, working, contenders, system_corpora=None):
+    """
+    Check one binary against contenders in one session. A contender with a
+    different architecture or class than the binary isn't solved.
+    """
+    session = CompatSession(
+        binary,
+        working,
+        system_libs=system_corpora is not None,
+        system_corpora=system_corpora,
+    )
+    pairs = []
+    for contender in contenders:
+        mismatches = binary.header_mismatches(contender)
+        result = None if mismatches else session.check(contender)
+        pairs.append(get_pair(binary, working, contender, result, mismatches))
+    return pairs
+
+
+def split(items, count):
+    """
+    Split items into (up to) count groups of about the same size
+    """
+    if not items:
+        return []
+    count = max(1, min(count, len(items)))
+    size = -(-len(items) // count)
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def compat_matrix(binaries, working, contenders, jobs=1, system_libs=True):
+    """
+    Check each binary (that works with the working library) against each
+    contender library. Binaries and libraries can be paths or Corpus
+    objects. We return the pairs (binary by binary, in the order given)
+    and a list of errors (e.g., files we cannot parse).
+    """
+    # A file that is given more than once is only parsed once
+    paths = list(binaries) + [working] + list(contenders)
+    unique = dict((get_path(path), path) for path in paths)
+    corpora, errors = load_corpora(list(unique.values()), jobs=jobs)
+    if errors:
+        return [], errors
+
+    corpora = dict((corpus.path, corpus) for corpus in corpora)
+    binaries = [corpora[get_path(path)] for path in binaries]
+    working = corpora[get_path(working)]
+    contenders = [corpora[get_path(path)] for path in contenders]
+
+    # System libraries are found and parsed once for all binaries
+    system = dict((binary.path, None) for binary in binaries)
+    if system_libs:
+        closures = get_system_corpora(binaries, jobs=jobs, separate=True)
+        system.update(zip([binary.path for binary in binaries], closures))
+
+    # Give each process a binary, or a group of contenders for a binary
+    jobs = get_jobs(jobs)
+    groups = split(contenders, jobs // max(1, len(binaries)))
+    tasks = [
+        (binary, working, group, system[binary.path])
+        for binary in binaries
+        for group in groups
+    ]
+
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            results = list(pool.map(check_binary, *zip(*tasks)))
+    else:
+        results = [check_binary(*task) for task in tasks]
+    return [pair for pairs in results for pair in pairs], []
+
+
+def write_csv(pairs, out):
+    """
+    Write a table of pairs (without the list of missing symbols) as csv
+    """
+    writer = csv.DictWriter(out, fieldnames=COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for pair in pairs:
+        writer.writerow(pair)
@@ -1 +1,2 @@
 from .model import SmeagleRunner
+from .validate import ModelValidationError, TrustedModels
@@ -0,0 +1,201 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Test the stability of many versions of a library (a stability matrix).
+Every Smeagle model is loaded once, and checked for all ordered pairs (can
+B replace A?) or for consecutive versions. A process checks a group of
+pairs, and indexes each library (native) or generates its facts (asp) once.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import csv
+
+from symbolator.corpus.loader import get_jobs
+from symbolator.engines import StabilityEngine
+from symbolator.facts import get_facts
+from symbolator.matrix import split
+from symbolator.timer import measure, record
+
+from .model import FactGeneratorSetup, Model, SmeagleClingoDriver, StreamModel
+from .validate import ModelValidationError, load_model_data
+
+# Columns for a table of results (e.g., csv)
+COLUMNS = [
+    "library_a",
+    "library_b",
+    "count_missing_exports",
+    "count_missing_imports",
+    "stable",
+]
+
+# Pairs of libraries to check
+PAIRS = ("all", "consecutive")
+
+
+def load_models(paths, trusted=None, stream=False):
+    """
+    Load (and validate, unless trusted) Smeagle models, named by path, or
+    stream them from their files (see StreamModel). We return the models and
+    a list of errors (ModelValidationError), including files we can't read.
+    """
+    models = []
+    errors = []
+    with measure("parse"):
+        for path in paths:
+            try:
+                if stream:
+                    models.append(StreamModel(path, path, trusted))
+                else:
+                    models.append(Model(path, load_model_data(path, trusted)))
+            except ModelValidationError as e:
+                errors.append(e)
+            except OSError as e:
+                message = e.strerror or str(e)
+                errors.append(
+                    ModelValidationError(path, [{"path": [], "message": message}])
+                )
+    record("parse", files=len(models), errors=len(errors))
+    return models, errors
+
+
+def get_pairs(count, pairs="all"):
+    """
+    Get (a, b) indices of libraries to check: all ordered pairs of different
+    libraries, or each library with the next one (consecutive).
+    """
+    if pairs not in PAIRS:
+        raise ValueError("%s is not a kind of pairs (%s)" % (pairs, ", ".join(PAIRS)))
+    if pairs == "consecutive":
+        return [(i, i + 1) for i in range(count - 1)]
+    return [(a, b) for a in range(count) for b in range(count) if a != b]
+
+
+class FactsSetup:
+    """
+    A setup that adds facts we generated before (for each library).
+    """
+
+    def __init__(self, *facts):
+        self.facts = facts
+
+    def setup(self, driver):
+        for facts in self.facts:
+            for fact in facts:
+                driver.fact(fact)
+
+
+class StabilityChecker:
+    """
+    Check pairs of libraries, with facts (asp) or an index (native) that we
+    make once for each library.
+    """
+
+    def __init__(self, libs, engine="native"):
+        self.libs = libs
+        self.engine = engine
+        self.native = StabilityEngine()
+        self.facts = {}
+        self.logic_program = get_facts("stability.lp")
+
+    def get_library_facts(self, lib, identifier):
+        """
+        Get the facts of a library, as a or b
+        """
+        key = (lib.name, identifier)
+        if key not in self.facts:
+            driver = SmeagleClingoDriver()
+            driver.solve(FactGeneratorSetup(lib, identifier), facts_only=True)
+            self.facts[key] = driver.facts
+        return self.facts[key]
+
+    def solve(self, lib1, lib2):
+        """
+        Get the Result of a stability test of two libraries.
+        """
+        if self.engine == "native":
+            return self.native.solve(lib1, lib2)
+        setup = FactsSetup(
+            self.get_library_facts(lib1, "a"), self.get_library_facts(lib2, "b")
+        )
+        return SmeagleClingoDriver().solve(setup, logic_programs=self.logic_program)
+
+    def check(self, pairs, detail=False):
+        """
+        Check pairs (indices of libraries), returning a row for each.
+        """
+        rows = []
+        for a, b in pairs:
+            answers = self.solve(self.libs[a], self.libs[b]).answers
+            exports = answers.get("missing_exports", [])
+            imports = answers.get("missing_imports", [])
+            row = {
+                "library_a": self.libs[a].name,
+                "library_b": self.libs[b].name,
+                "count_missing_exports": len(exports),
+                "count_missing_imports": len(imports),
+                "stable": not exports and not imports,
+            }
+            if detail:
+                row["missing_exports"] = sorted(exports)
+                row["missing_imports"] = sorted(imports)
+            rows.append(row)
+        return rows
+
+
+def check_pairs(libs, pairs, engine="native", detail=False):
+    return StabilityChecker(libs, engine).check(pairs, detail)
+
+
+def stability_matrix(
+    paths,
+    pairs="all",
+    engine="native",
+    jobs=1,
+    detail=False,
+    trusted=None,
+    stream=False,
+):
+    """
+    Test the stability of libraries (paths to Smeagle json) for pairs of
+    them (see get_pairs). We return a row for each pair (in the order of
+    get_pairs) and a list of errors (models that are not valid).
+    """
+    # A file that is given more than once is only loaded (and checked) once
+    libs, errors = load_models(list(dict.fromkeys(paths)), trusted, stream)
+    if errors:
+        return [], errors
+
+    # Give each process a group of pairs
+    pairs = get_pairs(len(libs), pairs)
+    groups = split(pairs, get_jobs(jobs))
+    if len(groups) > 1:
+        tasks = [(libs, group, engine, detail) for group in groups]
+        with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+            results = list(pool.map(check_pairs, *zip(*tasks)))
+    else:
+        results = [check_pairs(libs, group, engine, detail) for group in groups]
+    return [row for rows in results for row in rows], []
+
+
+def get_matrix(rows, names, column):
+    """
+    Get a matrix (rows are library a, columns library b) of a column of the
+    rows, with None for pairs that we didn't check.
+    """
+    index = dict((name, i) for i, name in enumerate(names))
+    matrix = [[None] * len(names) for _ in names]
+    for row in rows:
+        matrix[index[row["library_a"]]][index[row["library_b"]]] = row[column]
+    return matrix
+
+
+def write_csv(rows, out):
+    """
+    Write a table of pairs (without the missing exports and imports) as csv
+    """
+    writer = csv.DictWriter(out, fieldnames=COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
@@ -10,26 +10,34 @@ This is adopted from https://github.com/buildsi/smeagle-demo (db)
 import sys
 import os
 import json
-import jsonschema
-import clingo
 import pprint
 
 from symbolator.facts import get_facts
-from symbolator.asp import AspFunction, AspFunctionBuilder, Result, PyclingoDriver
-from symbolator.utils import read_json
-
-from .schema import model_schema
-
-
-# Smeagle corpus schema
-
-clingo_cffi = hasattr(clingo.Symbol, "_rep")
+from symbolator.asp import AspFunction, AspFunctionBuilder, PyclingoDriver
+from symbolator.engines import StabilityEngine
+from symbolator.timer import measure, record
 
+from .stream import CHUNK_SIZE, iter_model, load_model_header
+from .validate import load_model_data
 
 fn = AspFunctionBuilder()
 
 
 class SmeagleClingoDriver(PyclingoDriver):
+    def configure(self):
+        """
+        Configure the control object for the solver
+        """
+        self.control.configuration.solve.models = self.nmodels
+        self.control.configuration.asp.trans_ext = "all"
+        self.control.configuration.asp.eq = "5"
+        self.control.configuration.configuration = "tweety"
+        self.control.configuration.solve.parallel_mode = "2"
+        self.control.configuration.solver.opt_strategy = "usc,one"
+
+    def get_core_symbol(self, symbol):
+        return symbol
+
     def solve(
         self,
         setup,
@@ -41,85 +49,19 @@ class SmeagleClingoDriver(PyclingoDriver):
         """
         Run the solver for a model and some number of logic programs
         """
-        # logic programs to give to the solver
-        logic_programs = logic_programs or []
-        if not isinstance(logic_programs, list):
-            logic_programs = [logic_programs]
-
-        # Initialize the control object for the solver
-        self.control = clingo.Control()
-        self.control.configuration.solve.models = nmodels
-        self.control.configuration.asp.trans_ext = "all"
-        self.control.configuration.asp.eq = "5"
-        self.control.configuration.configuration = "tweety"
-        self.control.configuration.solve.parallel_mode = "2"
-        self.control.configuration.solver.opt_strategy = "usc,one"
+        self.nmodels = nmodels
 
         # set up the problem -- this generates facts and rules
         self.assumptions = []
-        with self.control.backend() as backend:
-            self.backend = backend
+        self.reset_facts()
+        with measure("facts"):
             setup.setup(self)
+        record("facts", facts=len(self.facts), duplicates=self.duplicates)
 
         # If we only want to generate facts, cut out early
         if facts_only:
             return
-
-        # read in provided logic programs
-        for logic_program in logic_programs:
-            self.control.load(logic_program)
-
-        # Grounding is the first step in the solve -- it turns our facts
-        # and first-order logic rules into propositional logic.
-        self.control.ground([("base", [])])
-
-        # With a grounded program, we can run the solve.
-        result = Result()
-        models = []  # stable models if things go well
-        cores = []  # unsatisfiable cores if they do not
-
-        def on_model(model):
-            models.append((model.cost, model.symbols(shown=True, terms=True)))
-
-        # Won't work after this, need to write files
-        solve_kwargs = {
-            "assumptions": self.assumptions,
-            "on_model": on_model,
-            "on_core": cores.append,
-        }
-        if clingo_cffi:
-            solve_kwargs["on_unsat"] = cores.append
-        solve_result = self.control.solve(**solve_kwargs)
-
-        # once done, construct the solve result
-        result.satisfiable = solve_result.satisfiable
-
-        def stringify(x):
-            if clingo_cffi:
-                # Clingo w/ CFFI will throw an exception on failure
-                try:
-                    return x.string
-                except RuntimeError:
-                    return str(x)
-            else:
-                return x.string or str(x)
-
-        if result.satisfiable:
-            min_cost, best_model = min(models)
-            result.answers = {}
-            for sym in best_model:
-                if sym.name not in result.answers:
-                    result.answers[sym.name] = []
-                result.answers[sym.name].append([stringify(a) for a in sym.arguments])
-
-        elif cores:
-            symbols = dict((a.literal, a.symbol) for a in self.control.symbolic_atoms)
-            for core in cores:
-                core_symbols = []
-                for atom in core:
-                    sym = symbols[atom]
-                    core_symbols.append(sym)
-                result.cores.append(core_symbols)
+        result = self.solve_facts(logic_programs)
 
         if stats:
             print("Statistics:")
@@ -156,19 +98,25 @@ class StabilitySolver(SolverBase):
     Class to orchestrate a Stability Solver.
     """
 
-    def __init__(self, lib1, lib2):
+    def __init__(self, lib1, lib2, engine="asp"):
         """
         Create a driver to run a compatibility model test for two libraries.
+        The native engine gives the same missing_exports and missing_imports
+        without clingo.
         """
         # The driver will generate facts rules to generate an ASP program.
         self.driver = SmeagleClingoDriver()
         self.setup = StabilitySolverSetup(lib1, lib2)
+        self.engine = engine
 
     def solve(self, logic_programs, detail=False, return_result=False):
         """
         Run the solve
         """
-        result = self.driver.solve(self.setup, logic_programs=logic_programs)
+        if self.engine == "native":
+            result = StabilityEngine().solve(self.setup.lib1, self.setup.lib2)
+        else:
+            result = self.driver.solve(self.setup, logic_programs=logic_programs)
         if return_result:
             return result
         missing_imports = result.answers.get("missing_imports", [])
@@ -216,7 +164,7 @@ class GeneratorBase:
         self.gen.h2("Library: %s" % lib.name)
 
         # Generate a fact for each location
-        for loc in lib.data.get("locations", []):
+        for loc in lib.iter_locations():
 
             # Functions
             self.generate_function(lib, loc.get("function"), identifier)
@@ -250,7 +198,7 @@ class GeneratorBase:
             )  # param['type'] is compiler specific
 
             # If the param has fields, continue printing until we are done
-            fields = param.get("fields", [])
+            fields = list(param.get("fields", []))
 
             # If we have an underlying type, use name, type, from there
             if "underlying_type" in param:
@@ -260,7 +208,7 @@ class GeneratorBase:
                 param_type = param["underlying_type"].get("class") or param_type
 
                 # If the param has fields, continue printing until we are done
-                fields = param["underlying_type"].get("fields", []) or fields
+                fields = list(param["underlying_type"].get("fields", [])) or fields
 
             # We are skipping locations for now - not correct
             # Location and direction are always with the original parameter
@@ -341,18 +289,20 @@ class FactGeneratorSetup(GeneratorBase):
     Class to accept one library and generate facts.
     """
 
-    def __init__(self, lib):
+    def __init__(self, lib, identifier=None):
         self.lib = lib
+        self.identifier = identifier
 
     def setup(self, driver):
         """
         Setup to prepare for the solve.
 
-        This base function provides fact generation for one library.
+        This base function provides fact generation for one library (as a or
+        b of a stability test, with an identifier).
         """
         self.gen = driver
         self.gen.h1("Library Facts")
-        self.add_library(self.lib)
+        self.add_library(self.lib, self.identifier)
 
 
 class Model:
@@ -362,6 +312,12 @@ class Model:
             data = json.loads(data)
         self.data = data
 
+    def iter_locations(self):
+        """
+        Yield each location (function) of the model.
+        """
+        return iter(self.data.get("locations", []))
+
     def __str__(self):
         return self.name
 
@@ -369,13 +325,36 @@ class Model:
         return str(self)
 
 
+class StreamModel(Model):
+    """
+    A model that we read from its file (a location at a time) each time we
+    use its locations, instead of keeping them in memory. The data is only
+    the rest of the model (e.g., library).
+    """
+
+    def __init__(self, name, path, trusted=None, chunk_size=CHUNK_SIZE):
+        self.name = name
+        self.path = path
+        self.chunk_size = chunk_size
+        self.data = load_model_header(path, trusted, chunk_size)
+
+    def iter_locations(self):
+        for key, value in iter_model(self.path, self.chunk_size):
+            if isinstance(key, tuple):
+                yield value
+
+
 class SmeagleRunner:
-    def __init__(self):
+    def __init__(self, trusted=None, stream=False):
         """
         Load in Smeagle output files, write to database, and run solver.
+        Models in trusted (TrustedModels) passed validation before, and we
+        stream models from their files (see StreamModel) if asked.
         """
         self.stability_lp = get_facts("stability.lp")
         self.records = {}
+        self.trusted = trusted
+        self.stream = stream
 
     def generate_facts(self):
         """
@@ -387,9 +366,9 @@ class SmeagleRunner:
             facts.append(setup.solve())
         return facts
 
-    def stability_test(self, detail=False, out=None, return_result=False):
+    def stability_test(self, detail=False, out=None, return_result=False, engine="asp"):
         """
-        Run the stability test for two entries.
+        Run the stability test for two entries (with clingo, or natively).
         """
         # We must have the stability program!
         if not os.path.exists(self.stability_lp):
@@ -399,7 +378,7 @@ class SmeagleRunner:
         if len(self.records) != 2:
             sys.exit("Two libraries are required to be loaded for a stability test.")
 
-        setup = StabilitySolver(*list(self.records.values()))
+        setup = StabilitySolver(*list(self.records.values()), engine=engine)
         return setup.solve(
             logic_programs=self.stability_lp, detail=detail, return_result=return_result
         )
@@ -410,23 +389,21 @@ class SmeagleRunner:
         """
         if not os.path.exists(path):
             sys.exit("%s does not exist." % path)
-        self.load_data(path)
+        with measure("parse", files=1):
+            self.load_data(path)
 
     def load_data(self, path):
         """
-        Load a json result into the sqlite database
+        Load a json result into the sqlite database. We can only include
+        valid models (see ModelValidationError), unless they are trusted.
         """
-        data = read_json(path)
         name = os.path.basename(path)
-
-        # We can only include valid models
-        try:
-            jsonschema.validate(data, schema=model_schema)
-            self.add(name, data)
-        except:
-            import IPython
-
-            IPython.embed()
+        if self.stream:
+            if name not in self.records:
+                self.records[name] = StreamModel(name, path, self.trusted)
+            return
+        data = load_model_data(path, self.trusted)
+        self.add(name, data)
 
     def add(self, name, data):
         """
@@ -18,8 +18,8 @@ fields = {
             "type": {"type": "string"},
             "size": {"type": ["string", "number"]},
             # TODO should we add validation of when fields is allowed?
-            # This indicates that fields can be recursive
-            "fields": {"$ref": "#"},
+            # This indicates that fields can be recursive (see definitions)
+            "fields": {"$ref": "#/definitions/fields"},
         },
     },
 }
@@ -38,51 +38,60 @@ underlying_type = {
 }
 
 
-# Schema for smeagle model
-model_schema = {
-    "$schema": "http://json-schema.org/schema#",
-    "title": "build-abi-containers package schema",
+# Schema for a location (function) of a model
+location = {
     "type": "object",
-    "additionalProperties": False,
-    "required": ["library", "locations"],
+    "required": ["function"],
     "properties": {
-        "library": {"type": "string"},
-        "locations": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "required": ["function"],
-                "properties": {
-                    "function": {
+        "function": {
+            "type": "object",
+            "required": ["name"],
+            "properties": {
+                "name": {"type": "string"},
+                "parameters": {
+                    "type": "array",
+                    "items": {
                         "type": "object",
-                        "required": ["name"],
+                        "additionalProperties": False,
                         "properties": {
                             "name": {"type": "string"},
-                            "parameters": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "additionalProperties": False,
-                                    "properties": {
-                                        "name": {"type": "string"},
-                                        "indirections": {"type": ["string", "null"]},
-                                        "class": {"type": "string"},
-                                        "type": {"type": "string"},
-                                        "size": {"type": ["string", "number"]},
-                                        "location": {"type": "string"},
-                                        "fields": fields,
-                                        "underlying_type": underlying_type,
-                                        "direction": {
-                                            "type": ["string", "number"],
-                                            "enum": ["import", "export", "unknown"],
-                                        },
-                                    },
-                                },
+                            "indirections": {"type": ["string", "null"]},
+                            "class": {"type": "string"},
+                            "type": {"type": "string"},
+                            "size": {"type": ["string", "number"]},
+                            "location": {"type": "string"},
+                            "fields": fields,
+                            "underlying_type": underlying_type,
+                            "direction": {
+                                "type": ["string", "number"],
+                                "enum": ["import", "export", "unknown"],
                             },
                         },
-                    }
+                    },
                 },
             },
-        },
+        }
+    },
+}
+
+# Schema for smeagle model
+model_schema = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "title": "build-abi-containers package schema",
+    "definitions": {"fields": fields},
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["library", "locations"],
+    "properties": {
+        "library": {"type": "string"},
+        "locations": {"type": "array", "items": location},
     },
 }
+
+# Schema for one location, to validate a model as we stream it
+location_schema = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "title": "build-abi-containers location schema",
+    "definitions": {"fields": fields},
+}
+location_schema.update(location)
@@ -0,0 +1,183 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Read a Smeagle model (json) one location at a time, so we never hold more
+than the largest location (function) of a (very large) model in memory. The
+top level object is read a token at a time, and each value (and each item of
+locations) is decoded with the json module as soon as the buffer has all of
+it. Locations are validated against the location schema as we read them.
+"""
+
+import hashlib
+import json
+
+from .validate import ModelValidationError, get_model_errors
+
+# Characters to read at a time (the buffer grows for a larger value)
+CHUNK_SIZE = 1 << 16
+
+WHITESPACE = " \t\n\r"
+
+
+class JsonReader:
+    """
+    Decode json values from a file (a text stream) as we read it.
+    """
+
+    def __init__(self, fd, chunk_size=CHUNK_SIZE):
+        self.fd = fd
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+
+        # Characters we dropped from the buffer (for the offset of errors)
+        self.offset = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """
+        Read more of the file (dropping what we decoded), returning False at
+        the end of the file.
+        """
+        if self.eof:
+            return False
+        chunk = self.fd.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def error(self, message):
+        return ValueError("%s: char %s" % (message, self.offset + self.pos))
+
+    def peek(self):
+        """
+        Get the next character that isn't whitespace ("" at the end).
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def expect(self, chars):
+        """
+        Read one of some characters (e.g., a delimiter), and return it.
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise self.error("Expecting %s" % " or ".join(repr(c) for c in chars))
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """
+        Decode the next value. If the buffer doesn't have all of it (or a
+        number could go on) we read as much again as we have, so a large
+        value is decoded a bounded number of times.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise self.error(e.msg)
+            self.fill(max(self.chunk_size, len(self.buffer) - self.pos))
+
+
+def iter_model(path, chunk_size=CHUNK_SIZE):
+    """
+    Yield (key, value) for each key of a model (json object). If locations
+    is a list, we yield ("locations", []) and then (("locations", index),
+    value) for each location instead.
+    """
+    with open(path, "r", encoding="utf-8") as fd:
+        reader = JsonReader(fd, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.expect("}")
+        else:
+            while True:
+                key = reader.decode()
+                if not isinstance(key, str):
+                    raise reader.error("Expecting property name")
+                reader.expect(":")
+                if key == "locations" and reader.peek() == "[":
+                    reader.expect("[")
+                    yield key, []
+                    index = 0
+                    if reader.peek() == "]":
+                        reader.expect("]")
+                    else:
+                        while True:
+                            yield ("locations", index), reader.decode()
+                            index += 1
+                            if reader.expect(",]") == "]":
+                                break
+                else:
+                    yield key, reader.decode()
+                if reader.expect(",}") == "}":
+                    break
+        if reader.peek():
+            raise reader.error("Extra data")
+
+
+def get_file_digest(path, chunk_size=CHUNK_SIZE):
+    """
+    Get the sha256 of a file (as load_model_data does), a chunk at a time.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for chunk in iter(lambda: fd.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_model_header(path, trusted=None, chunk_size=CHUNK_SIZE):
+    """
+    Read the keys of a model other than locations (e.g., library) and, unless
+    it's trusted, validate it a location at a time. A model that isn't json
+    or isn't valid raises a ModelValidationError (with every error).
+    """
+    digest = None
+    validate = True
+    if trusted is not None:
+        digest = get_file_digest(path, chunk_size)
+        validate = digest not in trusted
+
+    header = {}
+    errors = []
+    try:
+        for key, value in iter_model(path, chunk_size):
+            if not isinstance(key, tuple):
+                header[key] = value
+            elif validate:
+                for error in get_model_errors(value, "location"):
+                    error["path"] = list(key) + error["path"]
+                    errors.append(error)
+
+            # A trusted model only needs its header (usually first)
+            elif "library" in header:
+                break
+    except ValueError as e:
+        raise ModelValidationError(path, [{"path": [], "message": str(e)}])
+
+    if validate:
+        # The header (with empty locations) is checked with the model schema
+        errors = get_model_errors(header) + errors
+        if errors:
+            raise ModelValidationError(path, errors)
+        if trusted is not None:
+            trusted.add(digest)
+    header.pop("locations", None)
+    return header
@@ -0,0 +1,179 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Validate Smeagle models (json) against the model schema. The validator is
+built once for each process: compiled with fastjsonschema if it's installed
+(much faster for large models), and otherwise with jsonschema, which also
+gives every error of a model that isn't valid. Models that passed can be
+trusted (by a hash of their content) so we don't validate them again.
+"""
+
+import functools
+import hashlib
+import json
+import os
+
+import jsonschema
+
+from .schema import location_schema, model_schema
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+# Schemas we validate with, by name
+SCHEMAS = {"model": model_schema, "location": location_schema}
+
+
+class ModelValidationError(Exception):
+    """
+    A Smeagle model is not valid. Errors are a dict for each problem, with
+    the path (keys and indices) in the model and a message.
+    """
+
+    def __init__(self, path, errors):
+        self.path = path
+        self.errors = errors
+        super().__init__(path, errors)
+
+    def __str__(self):
+        message = "; ".join(
+            (
+                "%s: %s" % ("/".join(str(x) for x in error["path"]), error["message"])
+                if error["path"]
+                else error["message"]
+            )
+            for error in self.errors
+        )
+        if self.path is None:
+            return message
+        return "%s: %s" % (self.path, message)
+
+
+@functools.lru_cache(maxsize=None)
+def get_validator(name="model"):
+    """
+    Get the jsonschema validator for a schema (checked once).
+    """
+    schema = SCHEMAS[name]
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+@functools.lru_cache(maxsize=None)
+def get_compiled_validator(name="model"):
+    """
+    Get a schema compiled with fastjsonschema (or None).
+    """
+    if fastjsonschema is None:
+        return None
+    return fastjsonschema.compile(SCHEMAS[name])
+
+
+def get_errors(data, name="model"):
+    """
+    Get every error (path and message) of a model, in the order of paths.
+    """
+    errors = sorted(
+        get_validator(name).iter_errors(data),
+        key=lambda e: [
+            (0, x) if isinstance(x, int) else (1, x) for x in e.absolute_path
+        ],
+    )
+    return [{"path": list(e.absolute_path), "message": e.message} for e in errors]
+
+
+def get_model_errors(data, name="model"):
+    """
+    Get the errors of a model (or a location), with the compiled schema
+    first, so we only ask jsonschema for errors when there are some. If
+    jsonschema finds none (the two can disagree), we give the error of the
+    compiled schema.
+    """
+    compiled = get_compiled_validator(name)
+    if compiled is None:
+        return get_errors(data, name)
+    try:
+        compiled(data)
+        return []
+    except fastjsonschema.JsonSchemaException as e:
+        errors = get_errors(data, name)
+        if errors:
+            return errors
+
+        # The path of the error starts with "data", and indices are strings
+        path = [int(x) if x.isdigit() else x for x in (e.path or [])[1:]]
+        return [{"path": path, "message": e.message}]
+
+
+def validate_model(data, path=None):
+    """
+    Validate a model (data), raising a ModelValidationError if it isn't.
+    """
+    errors = get_model_errors(data)
+    if errors:
+        raise ModelValidationError(path, errors)
+
+
+@functools.lru_cache(maxsize=None)
+def get_schema_digest():
+    """
+    A hash of the model schema, so trust ends when the schema changes.
+    """
+    content = json.dumps(model_schema, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+class TrustedModels:
+    """
+    Hashes of the content of models that passed validation (with this
+    schema), kept in memory and (optionally) as files in a directory, so
+    other processes can trust them too.
+    """
+
+    def __init__(self, root=None):
+        self.digests = set()
+        self.root = None
+        if root:
+            self.root = os.path.join(os.path.abspath(root), get_schema_digest())
+            os.makedirs(self.root, exist_ok=True)
+
+    def __contains__(self, digest):
+        if digest in self.digests:
+            return True
+        if self.root and os.path.exists(os.path.join(self.root, digest)):
+            self.digests.add(digest)
+            return True
+        return False
+
+    def add(self, digest):
+        self.digests.add(digest)
+        if self.root:
+            try:
+                open(os.path.join(self.root, digest), "a").close()
+            except OSError:
+                pass
+
+
+def load_model_data(path, trusted=None):
+    """
+    Read a model (json) and validate it, unless its content is trusted. A
+    model that isn't json or isn't valid raises a ModelValidationError.
+    """
+    with open(path, "rb") as fd:
+        content = fd.read()
+    digest = hashlib.sha256(content).hexdigest()
+    try:
+        data = json.loads(content)
+    except ValueError as e:
+        raise ModelValidationError(path, [{"path": [], "message": str(e)}])
+
+    if trusted is None or digest not in trusted:
+        validate_model(data, path)
+        if trusted is not None:
+            trusted.add(digest)
+    return data
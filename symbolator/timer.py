@@ -0,0 +1,268 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Time the phases of a command (or a solve). For each phase we record wall
+and CPU time, the peak memory (RSS) of the process at the end of it, and
+counts of what it did (e.g., files, symbols, facts or ground atoms).
+
+A phase is measured as a span (measure), or as the time since the last
+phase ended (phase). Spans can be nested, and the time of a nested span
+isn't counted for the span around it, so the phases add up to the total.
+Commands measure phases with the configured timer (see configure), and
+measure and record do nothing if there is none.
+
+A timer can also profile each phase (with cProfile), and write the stats
+(.pstats) and collapsed stacks (.folded, for flamegraph.pl or speedscope)
+for each phase to a directory.
+"""
+
+import collections
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# The configured timer (see configure and get_timer)
+_timer = None
+
+
+def get_max_rss():
+    """
+    Get the peak resident set size of this process in bytes, if we can.
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class Timer(object):
+    """Time phases of a command or a solve"""
+
+    def __init__(self, name="other", profile=False):
+        """
+        Arguments:
+            name (str): the phase for time that is not in another phase
+            profile (bool): profile each phase
+        """
+        self.start = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.last = (self.start, self.start_cpu)
+        self.spans = [name]
+        self.phases = {}
+        self.details = {}
+        self.statistics = None
+        self.profiles = {} if profile else None
+        self.profiling = None
+        self.switch(name)
+
+    def switch(self, name):
+        """
+        Profile a phase (if we profile), instead of the current one.
+        """
+        if self.profiles is None:
+            return
+        if self.profiling is not None:
+            self.profiling.disable()
+        self.profiling = self.profiles.get(name)
+        if self.profiling is None:
+            self.profiling = self.profiles[name] = cProfile.Profile()
+        self.profiling.enable()
+
+    def mark(self, name):
+        """
+        Count the time since the last mark for a phase.
+        """
+        now = (time.perf_counter(), time.process_time())
+        wall, cpu = [x - y for x, y in zip(now, self.last)]
+        self.last = now
+        self.phases[name] = self.phases.get(name, 0) + wall
+        detail = self.details.setdefault(name, {"wall": 0, "cpu": 0})
+        detail["wall"] += wall
+        detail["cpu"] += cpu
+        detail["max_rss"] = get_max_rss()
+        return detail
+
+    def phase(self, name, **counts):
+        """
+        End a phase: the time since the last phase ended is for this phase.
+        """
+        self.record(name, **counts)
+        self.mark(name)
+
+    @contextlib.contextmanager
+    def measure(self, name, **counts):
+        """
+        Measure a phase as a span of code (which can be in another span).
+        """
+        self.record(name, **counts)
+        self.mark(self.spans[-1])
+        self.spans.append(name)
+        self.switch(name)
+        try:
+            yield self
+        finally:
+            self.spans.pop()
+            self.mark(name)
+            self.switch(self.spans[-1])
+
+    def record(self, name, **counts):
+        """
+        Add counts (e.g., files=2) to a phase.
+        """
+        detail = self.details.setdefault(name, {"wall": 0, "cpu": 0})
+        for key, count in counts.items():
+            detail[key] = detail.get(key, 0) + count
+
+    def to_dict(self):
+        """
+        Get the phases, the total and the clingo statistics (of the last solve)
+        """
+        self.mark(self.spans[-1])
+        return {
+            "phases": self.details,
+            "total": {
+                "wall": self.last[0] - self.start,
+                "cpu": self.last[1] - self.start_cpu,
+                "max_rss": get_max_rss(),
+            },
+            "statistics": self.statistics,
+        }
+
+    def write(self, out=sys.stdout):
+        now = time.perf_counter()
+        out.write("Time:\n")
+        for phase, t in self.phases.items():
+            out.write("    %-15s%.4f\n" % (phase + ":", t))
+        out.write("Total: %.4f\n" % (now - self.start))
+
+    def write_json(self, out=sys.stdout):
+        out.write(json.dumps(self.to_dict(), indent=4) + "\n")
+
+    def write_profiles(self, directory, top=10, out=sys.stderr):
+        """
+        Stop profiling, and write <phase>.pstats and <phase>.folded (collapsed
+        stacks, in microseconds) for each phase to a directory, and the
+        functions with the most time (of their own) in each phase to out.
+        """
+        if self.profiling is not None:
+            self.profiling.disable()
+            self.profiling = None
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        for name, profile in self.profiles.items():
+            stats = pstats.Stats(profile)
+            if not stats.stats:
+                continue
+            stats.dump_stats(os.path.join(directory, name + ".pstats"))
+            with open(os.path.join(directory, name + ".folded"), "w") as fd:
+                for stack, seconds in collapse_stacks(stats.stats).items():
+                    fd.write("%s %d\n" % (stack, round(seconds * 1e6)))
+
+            out.write("%s: %.4fs\n" % (name, self.details[name]["wall"]))
+            rows = sorted(stats.stats.items(), key=lambda x: x[1][2], reverse=True)
+            for func, (_, ncalls, tottime, cumtime, _) in rows[:top]:
+                out.write(
+                    "    %9.4f %9.4f %9d  %s\n"
+                    % (tottime, cumtime, ncalls, get_label(func))
+                )
+        out.write("Profiles (tottime, cumtime, ncalls) written to %s\n" % directory)
+
+
+def get_label(func):
+    """
+    A label for a function of profile stats (filename, line, name).
+    """
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return "%s:%d(%s)" % (os.path.basename(filename), line, name)
+
+
+def collapse_stacks(stats, threshold=1e-6):
+    """
+    Collapse the stats of a profile into stacks (a;b;c -> seconds in c).
+    cProfile only keeps callers (not stacks), so we walk down from the time
+    of each function that no caller accounts for (all of it, for functions
+    with no callers), and split the time of a function between the callees
+    by the time of each call edge. A stack doesn't repeat a function.
+    """
+    callees = collections.defaultdict(list)
+    todo = []
+    for func, (_, _, _, cumtime, callers) in stats.items():
+        for caller, edge in callers.items():
+            if caller in stats and caller != func:
+                callees[caller].append((func, edge[3]))
+                cumtime -= edge[3]
+        if cumtime >= threshold:
+            todo.append(((func,), cumtime))
+
+    stacks = collections.defaultdict(float)
+    while todo:
+        path, seconds = todo.pop()
+        func = path[-1]
+        cumtime = stats[func][3]
+        scale = seconds / cumtime if cumtime else 0
+        stacks[";".join(get_label(x) for x in path)] += stats[func][2] * scale
+        for callee, edge in callees[func]:
+            if callee not in path and edge * scale >= threshold:
+                todo.append((path + (callee,), edge * scale))
+    return dict((stack, seconds) for stack, seconds in stacks.items() if seconds)
+
+
+def configure(enabled=True, name="other", profile=False):
+    """
+    Set (or unset) the timer that commands measure (and profile) phases with.
+    """
+    global _timer
+    if _timer is not None and _timer.profiling is not None:
+        _timer.profiling.disable()
+    _timer = Timer(name, profile) if enabled else None
+    return _timer
+
+
+def get_timer():
+    """
+    Get the configured timer, if there is one.
+    """
+    return _timer
+
+
+@contextlib.contextmanager
+def measure(name, **counts):
+    """
+    Measure a phase with the configured timer (if there is one).
+    """
+    if _timer is None:
+        yield None
+    else:
+        with _timer.measure(name, **counts) as timer:
+            yield timer
+
+
+def record(name, **counts):
+    """
+    Add counts to a phase of the configured timer (if there is one).
+    """
+    if _timer is not None:
+        _timer.record(name, **counts)
+
+
+def record_statistics(control):
+    """
+    Keep the statistics of a clingo control object (after a solve) for
+    the configured timer.
+    """
+    if _timer is not None:
+        _timer.statistics = control.statistics
@@ -3,7 +3,7 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
-__version__ = "0.0.18"
+__version__ = "0.0.19"
 AUTHOR = "Vanessa Sochat"
 AUTHOR_EMAIL = "vsoch@users.noreply.github.com"
 NAME = "symbolator-python"
@@ -27,4 +27,10 @@ TESTS_REQUIRES = (("pytest", {"min_version": "4.6.2"}),)
 ################################################################################
 # Submodule Requirements (versions that include database)
 
-INSTALL_REQUIRES_ALL = INSTALL_REQUIRES + TESTS_REQUIRES
+# NumPy is optional, and used to decode symbol tables faster. fastjsonschema
+# is optional, and used to validate Smeagle models faster
+INSTALL_REQUIRES_ALL = (
+    INSTALL_REQUIRES
+    + (("numpy", {"min_version": None}), ("fastjsonschema", {"min_version": None}))
+    + TESTS_REQUIRES
+)
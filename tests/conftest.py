@@ -0,0 +1,27 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import os
+import subprocess
+
+import pytest
+
+here = os.path.dirname(os.path.abspath(__file__))
+examples = os.path.join(os.path.dirname(here), "examples")
+
+
+@pytest.fixture(scope="session")
+def cpp_examples():
+    """
+    Compile the cpp examples (if needed) and return the directory.
+    """
+    root = os.path.join(examples, "cpp")
+    artifacts = ["libmath-v1.so", "libmath-v2.so", "math-client"]
+    if not all(os.path.exists(os.path.join(root, name)) for name in artifacts):
+        try:
+            subprocess.check_call(["make"], cwd=root)
+        except (OSError, subprocess.CalledProcessError):
+            pytest.skip("Cannot compile the cpp examples.")
+    return root
@@ -0,0 +1,269 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import io
+import json
+import os
+import pickle
+
+import pytest
+
+from symbolator.asp import (
+    FACT_LOADERS,
+    ABICompareSolverSetup,
+    ABICompatSolverSetup,
+    ABIGlobalSolverSetup,
+    PyclingoDriver,
+    fn,
+)
+from symbolator.corpus.loader import load_corpora
+from symbolator.facts import get_facts
+
+
+class FactSetup:
+    """
+    A setup that only adds some facts
+    """
+
+    def compat_setup(self, driver, corpora, **kwargs):
+        driver.h1("Facts")
+        for i in range(3):
+            driver.fact(fn.item(i, "name %s" % i))
+        driver.fact(fn.unused(0))
+
+
+def solve(tmp_path, program, **kwargs):
+    lp = tmp_path / "program.lp"
+    lp.write_text(program)
+    driver = PyclingoDriver(**kwargs)
+    return driver, driver.solve(FactSetup(), [], logic_programs=[str(lp)])
+
+
+@pytest.mark.parametrize("loader", FACT_LOADERS)
+@pytest.mark.parametrize("cores", [True, False])
+def test_fact_loaders(tmp_path, loader, cores):
+    """
+    Each loader gives the same answers (and cores for an unsat program).
+    """
+    program = "big(N) :- item(N, _), N > 0.\n#show big/1.\n"
+    _, result = solve(tmp_path, program, loader=loader, cores=cores)
+    assert result.answers == {"big": [["1"], ["2"]]}
+
+    _, result = solve(tmp_path, ":- item(1, _).\n", loader=loader, cores=cores)
+    assert not result.satisfiable
+    if cores:
+        assert 'item(1,"name 1")' in [str(x) for x in result.cores[0]]
+
+
+@pytest.mark.parametrize("loader", FACT_LOADERS)
+def test_lazy_cores(tmp_path, loader):
+    """
+    Facts are only assumptions when we solve again for cores, and then only
+    facts the program uses.
+    """
+    program = "other(1).\n:- item(1, _).\n"
+    driver, result = solve(tmp_path, "big(N) :- item(N, _).\n", loader=loader)
+    assert result.satisfiable and not driver.assumptions
+
+    driver, result = solve(tmp_path, program, loader=loader)
+    assert not result.satisfiable
+    assert len(driver.assumptions) == 3
+    assert 'item(1,"name 1")' in [str(x) for x in result.cores[0]]
+
+    driver, result = solve(tmp_path, program, loader=loader, lazy_cores=False)
+    assert len(driver.assumptions) == 4
+    assert 'item(1,"name 1")' in [str(x) for x in result.cores[0]]
+
+
+@pytest.mark.parametrize(
+    "program,stratified",
+    [
+        ("big(N) :- item(N, _), not small(N).\nsmall(0).\n#show big/1.\n", True),
+        ("n(C) :- C = #count{N : item(N, _)}.\n", True),
+        ("a :- not b.\nb :- not a.\n#show a/0.\n#show b/0.\n", False),
+        ("{pick(N)} :- item(N, _).\n:- not pick(2).\n#show pick/1.\n", False),
+    ],
+)
+def test_ground_only(tmp_path, program, stratified):
+    """
+    Reading answers after grounding gives the same answers as a solve.
+    """
+    from symbolator.asp import get_program_info
+
+    _, expected = solve(tmp_path, program, ground_only=False)
+    _, result = solve(tmp_path, program)
+    assert result.satisfiable and result.answers == expected.answers
+    assert get_program_info([str(tmp_path / "program.lp")]).stratified == stratified
+
+
+def test_ground_only_unsat(tmp_path):
+    """
+    A conflict found by grounding still gives cores from a solve.
+    """
+    _, result = solve(tmp_path, "bad :- item(1, _).\n:- bad.\n")
+    assert not result.satisfiable
+    assert 'item(1,"name 1")' in [str(x) for x in result.cores[0]]
+
+
+@pytest.mark.parametrize(
+    "setup,names,logic_program",
+    [
+        (
+            ABICompatSolverSetup,
+            ["math-client", "libmath-v1.so", "libmath-v2.so"],
+            "is_compatible.lp",
+        ),
+        (ABIGlobalSolverSetup, ["math-client", "libmath-v2.so"], "missing_symbols.lp"),
+        (ABICompareSolverSetup, ["libmath-v1.so", "libmath-v2.so"], "compare_libs.lp"),
+    ],
+)
+def test_ground_only_programs(cpp_examples, monkeypatch, setup, names, logic_program):
+    """
+    The bundled programs are stratified, and answers are the same (in the
+    same order) without a solve.
+    """
+    monkeypatch.chdir(cpp_examples)
+    corpora, _ = load_corpora([os.path.join(cpp_examples, x) for x in names])
+
+    results = []
+    for ground_only in ["auto", False]:
+        driver = PyclingoDriver(ground_only=ground_only)
+        results.append(
+            driver.solve(setup(), corpora, logic_programs=get_facts(logic_program))
+        )
+        if ground_only:
+            assert driver.get_grounded_result([get_facts(logic_program)])
+    assert results[0].answers == results[1].answers
+
+
+def test_ground_only_stability():
+    """
+    The smeagle stability model gives the same answers without a solve.
+    """
+    from symbolator.smeagle.model import (
+        SmeagleClingoDriver,
+        SmeagleRunner,
+        StabilitySolverSetup,
+    )
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    runner = SmeagleRunner()
+    for name in ["libmath-v1.so.json", "libmath-v2.so.json"]:
+        runner.load(os.path.join(here, "..", "examples", "smeagle", name))
+
+    results = []
+    for ground_only in ["auto", False]:
+        driver = SmeagleClingoDriver(ground_only=ground_only)
+        setup = StabilitySolverSetup(*runner.records.values())
+        results.append(driver.solve(setup, logic_programs=runner.stability_lp))
+    assert results[0].answers and results[0].answers == results[1].answers
+
+
+def test_fact_output(tmp_path):
+    """
+    Facts are only rendered as text when we ask for it.
+    """
+    out = io.StringIO()
+    driver, _ = solve(tmp_path, "", out=out)
+    assert 'item(0,"name 0").' in out.getvalue()
+    assert "% Facts" in out.getvalue()
+
+    driver, _ = solve(tmp_path, "")
+    assert driver.out is None
+
+    with pytest.raises(ValueError):
+        PyclingoDriver(loader="unknown")
+
+
+def test_argify_cache():
+    """
+    Arguments are converted to clingo symbols once (bools are not numbers).
+    """
+    from symbolator.asp import argify
+
+    assert argify("libc.so.6") is argify("libc.so.6")
+    assert str(argify(True)) == '"True"'
+    assert str(argify(1)) == "1"
+    assert str(fn.has_symbol("libc.so.6", 1).symbol()) == 'has_symbol("libc.so.6",1)'
+
+
+def test_asp_function():
+    """
+    Functions are immutable and hashable, and convert to a symbol once.
+    """
+    fact = fn.has_symbol("libc.so.6", "puts")
+    assert fact == fn.has_symbol("libc.so.6", "puts")
+    assert fact != fn.has_symbol("libc.so.6", "printf")
+    assert fact != fn.symbol("libc.so.6", "puts")
+    assert len({fact, fn.has_symbol("libc.so.6", "puts")}) == 1
+    assert fact.symbol() is fact.symbol()
+    assert not fact.symbol(positive=False).positive
+    with pytest.raises(AttributeError):
+        fact.args = ()
+    assert not hasattr(fact, "__dict__")
+    assert pickle.loads(pickle.dumps(fact)) == fact
+
+
+def test_duplicate_facts():
+    """
+    The driver only keeps (and writes) the first of duplicate facts.
+    """
+    out = io.StringIO()
+    driver = PyclingoDriver(out=out)
+    driver.fact(fn.item(1))
+    driver.fact(fn.item(1))
+    driver.fact(fn.item(1).symbol())
+    driver.fact(fn.item(2))
+    assert [str(x) for x in driver.facts] == ["item(1)", "item(2)"]
+    assert driver.duplicates == 2
+    assert out.getvalue() == "item(1).\nitem(2).\n"
+
+    driver.reset_facts()
+    assert not driver.facts and not driver.duplicates
+
+
+def test_symbol_facts(cpp_examples):
+    """
+    Each corpus has one has_symbol fact for a symbol, even with a prefix.
+    """
+    corpora, errors = load_corpora(
+        [os.path.join(cpp_examples, x) for x in ["libmath-v1.so", "libmath-v2.so"]]
+    )
+    driver = PyclingoDriver()
+    setup = ABICompatSolverSetup()
+    setup.gen = driver
+    setup.generate_elf_symbols(corpora[:1])
+    setup.generate_elf_symbols(corpora[:1], prefix="needed")
+    setup.generate_elf_symbols(corpora[1:])
+
+    def pairs(name):
+        return [tuple(x.arguments[:2]) for x in driver.facts if x.name == name]
+
+    assert driver.duplicates > 0
+    assert pairs("has_needed_symbol") == pairs("needed_symbol_type")
+    assert sorted(pairs("has_symbol")) == sorted(pairs("symbol_type"))
+    assert len(set(pairs("has_symbol"))) == len(pairs("has_symbol"))
+
+
+@pytest.mark.parametrize("globals_only", [False, True])
+def test_get_json(cpp_examples, globals_only):
+    """
+    Json symbols (e.g., for generate --json) are plain dicts we can dump.
+    """
+    path = os.path.join(cpp_examples, "libmath-v1.so")
+    corpora, errors = load_corpora([path], cache=False)
+    assert not errors
+    result = ABICompatSolverSetup().get_json(corpora[0], globals_only=globals_only)
+    data = json.loads(json.dumps(result))
+    symbols = data[0]["corpus"]["symbols"]
+    expected = corpora[0].symbols.to_dict()
+    if globals_only:
+        expected = dict(
+            (name, meta)
+            for name, meta in expected.items()
+            if meta["binding"] == "GLOBAL"
+        )
+    assert symbols == expected and symbols
+    assert any(meta["binding"] != "GLOBAL" for meta in symbols.values()) != globals_only
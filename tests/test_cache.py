@@ -0,0 +1,115 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import io
+import os
+import shutil
+
+from symbolator.corpus import cache as cache_module
+from symbolator.corpus.cache import CACHE_VERSION, CorpusCache
+
+
+def get_entry(size=1000):
+    return {"version": CACHE_VERSION, "data": "x" * size}
+
+
+def add(cache, path, content, when=None):
+    """
+    Write a file, and store an entry for it (with an access time).
+    """
+    path.write_text(content)
+    identity, entry = cache.get(str(path))
+    assert entry is None
+    cache.set(identity, get_entry())
+    if when is not None:
+        os.utime(cache.entry_path(identity.key), (when, when))
+    return identity
+
+
+def test_stat_identity(tmp_path):
+    """
+    A file without a build-id is found by a stat alias, and by the hash of
+    its content when it is copied (with a new alias for the copy).
+    """
+    cache = CorpusCache(str(tmp_path / "cache"))
+    lib = tmp_path / "libnotelf.so"
+    identity = add(cache, lib, "not an elf file")
+    assert identity.alias.startswith("stat-")
+    assert identity.key.startswith("sha256-")
+
+    found, entry = cache.get(str(lib))
+    assert entry is not None and found.key == identity.key
+
+    copy = tmp_path / "libcopy.so"
+    shutil.copy(str(lib), str(copy))
+    found, entry = cache.get(str(copy))
+    assert entry is not None and found.key == identity.key
+    assert found.alias != identity.alias
+    assert os.path.exists(cache.alias_path(found.alias))
+
+    lib.write_text("changed")
+    _, entry = cache.get(str(lib))
+    assert entry is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_evict_least_recently_used(tmp_path):
+    """
+    Eviction removes the least recently used entries (and their aliases)
+    until the cache is under the cap.
+    """
+    cache = CorpusCache(str(tmp_path / "cache"), max_size=3500)
+    identities = [
+        add(cache, tmp_path / ("lib%s.so" % i), str(i), when=1000 + i) for i in range(3)
+    ]
+
+    # Using the oldest entry makes the second the least recently used
+    _, entry = cache.get(str(tmp_path / "lib0.so"))
+    assert entry is not None
+    add(cache, tmp_path / "lib3.so", "3")
+
+    kept = [os.path.exists(cache.entry_path(x.key)) for x in identities]
+    assert kept == [True, False, True]
+    assert not os.path.exists(cache.alias_path(identities[1].alias))
+    assert os.path.exists(cache.alias_path(identities[0].alias))
+    assert cache.size() <= 3500 and cache.total == cache.size()
+
+
+def test_evict_only_past_cap(tmp_path, monkeypatch):
+    """
+    We scan the cache once, and only evict when we may be past the cap.
+    """
+    cache = CorpusCache(str(tmp_path / "cache"), max_size=10000)
+    scans = []
+    list_entries = cache._list_entries
+    monkeypatch.setattr(
+        cache, "_list_entries", lambda: scans.append(1) or list_entries()
+    )
+    for i in range(5):
+        add(cache, tmp_path / ("lib%s.so" % i), str(i))
+    assert len(scans) == 1
+    assert cache.total == cache.size()
+
+    for i in range(5, 12):
+        add(cache, tmp_path / ("lib%s.so" % i), str(i))
+    assert len(scans) > 2 and cache.size() <= 10000
+
+
+def test_write_warning(tmp_path, monkeypatch):
+    """
+    A cache we cannot write to warns once.
+    """
+
+    def mkstemp(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    cache = CorpusCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(cache_module.tempfile, "mkstemp", mkstemp)
+    err = io.StringIO()
+    monkeypatch.setattr("sys.stderr", err)
+    for i in range(2):
+        add(cache, tmp_path / ("lib%s.so" % i), str(i))
+    assert err.getvalue().count("Warning: cannot write to corpus cache") == 1
+    assert cache.total == 0
@@ -14,7 +14,7 @@ output=$(mktemp ${tmpdir:-/tmp}/symbolator_test.XXXXXX)
 echo "Testing help commands..."
 
 # Test help for all commands
-for command in version splice stability-test compare compat generate;
+for command in version splice stability-test stability-matrix compare compat compat-matrix generate;
     do
     runTest 0 $output symbolator $command --help 
 done
@@ -32,28 +32,48 @@ echo "#### Testing symbolator generate"
 runTest 0 $output symbolator generate ../examples/cpp/libmath-v1.so
 runTest 0 $output symbolator generate ../examples/cpp/libmath-v1.so --json
 runTest 0 $output symbolator generate --system-libs ../examples/cpp/math-client
+runTest 0 $output symbolator generate --cache-dir ${tmpdir}/cache --system-libs ../examples/cpp/math-client
+runTest 0 $output symbolator generate --cache-dir ${tmpdir}/cache --system-libs ../examples/cpp/math-client
 
 echo "#### Testing symbolator compare"
 runTest 0 $output symbolator compare ../examples/cpp/libmath-v1.so ../examples/cpp/libmath-v2.so
 runTest 0 $output symbolator compare --json ../examples/cpp/libmath-v1.so ../examples/cpp/libmath-v2.so
+runTest 0 $output symbolator compare --json --engine asp ../examples/cpp/libmath-v1.so ../examples/cpp/libmath-v2.so
 
 echo "#### Testing symbolator compat"
 runTest 0 $output symbolator compat ../examples/cpp/math-client ../examples/cpp/libmath-v1.so ../examples/cpp/libmath-v2.so
 runTest 0 $output symbolator compat --json ../examples/cpp/math-client ../examples/cpp/libmath-v1.so ../examples/cpp/libmath-v2.so
 runTest 0 $output symbolator compat --dump ../examples/cpp/math-client ../examples/cpp/libmath-v1.so ../examples/cpp/libmath-v2.so
+runTest 0 $output symbolator compat --timings ${tmpdir}/timings.json ../examples/cpp/math-client ../examples/cpp/libmath-v1.so ../examples/cpp/libmath-v2.so
+
+echo "#### Testing symbolator compat-matrix"
+runTest 0 $output symbolator compat-matrix ../examples/cpp/libmath-v1.so --binaries ../examples/cpp/math-client --contenders ../examples/cpp/libmath-v1.so ../examples/cpp/libmath-v2.so
+runTest 0 $output symbolator compat-matrix ../examples/cpp/libmath-v1.so --binaries ../examples/cpp/math-client --contenders ../examples/cpp/libmath-v1.so ../examples/cpp/libmath-v2.so --format csv -o ${tmpdir}/matrix.csv
 
 echo "#### Testing smeagle stability"
 runTest 0 $output symbolator stability-test ../examples/smeagle/libmath-v1.so.json ../examples/smeagle/libmath-v2.so.json --detail
+runTest 0 $output symbolator stability-test ../examples/smeagle/libmath-v1.so.json ../examples/smeagle/libmath-v2.so.json --detail --engine asp
+runTest 0 $output symbolator stability-test ../examples/smeagle/libmath-v1.so.json ../examples/smeagle/libmath-v2.so.json --timings -
+runTest 0 $output symbolator stability-matrix ../examples/smeagle/libmath-v1.so.json ../examples/smeagle/libmath-v2.so.json
+runTest 0 $output symbolator stability-matrix ../examples/smeagle/libmath-v1.so.json ../examples/smeagle/libmath-v2.so.json --trusted ${tmpdir}/trusted
+runTest 0 $output symbolator stability-test ../examples/smeagle/libmath-v1.so.json ../examples/smeagle/libmath-v2.so.json --trusted ${tmpdir}/trusted
+runTest 0 $output symbolator stability-test ../examples/smeagle/libmath-v1.so.json ../examples/smeagle/libmath-v2.so.json --stream --detail
+runTest 0 $output symbolator stability-matrix ../examples/smeagle/libmath-v1.so.json ../examples/smeagle/libmath-v2.so.json --stream --trusted ${tmpdir}/trusted -j 2
+runTest 0 $output symbolator stability-matrix ../examples/smeagle/libmath-v1.so.json ../examples/smeagle/libmath-v2.so.json --pairs consecutive --engine asp --detail --format csv -o ${tmpdir}/stability.csv
 
 echo "#### Testing smeagle splice"
 runTest 0 $output symbolator splice ../examples/cpp/math-client
 runTest 0 $output symbolator splice --json ../examples/cpp/math-client
 runTest 0 $output symbolator splice ../examples/cpp/math-client -s libmath-v1.so=../examples/cpp/libmath-v2.so
+runTest 0 $output symbolator splice --engine asp ../examples/cpp/math-client -s libmath-v1.so=../examples/cpp/libmath-v2.so
+runTest 0 $output symbolator splice --profile ${tmpdir}/profiles ../examples/cpp/math-client
 
 echo "#### Testing smeagle jsonsplice"
-runTest 0 $output symbolator jsonsplice ../examples/splice/math-client.json
-runTest 0 $output symbolator jsonsplice --json ../examples/splice/math-client.json
-runTest 0 $output symbolator jsonsplice ../examples/splice/math-client.json -s libmath-v1.so=../examples/splice/libmath-v2.so.json
+symbolator generate ../examples/cpp/math-client --system-libs --json > ${tmpdir}/math-client.json
+runTest 0 $output symbolator jsonsplice ${tmpdir}/math-client.json
+runTest 0 $output symbolator jsonsplice --json ${tmpdir}/math-client.json
+runTest 0 $output symbolator jsonsplice ${tmpdir}/math-client.json -s libmath-v1.so=../examples/splice/libmath-v2.so.json
+runTest 0 $output symbolator jsonsplice --engine asp ${tmpdir}/math-client.json
 
 echo "Finish testing basic client"
 rm -rf ${tmpdir}
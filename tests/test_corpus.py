@@ -0,0 +1,152 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import os
+
+import pytest
+
+from symbolator.corpus.elf import CorpusReader
+from symbolator.corpus import vectorized
+
+
+@pytest.mark.skipif(not vectorized.numpy, reason="NumPy is not installed")
+@pytest.mark.parametrize("name", ["libmath-v1.so", "libmath-v2.so", "math-client"])
+def test_vectorized_symbols(cpp_examples, name):
+    """
+    The numpy decoder must give the same symbols (and order) as pyelftools.
+    """
+    path = os.path.join(cpp_examples, name)
+    expected = CorpusReader(path, decoder="elftools").get_symbols()
+    symbols = vectorized.get_symbols(CorpusReader(path))
+    assert list(symbols.items()) == list(expected.items())
+
+
+@pytest.mark.skipif(not vectorized.numpy, reason="NumPy is not installed")
+def test_vectorized_system_symbols(cpp_examples):
+    """
+    System libraries (libc, libstdc++) have versioned dynamic symbols.
+    """
+    from symbolator.asp import ABISolverBase
+    from symbolator.corpus import Corpus
+
+    solver = ABISolverBase()
+    solver.splices = {}
+    client = Corpus(os.path.join(cpp_examples, "math-client"))
+    for corpus in solver.get_system_corpora([client]):
+        expected = CorpusReader(corpus.path, decoder="elftools").get_symbols()
+        symbols = vectorized.get_symbols(CorpusReader(corpus.path))
+        assert list(symbols.items()) == list(expected.items())
+
+
+@pytest.mark.parametrize("name", ["libmath-v1.so", "math-client"])
+def test_corpus_tiers(cpp_examples, name):
+    """
+    Header and dynamic tags are loaded without reading symbol tables.
+    """
+    from symbolator.corpus import Corpus
+
+    path = os.path.join(cpp_examples, name)
+    corpus = Corpus(path, cache=False)
+    assert corpus.architecture == "EM_X86_64"
+    assert corpus.elfclass == 64
+    assert corpus.needed == CorpusReader(path).get_dynamic_tags().get("needed", [])
+    assert "dynsym" not in corpus._loaded and "symtab" not in corpus._loaded
+
+    dynamic = CorpusReader(path).get_symbols(["SHT_DYNSYM"])
+    assert corpus.dynamic_symbols == dynamic
+    assert "symtab" not in corpus._loaded
+    assert list(corpus.symbols.items()) == list(
+        CorpusReader(path).get_symbols().items()
+    )
+
+
+def test_corpus_cache_tiers(cpp_examples, tmp_path):
+    """
+    A corpus loaded from the cache has the same tiers as a parsed one.
+    """
+    from symbolator.corpus import Corpus
+    from symbolator.corpus.cache import CorpusCache
+
+    cache = CorpusCache(str(tmp_path))
+    path = os.path.join(cpp_examples, "math-client")
+    parsed = Corpus(path, cache=cache)
+    assert parsed.symbols and cache.misses == 1
+
+    cached = Corpus(path, cache=cache)
+    assert list(cached.symbols.items()) == list(parsed.symbols.items())
+    assert cached.dynamic_symbols == parsed.dynamic_symbols
+    assert cached.dynamic_tags == parsed.dynamic_tags
+    assert cached.elfheader == parsed.elfheader
+    assert cache.hits == 1
+
+
+def test_indexed_sections(cpp_examples):
+    """
+    The section index has its own methods, and the ELFFile API is unchanged.
+    """
+    for name in ["iter_sections", "get_section_by_name"]:
+        assert name not in CorpusReader.__dict__
+    reader = CorpusReader(os.path.join(cpp_examples, "libmath-v1.so"))
+    names = [section.name for section in reader.elffile.iter_sections()]
+    assert [x.name for _, x in reader.iter_indexed_sections(object)] == names
+    assert reader.get_indexed_section(".dynsym").name == ".dynsym"
+    assert reader.get_indexed_section(".nope") is None
+
+
+def get_pyelftools_version(reader, idx):
+    """
+    Resolve the version of a dynamic symbol as we did before the version
+    tables, walking the pyelftools version sections.
+    """
+    versions = reader._versions
+    index = versions["versym"].get_symbol(idx).entry["ndx"]
+    version = dict.fromkeys(("index", "name", "filename", "hidden"))
+    if index not in ("VER_NDX_LOCAL", "VER_NDX_GLOBAL"):
+        index = int(index)
+        if index & 0x8000:
+            index &= ~0x8000
+            version["hidden"] = True
+        if versions.get("verdef") and index <= versions["verdef"].num_versions():
+            _, verdaux_iter = versions["verdef"].get_version(index)
+            version["name"] = next(verdaux_iter).name
+        else:
+            verneed, vernaux = versions["verneed"].get_version(index)
+            version["name"] = vernaux.name
+            version["filename"] = verneed.name
+    version["index"] = index
+    return reader._format_symbol_version(version, None)
+
+
+def test_symbol_versions(cpp_examples):
+    """
+    Version tables give the same versions as walking the version sections,
+    for the examples and the system libraries they need (libc, libstdc++).
+    """
+    from symbolator.corpus import Corpus
+    from symbolator.corpus.loader import get_system_corpora
+
+    paths = [os.path.join(cpp_examples, x) for x in ["math-client", "libmath-v1.so"]]
+    syscorpora = get_system_corpora([Corpus(x) for x in paths])
+    checked = 0
+    for path in paths + [corpus.path for corpus in syscorpora]:
+        reader = CorpusReader(path, decoder="elftools")
+        if reader._versions.get("type") != "GNU":
+            continue
+        for idx in range(reader._versions["versym"].num_symbols()):
+            expected = get_pyelftools_version(reader, idx)
+            assert reader._symbol_version(idx)[0] == expected
+            checked += bool(expected)
+    assert checked
+
+
+def test_unknown_symbol_version(cpp_examples):
+    """
+    A version index without a definition or requirement has no version.
+    """
+    reader = CorpusReader(os.path.join(cpp_examples, "math-client"))
+    assert reader._resolve_version(0x7FF0)["name"] is None
+    assert reader.lookup_version(0x7FF0) == ("", None)
+    assert reader.lookup_version(0xFFF0) == ("", None)
+    assert reader._symbol_version(len(reader.get_versym())) == ("", None)
@@ -0,0 +1,227 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Native engines must give the same answers as the logic programs they
+replace, so we run both over the examples and synthetic corpora.
+"""
+
+import copy
+import os
+import random
+
+import pytest
+
+from symbolator.asp import ABICompareSolverSetup, ABIGlobalSolverSetup, PyclingoDriver
+from symbolator.corpus import JsonCorpusLoader
+from symbolator.corpus.loader import load_corpora
+from symbolator.engines import CompareEngine, SpliceEngine, StabilityEngine
+from symbolator.engines.stability import MISSING
+from symbolator.facts import get_facts
+from symbolator.smeagle.model import Model, StabilitySolver
+from symbolator.utils import read_json
+
+here = os.path.dirname(os.path.abspath(__file__))
+examples = os.path.join(os.path.dirname(here), "examples")
+
+
+def sort_answers(answers):
+    return dict((name, sorted(rows)) for name, rows in answers.items())
+
+
+def splice_asp(corpora, system_libs=False):
+    result = PyclingoDriver().solve(
+        ABIGlobalSolverSetup(),
+        corpora,
+        logic_programs=get_facts("missing_symbols.lp"),
+        system_libs=system_libs,
+    )
+    return sort_answers(result.answers)
+
+
+def splice_native(corpora, system_libs=False):
+    result = SpliceEngine().solve(corpora, system_libs=system_libs)
+    return sort_answers(result.answers)
+
+
+def compare_asp(corpora):
+    result = PyclingoDriver().solve(
+        ABICompareSolverSetup(), corpora, logic_programs=get_facts("compare_libs.lp")
+    )
+    return sort_answers(result.answers)
+
+
+def compare_native(corpora):
+    return sort_answers(CompareEngine().solve(corpora).answers)
+
+
+def stability_asp(lib1, lib2):
+    solver = StabilitySolver(lib1, lib2)
+    result = solver.solve(get_facts("stability.lp"), return_result=True)
+    answers = result.answers
+    return sort_answers(dict((k, answers[k]) for k in MISSING.values() if k in answers))
+
+
+def stability_native(lib1, lib2):
+    return sort_answers(StabilityEngine().solve(lib1, lib2).answers)
+
+
+def load_json(path):
+    loader = JsonCorpusLoader()
+    loader.load(path)
+    return loader.corpora
+
+
+def synthetic_closure(seed, size=5, nsymbols=200):
+    """
+    Corpora (from the json example, for headers) with random symbols, where
+    names are shared between corpora and some have compiler versions (so a
+    corpus can have more than one symbol with the same name in facts).
+    """
+    rng = random.Random(seed)
+    entries = read_json(os.path.join(examples, "splice", "libmath-v2.so.json"))
+    names = ["symbol_%s" % i for i in range(nsymbols)]
+    definitions = ["UND", "UND", "12", "14", "ABS"]
+
+    closure = []
+    for i in range(size):
+        entry = copy.deepcopy(entries[i % len(entries)])
+        entry["corpus"]["metadata"]["path"] = "lib%s.so" % i
+        symbols = {"": dict(entry["corpus"]["symbols"][""], defined="UND")}
+        for name in rng.sample(names, rng.randint(0, nsymbols)):
+            variants = [name, name + "@@VERS_1.0"]
+            for name in rng.choice([variants[:1]] * 8 + [variants[1:], variants]):
+                symbols[name] = {
+                    "version_info": rng.choice(["", "", "@GLIBC_2.2.5 (2)"]),
+                    "type": rng.choice(["FUNC", "FUNC", "OBJECT"]),
+                    "binding": rng.choice(["GLOBAL", "GLOBAL", "WEAK"]),
+                    "visibility": rng.choice(["DEFAULT", "DEFAULT", "HIDDEN"]),
+                    "defined": rng.choice(definitions),
+                }
+        entry["corpus"]["symbols"] = symbols
+        closure.append(entry)
+    return load_json(closure)
+
+
+@pytest.mark.parametrize("system_libs", [False, True])
+@pytest.mark.parametrize("splice", [False, True])
+def test_splice_engines_elf(cpp_examples, monkeypatch, system_libs, splice):
+    monkeypatch.chdir(cpp_examples)
+    names = ["math-client", "libmath-v2.so"] if splice else ["math-client"]
+    corpora, _ = load_corpora([os.path.join(cpp_examples, x) for x in names])
+    expected = splice_asp(corpora, system_libs)
+    assert expected["missing_symbols"]
+    assert splice_native(corpora, system_libs) == expected
+
+
+def test_splice_engines_json():
+    corpora = load_json(os.path.join(examples, "splice", "libmath-v2.so.json"))
+    assert splice_native(corpora) == splice_asp(corpora)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_splice_engines_synthetic(seed):
+    corpora = synthetic_closure(seed)
+    assert splice_native(corpora) == splice_asp(corpora)
+
+
+@pytest.mark.skipif(not CompareEngine.available, reason="NumPy is not installed")
+@pytest.mark.parametrize(
+    "names",
+    [
+        ["libmath-v1.so", "libmath-v2.so"],
+        ["math-client", "libmath-v1.so"],
+        ["libmath-v1.so", "libmath-v1.so"],
+    ],
+)
+def test_compare_engines_elf(cpp_examples, monkeypatch, names):
+    monkeypatch.chdir(cpp_examples)
+    corpora, _ = load_corpora([os.path.join(cpp_examples, x) for x in names])
+    assert compare_native(corpora) == compare_asp(corpora)
+
+
+@pytest.mark.skipif(not CompareEngine.available, reason="NumPy is not installed")
+@pytest.mark.parametrize("seed", range(5))
+def test_compare_engines_synthetic(seed, tmp_path, monkeypatch):
+    # The asp engine checks that the libraries exist
+    monkeypatch.chdir(tmp_path)
+    corpora = synthetic_closure(seed, size=2)
+    for corpus in corpora:
+        open(corpus.path, "w").close()
+    expected = compare_asp(corpora)
+    assert "symbol_is_missing" in expected
+    assert compare_native(corpora) == expected
+
+
+def synthetic_models(seed, nfunctions=200):
+    """
+    Two Smeagle models of a library, where the second has some functions or
+    parameters removed or changed. Parameters can be without a name, have an
+    underlying type (with or without a class), fields and any direction, and
+    indirections are numbers or strings (0 and "0" are different terms).
+    """
+    rng = random.Random(seed)
+
+    def parameter():
+        param = {
+            "name": rng.choice(["a", "b", "c", ""]),
+            "class": rng.choice(["Basic", "Pointer", "Struct"]),
+            "location": rng.choice(["%rdi", "%rsi", "%xmm0", "framebase+8"]),
+            "direction": rng.choice(["import", "export", "unknown"]),
+            "indirections": rng.choice([0, 1, "0", "2"]),
+        }
+        if rng.random() < 0.2:
+            param["underlying_type"] = {"class": rng.choice(["Union", None])}
+        if rng.random() < 0.2:
+            param["fields"] = [{"name": "x", "class": "Integer"}]
+        for key in ["class", "location", "direction", "indirections"]:
+            if rng.random() < 0.1:
+                del param[key]
+        return param
+
+    functions = []
+    for i in range(nfunctions):
+        params = [parameter() for _ in range(rng.randint(0, 4))]
+        functions.append({"name": "_Z8functioni%s" % i, "parameters": params})
+
+    changed = []
+    for func in copy.deepcopy(functions):
+        if rng.random() < 0.1:
+            continue
+        for param in func["parameters"]:
+            if rng.random() < 0.15:
+                param["location"] = "%rdx"
+        if func["parameters"] and rng.random() < 0.1:
+            func["parameters"].pop()
+        changed.append(func)
+
+    return [
+        Model(name, {"library": name, "locations": [{"function": x} for x in funcs]})
+        for name, funcs in [("liba.so", functions), ("libb.so", changed)]
+    ]
+
+
+@pytest.mark.parametrize(
+    "names",
+    [
+        ["libmath-v1.so.json", "libmath-v2.so.json"],
+        ["libmath-v2.so.json", "libmath-v1.so.json"],
+        ["libmath-v1.so.json", "libmath-v1.so.json"],
+    ],
+)
+def test_stability_engines_examples(names):
+    libs = [
+        Model(name, read_json(os.path.join(examples, "smeagle", name)))
+        for name in names
+    ]
+    assert stability_native(*libs) == stability_asp(*libs)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stability_engines_synthetic(seed):
+    libs = synthetic_models(seed)
+    expected = stability_asp(*libs)
+    assert expected
+    assert stability_native(*libs) == expected
+    assert stability_native(*reversed(libs)) == stability_asp(*reversed(libs))
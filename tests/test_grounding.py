@@ -0,0 +1,107 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""The size of the ground program (atoms and rules) for reference inputs.
+If a change to a logic program (or to facts) makes one smaller, update the
+counts here. A larger count fails the tests.
+"""
+
+import copy
+import os
+import random
+
+import pytest
+
+from symbolator.asp import ABICompareSolverSetup, PyclingoDriver
+from symbolator.corpus import JsonCorpusLoader
+from symbolator.facts import get_facts
+from symbolator.utils import read_json
+
+here = os.path.dirname(os.path.abspath(__file__))
+examples = os.path.join(os.path.dirname(here), "examples")
+
+# Reference inputs: the share of symbols of a library that are renamed, and
+# that have a changed attribute, in a second library
+REFERENCES = {"builds": (0.02, 0.03), "unrelated": (0.9, 0.05), "same": (0, 0)}
+
+# (atoms, rules) for each reference input and logic program
+GROUNDING = {
+    ("builds", "compare_libs.lp"): (14089, 14089),
+    ("builds", "compare_libs_legacy.lp"): (13107, 13107),
+    ("unrelated", "compare_libs.lp"): (15825, 15825),
+    ("unrelated", "compare_libs_legacy.lp"): (15724, 15724),
+    ("same", "compare_libs.lp"): (14023, 14023),
+    ("same", "compare_libs_legacy.lp"): (13023, 13023),
+}
+
+
+def reference_libraries(name, count=1000, seed=42):
+    """
+    Two libraries (with the header of libmath-v2.so and no needed libraries,
+    so there are no system libraries) for a reference input.
+    """
+    rng = random.Random(seed)
+    entry = read_json(os.path.join(examples, "splice", "libmath-v2.so.json"))[0]
+    libraries = [copy.deepcopy(entry), copy.deepcopy(entry)]
+    for i, library in enumerate(libraries):
+        library["corpus"]["metadata"]["path"] = "lib%s.so" % i
+        library["corpus"]["symbols"] = {}
+
+    renamed, changed = REFERENCES[name]
+    for i in range(count):
+        symbol = "_ZN9Namespace%dClass%d6methodEv" % (i % 7, i)
+        meta = {
+            "version_info": rng.choice(["", "@GLIBC_2.2.5 (2)"]),
+            "type": "FUNC",
+            "binding": rng.choice(["GLOBAL", "WEAK"]),
+            "visibility": "DEFAULT",
+            "defined": rng.choice(["UND", "12", "14"]),
+        }
+        libraries[0]["corpus"]["symbols"][symbol] = meta
+        meta = dict(meta)
+        if rng.random() < renamed:
+            symbol += "_v2"
+        elif rng.random() < changed:
+            meta[rng.choice(["binding", "defined", "type"])] = "changed"
+        libraries[1]["corpus"]["symbols"][symbol] = meta
+
+    loader = JsonCorpusLoader()
+    loader.load(libraries)
+    return loader.corpora
+
+
+def ground(corpora, logic_program):
+    """
+    Ground (and solve) a logic program, and return the answers and the
+    number of ground atoms and rules.
+    """
+    driver = PyclingoDriver(ground_only=False)
+    driver.solve(ABICompareSolverSetup(), corpora, facts_only=True)
+    result = driver.ground_and_solve([get_facts(logic_program)])
+    lp = driver.control.statistics["problem"]["lp"]
+    answers = dict((k, sorted(v)) for k, v in result.answers.items())
+    return answers, (int(lp["atoms"]), int(lp["rules"]))
+
+
+@pytest.mark.parametrize("name", sorted(REFERENCES))
+def test_compare_grounding(tmp_path, monkeypatch, name):
+    """
+    The compare logic programs give the same answers, and their ground
+    programs are no larger than we recorded.
+    """
+    # The compare setup checks that the libraries exist
+    monkeypatch.chdir(tmp_path)
+    corpora = reference_libraries(name)
+    for corpus in corpora:
+        open(corpus.path, "w").close()
+
+    results = {}
+    for logic_program in ["compare_libs.lp", "compare_libs_legacy.lp"]:
+        answers, counts = ground(corpora, logic_program)
+        results[logic_program] = answers
+        atoms, rules = GROUNDING[(name, logic_program)]
+        assert counts[0] <= atoms, "%s has more ground atoms" % logic_program
+        assert counts[1] <= rules, "%s has more ground rules" % logic_program
+    assert results["compare_libs.lp"] == results["compare_libs_legacy.lp"]
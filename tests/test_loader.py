@@ -0,0 +1,52 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import os
+
+import pytest
+
+from symbolator.corpus.loader import CorpusError, load_corpora
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_load_corpora(cpp_examples, tmp_path, jobs):
+    """
+    Corpora come back in order, and a bad file is an error (not an exit).
+    """
+    notelf = tmp_path / "libnotelf.so"
+    notelf.write_text("not an elf file")
+
+    names = ["math-client", "libmath-v1.so", "libmath-v2.so"]
+    paths = [os.path.join(cpp_examples, name) for name in names]
+    corpora, errors = load_corpora(
+        paths[:2] + [str(notelf)] + paths[2:], jobs=jobs, cache=False
+    )
+
+    assert [corpus.path for corpus in corpora] == paths
+    assert len(errors) == 1 and isinstance(errors[0], CorpusError)
+    assert errors[0].path == str(notelf)
+    assert "not an ELF file" in str(errors[0])
+
+    serial, _ = load_corpora(paths, cache=False)
+    for corpus, expected in zip(corpora, serial):
+        assert list(corpus.symbols.items()) == list(expected.symbols.items())
+        assert corpus.dynamic_tags == expected.dynamic_tags
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_load_corpora_missing(cpp_examples, tmp_path, jobs):
+    """
+    A path that doesn't exist is an error, and the other paths still load.
+    """
+    missing = str(tmp_path / "libmissing.so")
+    paths = [
+        os.path.join(cpp_examples, name) for name in ["libmath-v1.so", "libmath-v2.so"]
+    ]
+    corpora, errors = load_corpora(
+        paths[:1] + [missing] + paths[1:], jobs=jobs, cache=False
+    )
+    assert [corpus.path for corpus in corpora] == paths
+    assert len(errors) == 1 and errors[0].path == missing
+    assert "does not exist" in str(errors[0])
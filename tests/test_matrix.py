@@ -0,0 +1,152 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import io
+import itertools
+import os
+
+import pytest
+
+from symbolator.asp import ABICompatSolverSetup, PyclingoDriver
+from symbolator.corpus.loader import load_corpora
+from symbolator.facts import get_facts
+from symbolator.matrix import compat_matrix, get_pair, split, write_csv
+from symbolator.smeagle import matrix
+
+here = os.path.dirname(os.path.abspath(__file__))
+smeagle_examples = os.path.join(os.path.dirname(here), "examples", "smeagle")
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_compat_matrix(cpp_examples, monkeypatch, jobs):
+    """
+    Each binary and contender gives a row, in order.
+    """
+    monkeypatch.chdir(cpp_examples)
+    contenders = ["libmath-v1.so", "libmath-v2.so", "libmath-v1.so"]
+    pairs, errors = compat_matrix(
+        ["math-client"], "libmath-v1.so", contenders, jobs=jobs
+    )
+    assert not errors
+    assert [pair["library_contender"] for pair in pairs] == contenders
+    assert [pair["compatible"] for pair in pairs] == [True, False, True]
+    assert pairs[1]["count_missing_symbols"] == 1
+    assert pairs[1]["missing_symbols"] == ["_ZN11MathLibrary10Arithmetic3AddEdd"]
+
+    out = io.StringIO()
+    write_csv(pairs, out)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 4
+    assert lines[2] == "math-client,libmath-v1.so,libmath-v2.so,1,1,False"
+
+
+def test_compat_matrix_matches_compat(cpp_examples):
+    """
+    A session gives the same row as symbolator compat (is_compatible.lp) for
+    every example binary, working library and contender.
+    """
+    names = ["math-client", "libmath-v1.so", "libmath-v2.so"]
+    corpora, errors = load_corpora([os.path.join(cpp_examples, x) for x in names])
+    assert not errors
+    libs = corpora[1:]
+    for binary, working in itertools.product(corpora, libs):
+        pairs, errors = compat_matrix([binary], working, corpora)
+        assert not errors and len(pairs) == len(corpora)
+        for pair, contender in zip(pairs, corpora):
+            mismatches = binary.header_mismatches(contender)
+            result = None
+            if not mismatches:
+                result = PyclingoDriver().solve(
+                    ABICompatSolverSetup(),
+                    [binary, working, contender],
+                    logic_programs=get_facts("is_compatible.lp"),
+                )
+            expected = get_pair(binary, working, contender, result, mismatches)
+            for row in pair, expected:
+                row["missing_symbols"] = sorted(row["missing_symbols"])
+            assert pair == expected
+
+
+def test_split():
+    assert split([], 4) == []
+    assert split([1, 2, 3], 2) == [[1, 2], [3]]
+    assert split([1, 2], 0) == [[1, 2]]
+
+
+def test_compat_matrix_errors(cpp_examples, tmp_path):
+    notelf = tmp_path / "libnotelf.so"
+    notelf.write_text("not an elf file")
+    binary = os.path.join(cpp_examples, "math-client")
+    working = os.path.join(cpp_examples, "libmath-v1.so")
+    pairs, errors = compat_matrix([binary], working, [str(notelf)])
+    assert not pairs and errors[0].path == str(notelf)
+
+
+@pytest.mark.parametrize("engine", ["asp", "native"])
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_stability_matrix(engine, jobs):
+    """
+    Each ordered pair of libraries gives a row, in order, and both engines
+    give the same counts (and missing imports).
+    """
+    libs = [
+        os.path.join(smeagle_examples, x)
+        for x in ["libmath-v1.so.json", "libmath-v2.so.json", "libmath-v1.so.json"]
+    ]
+    rows, errors = matrix.stability_matrix(libs, engine=engine, jobs=jobs, detail=True)
+    assert not errors
+    assert matrix.stability_matrix(
+        libs, engine=engine, jobs=jobs, detail=True, stream=True
+    ) == (rows, [])
+    assert [(row["library_a"], row["library_b"]) for row in rows] == [
+        (libs[0], libs[1]),
+        (libs[1], libs[0]),
+    ]
+    assert [row["count_missing_imports"] for row in rows] == [2, 2]
+    assert [row["count_missing_exports"] for row in rows] == [0, 0]
+    assert not any(row["stable"] for row in rows)
+    assert rows[0]["missing_imports"] == [
+        ["_ZN11MathLibrary10Arithmetic3AddEdd", "Basic", "%rdi", "0"],
+        ["_ZN11MathLibrary10Arithmetic3AddEdd", "Basic", "%rsi", "0"],
+    ]
+
+    names = libs[:2]
+    assert matrix.get_matrix(rows, names, "count_missing_imports") == [
+        [None, 2],
+        [2, None],
+    ]
+    out = io.StringIO()
+    matrix.write_csv(rows, out)
+    assert out.getvalue().splitlines()[1].endswith(",0,2,False")
+
+
+def test_stability_matrix_pairs(tmp_path):
+    assert matrix.get_pairs(3, "consecutive") == [(0, 1), (1, 2)]
+    assert len(matrix.get_pairs(4)) == 12
+    with pytest.raises(ValueError):
+        matrix.get_pairs(3, "some")
+
+    invalid = tmp_path / "invalid.json"
+    invalid.write_text('{"library": "libinvalid.so"}')
+    rows, errors = matrix.stability_matrix(
+        [os.path.join(smeagle_examples, "libmath-v1.so.json"), str(invalid)]
+    )
+    assert not rows
+    assert len(errors) == 1 and errors[0].path == str(invalid)
+    assert str(errors[0]).startswith(str(invalid))
+
+    # Paths we cannot read are errors too (streamed or not)
+    for stream in [False, True]:
+        rows, errors = matrix.stability_matrix(
+            [str(tmp_path / "missing.json"), str(tmp_path), str(invalid)],
+            stream=stream,
+        )
+        assert not rows
+        assert [error.path for error in errors] == [
+            str(tmp_path / "missing.json"),
+            str(tmp_path),
+            str(invalid),
+        ]
+        assert "No such file" in str(errors[0])
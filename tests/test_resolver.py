@@ -0,0 +1,103 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import os
+import shutil
+import struct
+
+from symbolator.corpus import Corpus
+from symbolator.corpus.resolver import LibraryResolver, parse_ld_so_cache
+
+
+def make_ld_so_cache(entries):
+    """
+    Write an ld.so.cache (new format) for a list of (name, path)
+    """
+    strings = b""
+    offsets = []
+    start = 48 + 24 * len(entries)
+    for name, path in entries:
+        offsets.append((start + len(strings), start + len(strings) + len(name) + 1))
+        strings += name.encode() + b"\0" + path.encode() + b"\0"
+    data = b"glibc-ld.so.cache1.1" + struct.pack("=IIB3xI12x", len(entries), 0, 0, 0)
+    for key, value in offsets:
+        data += struct.pack("=iIIIQ", 0x0303, key, value, 0, 0)
+    return data + strings
+
+
+def test_parse_ld_so_cache():
+    data = make_ld_so_cache(
+        [("libc.so.6", "/lib64/libc.so.6"), ("libc.so.6", "/lib/libc.so.6")]
+    )
+    assert parse_ld_so_cache(data) == {
+        "libc.so.6": ["/lib64/libc.so.6", "/lib/libc.so.6"]
+    }
+    assert parse_ld_so_cache(b"not a cache") == {}
+
+
+def test_closure(cpp_examples):
+    """
+    The example binary needs libmath-v1.so (from LD_LIBRARY_PATH) and
+    the C++ runtime, which needs libc (once).
+    """
+    resolver = LibraryResolver(ld_library_path=cpp_examples)
+    client = Corpus(os.path.join(cpp_examples, "math-client"))
+    libs, missing = resolver.get_closure([client])
+    names = [lib.name for lib in libs]
+    assert names[:3] == ["libmath-v1.so", "libstdc++.so.6", "libc.so.6"]
+    assert len(set(lib.path for lib in libs)) == len(libs)
+    assert libs[0].path == os.path.join(cpp_examples, "libmath-v1.so")
+    assert not missing
+
+
+def test_closure_options(cpp_examples, monkeypatch):
+    """
+    Corpora for libraries we find take the options of the resolver (and of
+    get_system_corpora), e.g., the symbol decoder.
+    """
+    from symbolator.corpus.loader import get_system_corpora
+
+    options = {"cache": False, "decoder": "elftools"}
+    resolver = LibraryResolver(ld_library_path=cpp_examples, **options)
+    client = Corpus(os.path.join(cpp_examples, "math-client"))
+    libs, _ = resolver.get_closure([client])
+    assert libs and all(lib.kwargs == options for lib in libs)
+
+    monkeypatch.setenv("LD_LIBRARY_PATH", cpp_examples)
+    libs = get_system_corpora([client], **options)
+    assert libs and all(lib.kwargs == options for lib in libs)
+
+
+def test_closure_missing_and_splice(cpp_examples, tmp_path):
+    """
+    Without a search path the example library is missing, unless we splice.
+    """
+    shutil.copy(os.path.join(cpp_examples, "math-client"), str(tmp_path))
+    client = Corpus(os.path.join(str(tmp_path), "math-client"))
+    libs, missing = LibraryResolver(ld_library_path="").get_closure([client])
+    assert missing == ["libmath-v1.so"]
+
+    v2 = os.path.join(cpp_examples, "libmath-v2.so")
+    resolver = LibraryResolver(ld_library_path="", splices={"libmath-v1.so": v2})
+    libs, missing = resolver.get_closure([client])
+    assert libs[0].path == v2 and not missing
+
+
+def test_closure_origin(cpp_examples, tmp_path):
+    """
+    A library in an $ORIGIN runpath is found, and dependencies are not
+    searched in the runpath of the library that loaded them.
+    """
+    libdir = tmp_path / "lib"
+    libdir.mkdir()
+    shutil.copy(os.path.join(cpp_examples, "libmath-v1.so"), str(libdir))
+    client = Corpus(os.path.join(cpp_examples, "math-client"))
+    client.dynamic_tags = dict(client.dynamic_tags, runpath=["$ORIGIN/lib"])
+    client.path = str(tmp_path / "math-client")
+    shutil.copy(os.path.join(cpp_examples, "math-client"), client.path)
+
+    libs, missing = LibraryResolver(ld_library_path="").get_closure([client])
+    assert libs[0].path == str(libdir / "libmath-v1.so")
+    assert not missing
@@ -0,0 +1,40 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import os
+
+from symbolator.asp import ABICompatSolverSetup, CompatSession, PyclingoDriver
+from symbolator.corpus.loader import load_corpora
+from symbolator.facts import get_facts
+
+
+def sort_answers(answers):
+    return dict((name, sorted(rows)) for name, rows in answers.items())
+
+
+def test_compat_session(cpp_examples, monkeypatch):
+    """
+    A session gives the same answers as a solve of is_compatible.lp, and
+    only grounds each contender once.
+    """
+    monkeypatch.chdir(cpp_examples)
+    names = ["math-client", "libmath-v1.so", "libmath-v2.so"]
+    binary, working, contender = load_corpora(
+        [os.path.join(cpp_examples, x) for x in names]
+    )[0]
+
+    session = CompatSession(binary, working)
+    for library in [contender, working, contender]:
+        result = session.check(library)
+        expected = PyclingoDriver().solve(
+            ABICompatSolverSetup(),
+            [binary, working, library],
+            logic_programs=get_facts("is_compatible.lp"),
+        )
+        assert result.satisfiable
+        assert sort_answers(result.answers) == sort_answers(expected.answers)
+
+    assert list(session.contenders) == [contender.path, working.path]
+    assert session.check(contender).answers["count_missing_symbols"] == [["1"]]
@@ -0,0 +1,59 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import os
+
+import pytest
+
+from symbolator.asp import ABICompatSolverSetup, ABIGlobalSolverSetup, PyclingoDriver
+from symbolator.corpus.loader import load_corpora
+from symbolator.facts import get_facts
+
+
+def solve(setup, corpora, logic_program, **kwargs):
+    driver = PyclingoDriver()
+    result = driver.solve(
+        setup, corpora, logic_programs=get_facts(logic_program), **kwargs
+    )
+    answers = dict((k, sorted(v)) for k, v in result.answers.items())
+    return answers, len(driver.facts)
+
+
+@pytest.mark.parametrize("contender", ["libmath-v1.so", "libmath-v2.so"])
+def test_compat_slicing(cpp_examples, monkeypatch, contender):
+    """
+    Only emitting facts for relevant symbols gives the same compat answers.
+    """
+    monkeypatch.chdir(cpp_examples)
+    names = ["math-client", "libmath-v1.so", contender]
+    corpora, _ = load_corpora([os.path.join(cpp_examples, x) for x in names])
+
+    results = []
+    for slice in [True, False]:
+        setup = ABICompatSolverSetup(slice=slice)
+        results.append(solve(setup, corpora, "is_compatible.lp"))
+
+    (sliced, nsliced), (full, nfull) = results
+    assert sliced == full
+    assert nsliced < nfull
+
+
+def test_splice_slicing(cpp_examples, monkeypatch):
+    """
+    Only emitting facts for relevant symbols gives the same splice answers.
+    """
+    monkeypatch.chdir(cpp_examples)
+    names = ["math-client", "libmath-v2.so"]
+    corpora, _ = load_corpora([os.path.join(cpp_examples, x) for x in names])
+
+    results = []
+    for slice in [True, False]:
+        setup = ABIGlobalSolverSetup(slice=slice)
+        results.append(solve(setup, corpora, "missing_symbols.lp"))
+
+    (sliced, nsliced), (full, nfull) = results
+    assert sliced == full
+    assert "missing_symbols" in sliced
+    assert nsliced < nfull
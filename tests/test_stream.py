@@ -0,0 +1,208 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import json
+import os
+import random
+import tracemalloc
+
+import pytest
+
+from symbolator.engines import StabilityEngine
+from symbolator.smeagle import SmeagleRunner, stream, validate
+from symbolator.smeagle.model import (
+    FactGeneratorSetup,
+    Model,
+    SmeagleClingoDriver,
+    StreamModel,
+)
+from symbolator.smeagle.validate import ModelValidationError, TrustedModels
+
+here = os.path.dirname(os.path.abspath(__file__))
+smeagle_examples = os.path.join(os.path.dirname(here), "examples", "smeagle")
+
+
+def valid_model(seed, nfunctions=100):
+    """
+    A valid Smeagle model, with nested fields and underlying types.
+    """
+    rng = random.Random(seed)
+    locations = []
+    for i in range(nfunctions):
+        params = []
+        for name in rng.sample(["a", "b", "c"], rng.randint(0, 3)):
+            param = {
+                "name": name,
+                "class": rng.choice(["Basic", "Pointer", "Struct"]),
+                "location": rng.choice(["%rdi", "%rsi", "framebase+8"]),
+                "direction": rng.choice(["import", "export"]),
+                "indirections": rng.choice(["0", "1"]),
+                "size": rng.choice([8, "16"]),
+            }
+            if rng.random() < 0.3:
+                param["fields"] = [
+                    {"name": "x", "class": "Integer", "fields": [{"name": "y"}]}
+                ]
+            if rng.random() < 0.2:
+                param["underlying_type"] = {"name": "u", "class": "Union"}
+            params.append(param)
+        locations.append({"function": {"name": "_Z1fi%s" % i, "parameters": params}})
+    return {"library": "libsynthetic-%s.so" % seed, "locations": locations}
+
+
+def read_model(path, chunk_size):
+    """
+    Put a model back together from what iter_model yields.
+    """
+    data = {}
+    for key, value in stream.iter_model(path, chunk_size):
+        if isinstance(key, tuple):
+            data[key[0]].append(value)
+        else:
+            data[key] = value
+    return data
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, stream.CHUNK_SIZE])
+def test_iter_model(tmp_path, chunk_size):
+    """
+    We read the same model as json does, with values cut across chunks.
+    """
+    path = os.path.join(smeagle_examples, "libmath-v1.so.json")
+    with open(path) as fd:
+        assert read_model(path, chunk_size) == json.load(fd)
+
+    # Locations before the library, numbers at the end of chunks, unicode
+    data = valid_model(0, 20)
+    data = {"locations": data["locations"], "library": "libé.so", "size": 1234567}
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    assert read_model(str(path), chunk_size) == data
+
+    path.write_text('{"locations": [], "library": "a"}')
+    assert read_model(str(path), chunk_size) == {"locations": [], "library": "a"}
+
+
+@pytest.mark.parametrize(
+    "content",
+    ['{"library": "a", "locations": [{}', '{"library": "a"} {}', "[]", '{"a" 1}', ""],
+)
+def test_invalid_json(tmp_path, content):
+    path = tmp_path / "invalid.json"
+    path.write_text(content)
+    with pytest.raises(ModelValidationError) as e:
+        StreamModel("invalid", str(path))
+    assert e.value.path == str(path)
+    assert "char" in e.value.errors[0]["message"]
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_errors(tmp_path, monkeypatch, compiled):
+    """
+    Streaming validation gives the same errors as validating the model.
+    """
+    if not compiled:
+        monkeypatch.setattr(validate, "get_compiled_validator", lambda name: None)
+    data = valid_model(1, 10)
+    data["locations"][3]["function"]["parameters"] = [{"name": 1, "other": "x"}]
+    data["locations"][7] = {"function": {}}
+    data["locations"][8]["function"]["parameters"] = [
+        {"name": "a", "fields": [{"name": "x", "fields": [{"class": "Integer"}]}]}
+    ]
+    data["extra"] = True
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps(data))
+
+    with pytest.raises(ModelValidationError) as expected:
+        validate.validate_model(data, str(path))
+    with pytest.raises(ModelValidationError) as e:
+        StreamModel("model", str(path), chunk_size=100)
+    assert e.value.errors == expected.value.errors
+    assert [error["path"][:2] for error in e.value.errors] == [
+        [],
+        ["locations", 3],
+        ["locations", 3],
+        ["locations", 7],
+        ["locations", 8],
+    ]
+
+
+def get_facts(lib, identifier):
+    driver = SmeagleClingoDriver()
+    driver.solve(FactGeneratorSetup(lib, identifier), facts_only=True)
+    return driver.facts
+
+
+def test_stream_model(tmp_path):
+    """
+    A model we stream gives the same facts and stability as one in memory.
+    """
+    libs = []
+    for seed in [2, 3]:
+        data = valid_model(seed)
+        path = tmp_path / ("%s.json" % seed)
+        path.write_text(json.dumps(data))
+        libs.append((Model(str(path), data), StreamModel(str(path), str(path))))
+    for lib, streamed in libs:
+        assert streamed.data == {"library": lib.data["library"]}
+        assert get_facts(streamed, "a") == get_facts(lib, "a")
+
+    result = StabilityEngine().solve(libs[0][0], libs[1][0])
+    streamed = StabilityEngine().solve(libs[0][1], libs[1][1])
+    assert streamed.answers == result.answers
+    assert result.answers
+
+
+@pytest.mark.parametrize("engine", ["asp", "native"])
+def test_stream_runner(engine):
+    results = []
+    for stream_models in [False, True]:
+        runner = SmeagleRunner(stream=stream_models)
+        for name in ["libmath-v1.so.json", "libmath-v2.so.json"]:
+            runner.load(os.path.join(smeagle_examples, name))
+        results.append(runner.stability_test(return_result=True, engine=engine))
+    assert results[0].answers == results[1].answers
+
+
+def test_stream_memory(tmp_path):
+    """
+    Streaming a large model keeps a bounded amount of it in memory.
+    """
+    data = valid_model(4, 5000)
+    path = tmp_path / "large.json"
+    path.write_text(json.dumps(data))
+    size = os.path.getsize(str(path))
+    del data
+
+    tracemalloc.start()
+    try:
+        lib = StreamModel("large", str(path))
+        count = sum(1 for _ in lib.iter_locations())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count == 5000
+    assert size > 1000000 and peak < size / 4
+
+
+def test_stream_trusted(tmp_path, monkeypatch):
+    """
+    A trusted model isn't validated again, and we only read its header.
+    """
+    calls = []
+    get_model_errors = stream.get_model_errors
+    monkeypatch.setattr(
+        stream,
+        "get_model_errors",
+        lambda data, name="model": calls.append(name) or get_model_errors(data, name),
+    )
+    path = os.path.join(smeagle_examples, "libmath-v1.so.json")
+    trusted = TrustedModels(str(tmp_path))
+    StreamModel("libmath", path, trusted)
+    assert calls and calls[-1] == "model"
+    del calls[:]
+    lib = StreamModel("libmath", path, trusted)
+    assert not calls
+    assert lib.data["library"].endswith("libmath-v1.so")
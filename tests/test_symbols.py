@@ -0,0 +1,73 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import json
+
+import pytest
+
+from symbolator.corpus.symbols import SymbolTable
+
+
+def make_symbol(binding="GLOBAL", defined="12", version_info=""):
+    return {
+        "version_info": version_info,
+        "type": "FUNC",
+        "binding": binding,
+        "visibility": "DEFAULT",
+        "defined": defined,
+    }
+
+
+def test_symbol_table_mapping():
+    """
+    A SymbolTable reads (and orders) like the dict of dicts it replaces.
+    """
+    expected = {
+        "": make_symbol("LOCAL", "UND"),
+        "_ZN11MathLibrary10Arithmetic3AddEdd": make_symbol(),
+        "__cxa_finalize": make_symbol("WEAK", "UND", "@GLIBC_2.2.5 (2)"),
+        "café": make_symbol(),
+    }
+    symbols = SymbolTable(expected).compact()
+
+    assert len(symbols) == len(expected)
+    assert list(symbols) == list(expected)
+    assert symbols.get_names() == list(expected)
+    ascii = dict((k, v) for k, v in expected.items() if k.isascii())
+    assert SymbolTable(ascii).get_names() == list(ascii)
+    assert list(symbols.items()) == list(expected.items())
+    assert list(symbols.values()) == list(expected.values())
+    assert symbols["__cxa_finalize"] == expected["__cxa_finalize"]
+    assert "café" in symbols and "missing" not in symbols
+    assert symbols.get("missing") is None
+    assert symbols == expected
+    assert json.loads(json.dumps(symbols.to_dict())) == expected
+
+
+def test_symbol_table_overwrite():
+    """
+    Adding a name again keeps its position and takes the new attributes.
+    """
+    symbols = SymbolTable()
+    symbols["a"] = make_symbol()
+    symbols["b"] = make_symbol()
+    symbols["a"] = make_symbol("WEAK")
+    assert list(symbols) == ["a", "b"]
+    assert symbols["a"]["binding"] == "WEAK"
+    assert symbols.compact()["b"]["binding"] == "GLOBAL"
+
+
+def test_symbol_table_read_only():
+    """
+    The attributes of a symbol are read-only (a change would be lost).
+    """
+    symbols = SymbolTable({"a": make_symbol()})
+    with pytest.raises(TypeError):
+        symbols["a"]["binding"] = "WEAK"
+    for _, meta in symbols.items():
+        with pytest.raises(TypeError):
+            meta["binding"] = "WEAK"
+    symbols.to_dict()["a"]["binding"] = "WEAK"
+    assert symbols["a"]["binding"] == "GLOBAL"
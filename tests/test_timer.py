@@ -0,0 +1,112 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import io
+import json
+import os
+import pstats
+import time
+
+import pytest
+
+from symbolator import timer
+from symbolator.asp import ABIGlobalSolverSetup, PyclingoDriver
+from symbolator.corpus.loader import load_corpora
+from symbolator.facts import get_facts
+
+
+@pytest.fixture
+def configured():
+    yield timer.configure(name="command")
+    timer.configure(False)
+
+
+def test_nested_spans():
+    """
+    The time of a nested span is not counted for the span around it.
+    """
+    t = timer.Timer(name="command")
+    with t.measure("outer", files=1):
+        time.sleep(0.02)
+        with t.measure("inner", symbols=3):
+            time.sleep(0.05)
+    t.record("outer", files=1)
+    report = t.to_dict()
+
+    phases = report["phases"]
+    assert phases["outer"]["files"] == 2
+    assert phases["inner"]["symbols"] == 3
+    assert phases["inner"]["wall"] >= 0.05
+    assert phases["outer"]["wall"] < phases["inner"]["wall"]
+    assert sum(x["wall"] for x in phases.values()) == pytest.approx(
+        report["total"]["wall"]
+    )
+    assert set(report["total"]) == {"wall", "cpu", "max_rss"}
+    json.dumps(report)
+
+
+def test_unconfigured():
+    """
+    Without a configured timer, measure and record do nothing.
+    """
+    assert timer.get_timer() is None
+    with timer.measure("parse") as t:
+        assert t is None
+    timer.record("parse", files=1)
+
+
+def test_solve_phases(cpp_examples, configured):
+    """
+    A solve records counts for its phases, and the clingo statistics.
+    """
+    corpora, errors = load_corpora([os.path.join(cpp_examples, "libmath-v1.so")])
+    assert not errors
+    PyclingoDriver().solve(
+        ABIGlobalSolverSetup(),
+        corpora,
+        logic_programs=get_facts("missing_symbols.lp"),
+    )
+    report = configured.to_dict()
+    phases = report["phases"]
+    assert phases["parse"]["files"] == 1
+    assert phases["parse"]["symbols"] > 0
+    assert phases["facts"]["facts"] > 0
+    assert phases["load"]["facts"] == phases["facts"]["facts"]
+    assert phases["ground"]["atoms"] > 0
+    assert "solve" in phases
+    assert "problem" in report["statistics"]
+    json.dumps(report)
+
+
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+def test_profiles(tmp_path):
+    """
+    Each phase has its own profile, and collapsed stacks that account for
+    the time of its functions.
+    """
+    t = timer.Timer(name="command", profile=True)
+    with t.measure("outer"):
+        fib(15)
+        with t.measure("inner"):
+            sorted(range(100000), key=lambda x: -x)
+    t.write_profiles(str(tmp_path), out=io.StringIO())
+
+    inner = pstats.Stats(str(tmp_path / "inner.pstats")).stats
+    assert not any(func[2] == "fib" for func in inner)
+    outer = pstats.Stats(str(tmp_path / "outer.pstats")).stats
+    assert any(func[2] == "fib" for func in outer)
+
+    stacks = timer.collapse_stacks(outer, threshold=0)
+    assert any(stack.endswith("(fib)") for stack in stacks)
+    assert not any("(fib);" in stack for stack in stacks)
+    assert sum(stacks.values()) == pytest.approx(
+        sum(x[2] for x in outer.values()), rel=0.01
+    )
+    for line in (tmp_path / "outer.folded").read_text().splitlines():
+        stack, microseconds = line.rsplit(" ", 1)
+        assert int(microseconds) >= 0
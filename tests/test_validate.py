@@ -0,0 +1,138 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import copy
+import json
+import os
+
+import pytest
+
+from symbolator.smeagle import SmeagleRunner, validate
+from symbolator.smeagle.validate import ModelValidationError, TrustedModels
+
+here = os.path.dirname(os.path.abspath(__file__))
+smeagle_examples = os.path.join(os.path.dirname(here), "examples", "smeagle")
+example = os.path.join(smeagle_examples, "libmath-v1.so.json")
+
+
+@pytest.fixture(params=["compiled", "jsonschema"])
+def validator(request, monkeypatch):
+    """
+    Validate with the compiled schema (if we can) and with jsonschema.
+    """
+    if request.param == "compiled":
+        if validate.fastjsonschema is None:
+            pytest.skip("fastjsonschema is not installed")
+    else:
+        monkeypatch.setattr(validate, "get_compiled_validator", lambda name: None)
+    return request.param
+
+
+def get_model():
+    with open(example) as fd:
+        return json.load(fd)
+
+
+def test_nested_fields(validator):
+    """
+    Fields of a parameter can have fields of their own.
+    """
+    data = get_model()
+    param = {
+        "name": "point",
+        "class": "Struct",
+        "location": "%rdi",
+        "fields": [
+            {"name": "x", "class": "Integer", "fields": [{"name": "y"}]},
+        ],
+    }
+    data["locations"].append({"function": {"name": "move", "parameters": [param]}})
+    validate.validate_model(data)
+
+
+def test_errors(validator):
+    """
+    An invalid model gives every error, with where it is in the model.
+    """
+    data = get_model()
+    del data["library"]
+    data["locations"][0]["function"]["parameters"][0]["indirections"] = 1
+    with pytest.raises(ModelValidationError) as e:
+        validate.validate_model(data, "libmath.json")
+    errors = e.value.errors
+    assert len(errors) == 2
+    assert errors[0]["path"] == []
+    assert "library" in errors[0]["message"]
+    assert errors[1]["path"] == [
+        "locations",
+        0,
+        "function",
+        "parameters",
+        0,
+        "indirections",
+    ]
+    assert str(e.value).startswith("libmath.json: ")
+    assert "locations/0/function/parameters/0/indirections: " in str(e.value)
+
+
+def test_invalid_json(tmp_path):
+    path = tmp_path / "invalid.json"
+    path.write_text("{")
+    with pytest.raises(ModelValidationError) as e:
+        SmeagleRunner().load(str(path))
+    assert e.value.path == str(path)
+
+
+def test_trusted(tmp_path, monkeypatch):
+    """
+    A model that passed once isn't validated again, in this process or
+    (with a directory) another one, unless its content changes.
+    """
+    calls = []
+    validate_model = validate.validate_model
+    monkeypatch.setattr(
+        validate,
+        "validate_model",
+        lambda data, path=None: calls.append(path) or validate_model(data, path),
+    )
+    root = tmp_path / "trusted"
+    trusted = TrustedModels(str(root))
+    validate.load_model_data(example, trusted)
+    validate.load_model_data(example, trusted)
+    assert calls == [example]
+    assert len(os.listdir(str(root / validate.get_schema_digest()))) == 1
+
+    validate.load_model_data(example, TrustedModels(str(root)))
+    assert calls == [example]
+
+    data = get_model()
+    data["library"] = "libchanged.so"
+    changed = tmp_path / "changed.json"
+    changed.write_text(json.dumps(data))
+    validate.load_model_data(str(changed), TrustedModels(str(root)))
+    assert calls == [example, str(changed)]
+
+
+def test_compiled_errors(monkeypatch):
+    """
+    If only the compiled schema finds an error, we still give it.
+    """
+    if validate.fastjsonschema is None:
+        pytest.skip("fastjsonschema is not installed")
+    data = get_model()
+    data["locations"][0]["function"]["parameters"][0]["indirections"] = 1
+    monkeypatch.setattr(validate, "get_errors", lambda data, name="model": [])
+    with pytest.raises(ModelValidationError) as e:
+        validate.validate_model(data)
+    assert e.value.errors[0]["path"] == [
+        "locations",
+        0,
+        "function",
+        "parameters",
+        0,
+        "indirections",
+    ]
+    assert not str(e.value).startswith("None")
+    assert str(e.value).startswith("locations/0/function/parameters/0/indirections: ")